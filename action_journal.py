@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Recording Action Journal
+Streams recorded actions to disk as they happen so a crashed session can be recovered
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+
+JOURNAL_PATTERN = "recording_journal_*.jsonl"
+# A recovered journal is renamed so it is neither listed nor recovered again
+RECOVERED_SUFFIX = ".recovered"
+FLUSH_EVERY = 20
+FLUSH_INTERVAL = 1.0
+
+
+class ActionJournal:
+    """Append-only JSONL journal of one recording session.
+
+    Entries are buffered and written in batches by a background thread:
+    as soon as FLUSH_EVERY entries are pending, and at least every
+    FLUSH_INTERVAL seconds, so at most about a second of a session is lost
+    on a crash. write() only appends to the buffer, so the hook and event
+    loop threads never wait for the disk.
+    """
+
+    def __init__(self, path, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_every = flush_every
+        self._file = open(path, 'a', encoding='utf-8')
+        self._buffer = []
+        self._lock = threading.Lock()       # guards the buffer
+        self._io_lock = threading.Lock()    # one batch written at a time
+        self._full = threading.Event()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, args=(flush_interval,), daemon=True)
+        self._flusher.start()
+
+    def write(self, kind, data):
+        """Queue one journal entry; kind is 'session', 'action', 'captured_text', ..."""
+        line = json.dumps({'kind': kind, 'data': data}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.flush_every
+        if full:
+            self._full.set()    # the flusher writes the batch
+
+    def flush(self):
+        """Write pending entries and push them to disk."""
+        with self._io_lock:
+            self._flush_io_locked()
+
+    def _flush_io_locked(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch or self._file.closed:
+            return
+        self._file.write("".join(batch))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _flush_periodically(self, interval):
+        while not self._closed.is_set():
+            self._full.wait(interval)
+            self._full.clear()
+            self.flush()
+
+    def close(self, remove=False):
+        """Flush and close the journal; remove it once the session is safely saved."""
+        self._closed.set()
+        self._full.set()
+        self._flusher.join()
+        with self._io_lock:
+            self._flush_io_locked()
+            self._file.close()
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                print(f"Warning: Could not remove journal {self.path}: {e}")
+
+
+def read_journal(path):
+    """Yield (kind, data) entries, stopping at a half-written final line."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️  Stopped at a damaged entry in {path}")
+                return
+            yield entry['kind'], entry['data']
+
+
+def rebuild_session(path):
+    """Rebuild the recorder state of a session from its journal."""
+    session = {
+        'start_time': None,
+        'end_time': None,
+        'actions': [],
+        'captured_text': [],
+        'selected_messages': [],
+    }
+    for kind, data in read_journal(path):
+        if kind == 'session':
+            session['start_time'] = data['start_time']
+        elif kind == 'action':
+            session['actions'].append(data)
+            session['end_time'] = data.get('timestamp', session['end_time'])
+        elif kind == 'element_info':
+            if data['index'] < len(session['actions']):
+                session['actions'][data['index']]['element_info'] = data['element_info']
+        elif kind == 'captured_text':
+            session['captured_text'].append(data['text'])
+        elif kind == 'selected_message':
+            session['selected_messages'].append(data)
+    return session
+
+
+def recover(path):
+    """Regenerate script, data and message files from a journal, then set the journal aside."""
+    from whatsapp_recorder import WhatsAppRecorder
+
+    session = rebuild_session(path)
+    if not session['actions']:
+        print(f"📭 No actions found in {path}")
+        return None
+    if session['start_time'] is None:
+        session['start_time'] = session['actions'][0]['timestamp']
+
+    recorder = WhatsAppRecorder()
+    recorder.start_time = datetime.fromisoformat(session['start_time'])
+    recorder.recorded_actions = session['actions']
+    recorder.captured_text = session['captured_text']
+    recorder.selected_messages = session['selected_messages']
+
+    end_time = datetime.fromisoformat(session['end_time'] or session['start_time'])
+    print(f"🩹 Recovered {len(session['actions'])} actions from {path}")
+    recorder.finish_session(end_time)
+    try:
+        os.replace(path, path + RECOVERED_SUFFIX)
+    except OSError as e:
+        print(f"Warning: Could not rename journal {path}: {e}")
+    return session
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Recover interrupted WhatsApp recording sessions")
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('list', help="list journals of sessions that did not finish")
+    recover_parser = sub.add_parser('recover', help="rebuild a session and generate its script")
+    recover_parser.add_argument('journal', help="recording_journal_*.jsonl file")
+    args = parser.parse_args()
+
+    if args.command == 'recover':
+        recover(args.journal)
+    elif args.command == 'list':
+        journals = sorted(glob.glob(JOURNAL_PATTERN))
+        if not journals:
+            print("No unfinished recording journals found.")
+        for path in journals:
+            session = rebuild_session(path)
+            print(f"📓 {path}: {len(session['actions'])} actions, started {session['start_time']}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Recorded Action Optimizer
+Drops or merges redundant recorded actions before a script is generated or a recording is replayed
+"""
+
+import argparse
+from collections import Counter
+
+from compact_recording import is_compact, load_actions, write_compact, write_json
+from mouse_gestures import append_run, wheel_delta
+from replay_engine import recorded_gap
+from text_buffer import MODIFIER_KEYS
+
+# The recorder's own stop and cancel hotkeys; recorded as key presses they are artifacts
+RECORDER_HOTKEYS = ('ctrl+r', 'esc')
+# Pairs of key presses that undo each other (they only reach the recording when the input box is empty)
+INVERSE_KEYS = {'left': 'right', 'right': 'left'}
+# Clicking one of these again selects or focuses what is already selected or focused
+IDEMPOTENT_CLICK_TYPES = {'ListItem', 'Edit'}
+# Two clicks closer than this are a double-click (selects a word), not a repeat
+DOUBLE_CLICK_GAP = 0.5
+# The message input box a replayed message clicks; other Edits (the chat search box) are not it
+INPUT_BOX = {'name': "Type a message", 'automation_id': "InputBox"}
+
+
+def click_target(action):
+    """(name, control_type) of a click on a resolved element, else None."""
+    info = action.get('element_info')
+    if not info or not info.get('name'):
+        return None
+    return info['name'], info['control_type']
+
+
+def is_input_click(action, input_box=INPUT_BOX):
+    """action clicks the message input box, recognized by its name or automation id."""
+    info = action.get('element_info')
+    if action['type'] != 'click' or not info or info.get('control_type') != 'Edit':
+        return False
+    return any(info.get(key) and info.get(key) == value for key, value in input_box.items())
+
+
+def is_repeat_click(previous, action):
+    """action clicks the same list item or input box as previous, slowly enough not to be a double-click."""
+    target = click_target(action)
+    if target is None or target != click_target(previous) or target[1] not in IDEMPOTENT_CLICK_TYPES:
+        return False
+    try:
+        return recorded_gap(previous, action) >= DOUBLE_CLICK_GAP
+    except (KeyError, ValueError):
+        return False
+
+
+def can_merge_scrolls(previous, action):
+    """Same place and same direction: scrolling down then up is not a no-op at the end of the list."""
+    return (previous['type'] == 'scroll' and previous['position'] == action['position'] and
+            (previous['notches'] > 0) == (action['notches'] > 0) and 'monotonic' in previous and
+            'monotonic' in action)
+
+
+def merge_scrolls(first, second):
+    """One scroll action with the notches of both; the pause between them becomes a step delay."""
+    gap_ms = max(round((second['monotonic'] - first['monotonic']) * 1000) - first['duration_ms'], 0)
+    steps = [list(run) for run in first['steps']]
+    (dt, *step, repeat), *rest = second['steps']
+    append_run(steps, gap_ms, *step)
+    if repeat > 1:
+        append_run(steps, dt, *step)
+        steps[-1][-1] += repeat - 2
+    for run in rest:
+        append_run(steps, *run[:-1])
+        steps[-1][-1] += run[-1] - 1
+    return {**first,
+            'notches': wheel_delta(first['notches'] + second['notches']),
+            'duration_ms': first['duration_ms'] + gap_ms + second['duration_ms'],
+            'steps': steps}
+
+
+def optimize_actions(actions, hotkeys=RECORDER_HOTKEYS, input_box=INPUT_BOX):
+    """Return (optimized actions, {rule: actions removed}); the input list is not changed.
+
+    Rules, each applied against the action kept just before:
+      - the recorder's own hotkeys and lone modifier presses are dropped
+      - a key press right after its inverse cancels both ('left', 'right')
+      - a click on the list item or input box just clicked is dropped,
+        unless the two make a double-click
+      - a click on the input box right before a typed message is dropped;
+        replaying a message clicks the input box itself. Only an Edit
+        with the input box's name or automation id counts, so a click on
+        the search box before typing is kept
+      - a scroll right after a scroll at the same place and in the same
+        direction is merged into it, keeping its timing
+    Typed and selected messages are never removed.
+    """
+    removed = Counter()
+    kept = []
+    for action in actions:
+        kind = action['type']
+        previous = kept[-1] if kept else None
+        if kind == 'keypress':
+            key = action['key']
+            if key in hotkeys:
+                removed['recorder hotkey'] += 1
+                continue
+            if MODIFIER_KEYS.get(key, 'windows') != 'windows':
+                removed['lone modifier'] += 1
+                continue
+            if previous and previous['type'] == 'keypress' and INVERSE_KEYS.get(key) == previous['key']:
+                kept.pop()
+                removed['keys that cancel out'] += 2
+                continue
+        elif kind == 'click':
+            if previous and previous['type'] == 'click' and is_repeat_click(previous, action):
+                removed['repeated click'] += 1
+                continue
+        elif kind == 'message':
+            if previous and is_input_click(previous, input_box):
+                kept.pop()
+                removed['input box click before typing'] += 1
+        elif kind == 'scroll':
+            if previous and can_merge_scrolls(previous, action):
+                kept[-1] = merge_scrolls(previous, action)
+                removed['merged scroll'] += 1
+                continue
+        kept.append(action)
+    return kept, dict(removed)
+
+
+def print_report(before, removed, indent=""):
+    """Print how many actions each rule removed."""
+    total = sum(removed.values())
+    if not total:
+        print(f"{indent}🧹 Optimizer: nothing to remove from {before} actions")
+        return
+    print(f"{indent}🧹 Optimizer removed {total} of {before} actions ({total / before:.0%}):")
+    for rule, count in sorted(removed.items(), key=lambda item: -item[1]):
+        print(f"{indent}   {count:5d}  {rule}")
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Remove redundant actions from a recorded_actions file")
+    parser.add_argument('actions_file', help="recorded_actions_*.json or *.wrec")
+    parser.add_argument('-o', '--output', help="write the optimized actions here (same format as the input)")
+    args = parser.parse_args()
+
+    actions = load_actions(args.actions_file)
+    optimized, removed = optimize_actions(actions)
+    print_report(len(actions), removed)
+    if args.output:
+        if is_compact(args.actions_file):
+            write_compact(args.output, optimized)
+        else:
+            write_json(args.output, optimized)
+        print(f"💾 {len(optimized)} actions saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Automation Backends
+The desktop operations the WhatsApp tools rely on, behind one interface
+"""
+
+
+class AutomationBackend:
+    """UIA access, global input hooks and the clipboard.
+
+    The real implementation wraps pywinauto and the keyboard/mouse hook
+    modules; simulated_whatsapp.SimulatedWhatsApp implements the same
+    interface in memory so the tools can run and be benchmarked headlessly.
+    """
+
+    name = 'base'
+    clipboard = None        # a clipboard_capture.ClipboardBackend
+
+    # --- UI Automation -------------------------------------------------
+
+    def connect(self, **criteria):
+        """Connect to a running application; returns an object whose .WhatsApp is the main window."""
+        raise NotImplementedError
+
+    def start(self, path):
+        """Launch an application."""
+        raise NotImplementedError
+
+    def window(self, **criteria):
+        """Return a top-level window specification from the desktop."""
+        raise NotImplementedError
+
+    def from_point(self, x, y):
+        """Return the element at screen position (x, y)."""
+        raise NotImplementedError
+
+    def window_rect(self, app):
+        """Return a cheap callable giving the main window's (left, top, right, bottom), or None."""
+        return None
+
+    # --- Input hooks ---------------------------------------------------
+
+    def add_hotkey(self, hotkey, callback):
+        raise NotImplementedError
+
+    def hook_keyboard(self, callback):
+        """Call callback(event) for every key event."""
+        raise NotImplementedError
+
+    def on_click(self, callback):
+        """Call callback() after every left click."""
+        raise NotImplementedError
+
+    def hook_mouse(self, callback):
+        """Call callback(event) for every raw mouse event (button, move, wheel)."""
+        raise NotImplementedError
+
+    def unhook_all(self):
+        """Remove every keyboard and mouse hook."""
+        raise NotImplementedError
+
+    def mouse_position(self):
+        raise NotImplementedError
+
+    # --- Synthetic mouse input (scroll and drag replay) ----------------
+
+    def mouse_wheel(self, x, y, delta):
+        """Turn the wheel by delta notches with the pointer at (x, y); positive scrolls up."""
+        raise NotImplementedError
+
+    def mouse_press(self, x, y, button='left'):
+        raise NotImplementedError
+
+    def mouse_move(self, x, y):
+        raise NotImplementedError
+
+    def mouse_release(self, x, y, button='left'):
+        raise NotImplementedError
+
+
+class PywinautoBackend(AutomationBackend):
+    """The live Windows desktop through pywinauto (UIA) and the keyboard/mouse modules.
+
+    Modules are imported on first use, so tools that only read files can
+    create a recorder on machines without them.
+    """
+
+    name = 'pywinauto'
+
+    def __init__(self):
+        self._clipboard = None
+
+    @property
+    def clipboard(self):
+        if self._clipboard is None:
+            from clipboard_capture import default_backend
+            self._clipboard = default_backend()
+        return self._clipboard
+
+    def connect(self, **criteria):
+        from pywinauto.application import Application
+        return Application(backend="uia").connect(**criteria)
+
+    def start(self, path):
+        from pywinauto.application import Application
+        return Application(backend="uia").start(path)
+
+    def window(self, **criteria):
+        from pywinauto import Desktop
+        return Desktop(backend="uia").window(**criteria)
+
+    def from_point(self, x, y):
+        from pywinauto import Desktop
+        return Desktop(backend="uia").from_point(x, y)
+
+    def window_rect(self, app):
+        from element_resolver import window_rect
+        try:
+            handle = app.WhatsApp.wrapper_object().handle
+        except Exception:
+            return None
+        return lambda: window_rect(handle)
+
+    def add_hotkey(self, hotkey, callback):
+        import keyboard
+        keyboard.add_hotkey(hotkey, callback)
+
+    def hook_keyboard(self, callback):
+        import keyboard
+        keyboard.hook(callback)
+
+    def on_click(self, callback):
+        import mouse
+        mouse.on_click(callback)
+
+    def hook_mouse(self, callback):
+        import mouse
+        mouse.hook(callback)
+
+    def unhook_all(self):
+        import keyboard
+        import mouse
+        mouse.unhook_all()
+        keyboard.unhook_all()
+
+    def mouse_position(self):
+        import mouse
+        return mouse.get_position()
+
+    def mouse_wheel(self, x, y, delta):
+        from pywinauto import mouse
+        mouse.scroll(coords=(x, y), wheel_dist=int(round(delta)))   # whole notches only
+
+    def mouse_press(self, x, y, button='left'):
+        from pywinauto import mouse
+        mouse.press(button=button, coords=(x, y))
+
+    def mouse_move(self, x, y):
+        from pywinauto import mouse
+        mouse.move(coords=(x, y))
+
+    def mouse_release(self, x, y, button='left'):
+        from pywinauto import mouse
+        mouse.release(button=button, coords=(x, y))
+
+
+def default_backend():
+    """Return the backend for the live desktop."""
+    return PywinautoBackend()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Batch Capture Ingest
+Parses whole archives of scan, export and capture files on a process pool into one ordered, deduplicated corpus
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from capture_formats import parse_capture_file
+from message_store import DEFAULT_STORE_FILE, MessageStore
+from scan_dedup import content_hash, normalize_text
+
+FILE_PATTERNS = (
+    "whatsapp_scan_*.txt",
+    "whatsapp_export_*.txt",
+    "captured_messages_*.txt",
+    "selected_messages_*.txt",
+    "extracted_whatsapp_messages_*.txt",
+)
+SHARD_SIZE = 8
+PROGRESS_INTERVAL = 0.25
+DEFAULT_CORPUS_FILE = "message_corpus.jsonl"
+
+
+def find_files(paths):
+    """Expand directories (searched recursively), glob patterns and plain files."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in FILE_PATTERNS:
+                found.extend(glob.glob(os.path.join(path, "**", pattern), recursive=True))
+        elif glob.has_magic(path):
+            found.extend(glob.glob(path, recursive=True))
+        else:
+            found.append(path)
+    return sorted(set(found))
+
+
+def ingest_shard(paths):
+    """Worker: parse a few files; returns (records, errors)."""
+    records = []
+    errors = []
+    for path in paths:
+        try:
+            records.extend(parse_capture_file(path))
+        except Exception as e:
+            errors.append(f"{path}: {e}")
+    return records, errors
+
+
+def text_key(record):
+    """The normalized text, or time + media for messages without text."""
+    text = normalize_text(record['text'] or "")
+    if not text:
+        text = "\x1f".join((record.get('time') or "", record.get('media') or ""))
+    return content_hash(text)
+
+
+def message_key(record):
+    """Dedup key: sender, time and text when the sender is known, else the text alone (clipboard captures)."""
+    if record.get('sender'):
+        return scan_message_key(record)
+    return text_key(record)
+
+
+def merge_corpus(records):
+    """Order records by time, file and position and keep the first copy of each message.
+
+    Equal texts from different senders or times stay separate messages. A
+    copy without a sender (a clipboard capture) counts as the first message
+    with its text; a later copy that knows the sender (a scan or export row)
+    fills in the sender details of such a capture instead of being added.
+    """
+    records.sort(key=lambda item: (item['timestamp'] or "", item['file'], item['position']))
+    corpus = []
+    by_key = {}
+    by_text = {}    # text key -> kept messages with that text, oldest first
+    for item in records:
+        key = message_key(item)
+        text = text_key(item)
+        kept = by_key.get(key)
+        if kept is None and text in by_text:
+            if not item['sender']:
+                kept = by_text[text][0]
+            else:
+                kept = next((other for other in by_text[text] if not other['sender']), None)
+                if kept is not None:
+                    for field in ('sender', 'phone', 'time', 'reply_to', 'quoted'):
+                        if item.get(field) is not None:
+                            kept[field] = item[field]
+                    by_key[key] = kept
+        if kept is None:
+            item['occurrences'] = 1
+            by_key[key] = item
+            by_text.setdefault(text, []).append(item)
+            corpus.append(item)
+            continue
+        kept['occurrences'] += 1
+    return corpus
+
+
+def scan_message_key(record):
+    """Identity of a scan/export message across overlapping files: sender, time, media and body."""
+    return content_hash("\x1f".join((record['sender'] or "", record['time'] or "", record.get('media') or "",
+                                     normalize_text(record['text'] or ""))))
+
+
+def ingest(files, workers=None, shard_size=SHARD_SIZE):
+    """Parse files on a process pool (inline with workers=1); returns (records, errors, seconds)."""
+    shards = [files[i:i + shard_size] for i in range(0, len(files), shard_size)]
+    records = []
+    errors = []
+    done = 0
+    start = time.perf_counter()
+    shown = 0.0
+
+    def progress():
+        nonlocal shown
+        elapsed = time.perf_counter() - start
+        if elapsed - shown < PROGRESS_INTERVAL and done < len(files):
+            return
+        shown = elapsed
+        rate = done / elapsed if elapsed else 0.0
+        print(f"\r⏳ {done}/{len(files)} files ({rate:.0f} files/s)", end="", file=sys.stderr, flush=True)
+
+    if workers == 1:
+        for shard in shards:
+            shard_records, shard_errors = ingest_shard(shard)
+            records.extend(shard_records)
+            errors.extend(shard_errors)
+            done += len(shard)
+            progress()
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(ingest_shard, shard): len(shard) for shard in shards}
+            for future in as_completed(futures):
+                shard_records, shard_errors = future.result()
+                records.extend(shard_records)
+                errors.extend(shard_errors)
+                done += futures[future]
+                progress()
+    print(file=sys.stderr)
+    return records, errors, time.perf_counter() - start
+
+
+def load_scan_messages(paths, workers=None):
+    """Parse the scan dumps and chat exports below paths; returns (records, errors), oldest first, each message once.
+
+    Only messages with a known sender are kept, as the per-sender tools need.
+    """
+    records, errors, _ = ingest(find_files(paths), workers)
+    records = [item for item in records if item['source'] == 'scan' and item['sender']]
+    records.sort(key=lambda item: (item['timestamp'] or "", item['file'], item['position']))
+    seen = set()
+    unique = []
+    for item in records:
+        key = scan_message_key(item)
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique, errors
+
+
+def write_corpus(path, corpus):
+    """Write the corpus as JSON lines."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in corpus:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+def store_corpus(store, corpus):
+    """Add the corpus to the message database as one 'ingest' session; returns the session id."""
+    now = datetime.now().isoformat()
+    session_id = store.start_session('ingest', now)
+    store.add_messages(session_id, 'ingested', [
+        {'text': item['text'] or "", 'sender': item['sender'], 'timestamp': item['timestamp'], 'method': item['source']}
+        for item in corpus])
+    store.end_session(session_id, now)
+    return session_id
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Build one message corpus from many capture and export files")
+    parser.add_argument('paths', nargs='*', default=["."],
+                        help="files, glob patterns or directories (default: current directory)")
+    parser.add_argument('--output', default=DEFAULT_CORPUS_FILE)
+    parser.add_argument('--workers', type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help="files handed to a worker at a time")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_FILE, metavar='DB',
+                        help=f"also add the corpus to the message database (default {DEFAULT_STORE_FILE})")
+    args = parser.parse_args()
+
+    files = find_files(args.paths)
+    if not files:
+        print("📭 No capture or export files found")
+        return
+
+    records, errors, elapsed = ingest(files, args.workers, args.shard_size)
+    corpus = merge_corpus(records)
+    write_corpus(args.output, corpus)
+    if args.store:
+        store_corpus(MessageStore(args.store), corpus)
+
+    by_source = {}
+    for item in corpus:
+        by_source[item['source']] = by_source.get(item['source'], 0) + 1
+    print(f"✓ {len(files)} files in {elapsed:.2f}s ({len(files) / elapsed:.0f} files/s)")
+    print(f"   Records: {len(records)} -> {len(corpus)} unique messages "
+          f"({len(records) - len(corpus)} duplicates) -> {args.output}")
+    print("   First seen in: " + ", ".join(f"{source} {count}" for source, count in sorted(by_source.items())))
+    if args.store:
+        print(f"   Stored in: {args.store}")
+    if errors:
+        print(f"⚠️  {len(errors)} files could not be parsed:")
+        for error in errors[:10]:
+            print(f"   {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Capture File Readers
+Parses every text file the tools write (scan dumps, chat exports, captured, selected and extracted messages) into plain records
+"""
+
+import argparse
+import json
+import re
+from datetime import datetime
+
+from scan_dedup import collapse_fragments
+from scan_parser import DUMP_TITLE, iter_scan_messages
+
+CAPTURED_TITLE = "WhatsApp Captured Messages"
+SELECTED_TITLE = "WhatsApp Selected Messages"
+EXTRACTED_TITLE = "WhatsApp Extracted Messages"
+
+CAPTURED_ENTRY_RE = re.compile(r"^\s*(\d+)\. (.*)$")
+SELECTED_ENTRY_RE = re.compile(r"^\s*(\d+)\. \[(.*?)\] \[(.*?)\]$")
+EXTRACTED_ENTRY_RE = re.compile(r"^Message\s+(\d+) \| (.*?) \| (\d+) chars$")
+EXTRACTED_RULE = "-" * 80
+EXTRACTED_END = "=" * 80
+SELECTED_INDENT = " " * 5
+
+
+def iso_time(text):
+    """Normalize '2025-11-06 23:41:55' and ISO timestamps to one sortable form."""
+    try:
+        return datetime.fromisoformat(text.strip()).isoformat()
+    except (AttributeError, ValueError):
+        return text
+
+
+def read_header(f):
+    """Consume a title/banner/"Key: value"/banner header; returns the values by key."""
+    header = {}
+    banners = 0
+    for line in f:
+        line = line.rstrip("\n")
+        if line and set(line) == {"="}:
+            banners += 1
+            if banners == 2:
+                break
+        elif ": " in line:
+            key, value = line.split(": ", 1)
+            header[key] = value.strip()
+    return header
+
+
+def record(source, path, position, text, timestamp=None, **fields):
+    """Build a corpus record; fields the format does not know stay None."""
+    data = {
+        'source': source,
+        'file': path,
+        'position': position,
+        'timestamp': timestamp,
+        'sender': None,
+        'time': None,
+        'text': text,
+    }
+    data.update(fields)
+    return data
+
+
+def parse_captured(f, path):
+    """captured_messages_*.txt, written by WhatsAppRecorder.save_captured_text."""
+    header = read_header(f)
+    recorded_on = iso_time(header.get('Recorded on'))
+    records = []
+    for line in f:
+        line = line.rstrip("\n")
+        match = CAPTURED_ENTRY_RE.match(line)
+        if match:
+            records.append(record('captured', path, int(match.group(1)), match.group(2), recorded_on))
+        elif records and line:
+            records[-1]['text'] += "\n" + line
+    return records
+
+
+def parse_selected(f, path):
+    """selected_messages_*.txt, written by WhatsAppRecorder.save_selected_messages."""
+    read_header(f)
+    records = []
+    lines = []
+
+    def finish():
+        if records:
+            text = "\n".join(lines).rstrip("\n")
+            records[-1]['text'] = text[len(SELECTED_INDENT):] if text.startswith(SELECTED_INDENT) else text
+
+    for line in f:
+        line = line.rstrip("\n")
+        match = SELECTED_ENTRY_RE.match(line)
+        if match:
+            finish()
+            lines = []
+            records.append(record('selected', path, int(match.group(1)), "", iso_time(match.group(2)),
+                                  method=match.group(3)))
+        elif records:
+            lines.append(line)
+    finish()
+    return records
+
+
+def parse_extracted(f, path):
+    """extracted_whatsapp_messages_*.txt, written by MessageExtractor.save_messages.
+
+    Every entry states its length, so a message that itself contains the
+    closing rule is still read correctly.
+    """
+    read_header(f)
+    records = []
+    current = None
+    for line in f:
+        line = line.rstrip("\n")
+        if current is None:
+            match = EXTRACTED_ENTRY_RE.match(line)
+            if match:
+                current = {'position': int(match.group(1)), 'timestamp': iso_time(match.group(2)),
+                           'length': int(match.group(3)), 'lines': None}
+            continue
+        if current['lines'] is None:
+            current['lines'] = []       # the dashed rule under the entry line
+            continue
+        if line == EXTRACTED_END:
+            text = "\n".join(current['lines'])
+            if text.endswith("\n"):
+                text = text[:-1]        # blank line written before the closing rule
+            if len(text) >= current['length']:
+                records.append(record('extracted', path, current['position'], text, current['timestamp']))
+                current = None
+                continue
+        current['lines'].append(line)
+    return records
+
+
+def parse_scan(f, path):
+    """whatsapp_scan_*.txt and whatsapp_export_*.txt: canonical messages after collapsing fragments."""
+    messages, stats = collapse_fragments(iter_scan_messages(f))
+    records = []
+    for position, message in enumerate(messages, 1):
+        records.append(record(
+            'scan', path, position, message.text, iso_time(message.scanned_on),
+            sender=message.sender, phone=message.phone, time=message.time,
+            reply_to=message.reply_to, quoted=message.quoted, media=message.media,
+            reactions=list(message.reactions), reaction_count=message.reaction_count,
+        ))
+    return records
+
+
+PARSERS = {
+    DUMP_TITLE: parse_scan,
+    CAPTURED_TITLE: parse_captured,
+    SELECTED_TITLE: parse_selected,
+    EXTRACTED_TITLE: parse_extracted,
+}
+
+
+def parse_capture_file(path):
+    """Parse any capture or export file, recognized by its title line."""
+    with open(path, 'r', encoding='utf-8') as f:
+        title = f.readline().strip()
+        parser = PARSERS.get(title)
+        if parser is None:
+            raise ValueError(f"{path}: unknown file format (title {title[:40]!r})")
+        f.seek(0)
+        return parser(f, path)
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Print the messages of capture and export files as JSON lines")
+    parser.add_argument('files', nargs='+')
+    args = parser.parse_args()
+
+    for path in args.files:
+        for item in parse_capture_file(path):
+            print(json.dumps(item, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
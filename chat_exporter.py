@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+WhatsApp Chat Exporter
+Reads whole chats straight from the message list in the UIA tree, page by page, into scan dump files
+"""
+
+import argparse
+import os
+import re
+import time
+from datetime import datetime
+
+from export_checkpoints import (DEFAULT_CHECKPOINT_FILE, RECENT_KEYS, STAGING_SUFFIX, BatchStager,
+                                CheckpointStore, read_staged)
+from message_store import DEFAULT_STORE_FILE, MessageStore
+from replay_engine import connect_to_whatsapp
+from scan_dedup import content_hash, normalize_text
+from scan_parser import iter_raw_blocks, parse_body, write_scan_block, write_scan_header
+
+MAX_PAGES = 1000
+# Pages in a row without a new row before the top of the chat is assumed
+STALL_PAGES = 3
+# Checkpoint name used when no --chat is given
+OPEN_CHAT = "(open chat)"
+# Rows that must match the previous export, in order, before a scroll-back stops at it
+KNOWN_CONTEXT = 3
+# Automation id of the text above the message list that shows the open chat's name
+CHAT_HEADER_ID = "ConversationHeader"
+
+
+def message_key(record, label):
+    """Identity of a message row: sender + time + hash of the body."""
+    body = normalize_text(record.text or label)
+    return f"{record.sender or ''}|{record.time or ''}|{content_hash(body).hex()}"
+
+
+def page_overlap(keys, newer_keys):
+    """Number of rows at the bottom of a page that are the top rows of the newer page read before it."""
+    for size in range(min(len(keys), len(newer_keys)), 0, -1):
+        if keys[-size:] == newer_keys[:size]:
+            return size
+    return 0
+
+
+def find_exported(keys, recent_keys, context=KNOWN_CONTEXT):
+    """Index of the lowest row on a page that was exported before, or None.
+
+    Keys carry no date, so a row only counts when the rows above it match
+    the keys exported before it, in order, for context rows (or back to
+    the oldest recent key). An older message with the same sender, time
+    and text does not end the scroll-back.
+    """
+    positions = {}
+    for j, key in enumerate(recent_keys):
+        positions.setdefault(key, []).append(j)
+    for i in range(len(keys) - 1, -1, -1):
+        for j in positions.get(keys[i], ()):
+            need = min(j + 1, context)
+            if i + 1 >= need and keys[i + 1 - need:i + 1] == list(recent_keys[j + 1 - need:j + 1]):
+                return i
+    return None
+
+
+def open_chat_name(main_win):
+    """Name of the open chat from the conversation header, or None; one lookup, no waiting."""
+    try:
+        return main_win.child_window(auto_id=CHAT_HEADER_ID).wait('exists', timeout=0).window_text() or None
+    except Exception:
+        return None
+
+
+def store_rows(store, chat, rows, when):
+    """Add exported rows to the message database as one 'export' session, with their chat and sender."""
+    session_id = store.start_session('export', when, chat=chat)
+    store.add_messages(session_id, 'exported', [
+        {'text': record.text or label, 'sender': record.sender, 'timestamp': when, 'method': 'export'}
+        for key, label, record in rows], chat=chat)
+    store.end_session(session_id, when)
+    return session_id
+
+
+def find_message_list(main_win):
+    """Return the List control whose items look most like message rows."""
+    best, best_score = None, 0
+    for candidate in main_win.descendants(control_type='List'):
+        score = sum(1 for item in candidate.children(control_type='ListItem')
+                    if parse_body(0, item.window_text()).kind == 'message')
+        if score > best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def export_filename(chat_name, when):
+    """Default output file for a chat export."""
+    slug = re.sub(r"[^\w-]+", "_", chat_name or "chat").strip("_") or "chat"
+    return f"whatsapp_export_{slug}_{when.strftime('%Y%m%d_%H%M%S')}.txt"
+
+
+def write_export(path, rows, scanned_on=None):
+    """Write exported (key, label, record) rows in the scan dump layout."""
+    with open(path, 'w', encoding='utf-8') as f:
+        write_scan_header(f, len(rows), scanned_on)
+        for number, (key, label, record) in enumerate(rows, 1):
+            write_scan_block(f, number, label)
+
+
+class ChatExporter:
+    """Walks the virtualized message list of the open chat from the newest row up.
+
+    Only the rows on screen exist in the tree and the same ListItem objects
+    are reused for other messages as the list scrolls, so each page is read
+    in one pass right after scrolling and rows are identified by their
+    content (message_key), never by the element they came from. The same
+    key can come back days later, so a page is only compared with the page
+    read just before it: the rows it shares with that page are dropped.
+    """
+
+    def __init__(self, main_win, max_pages=MAX_PAGES, stall_pages=STALL_PAGES, page_pause=0.0):
+        self.main_win = main_win
+        self.max_pages = max_pages
+        self.stall_pages = stall_pages
+        self.page_pause = page_pause
+        self.pages_read = 0
+        self.rows_read = 0
+        self.repeated = 0
+
+    def open_chat(self, name):
+        """Click a chat in the chat list."""
+        self.main_win.child_window(title=name, control_type='ListItem').click_input()
+
+    def read_page(self, message_list):
+        """Return (key, label, record) for every realized row, top to bottom."""
+        rows = []
+        for item in message_list.children(control_type='ListItem'):
+            label = item.window_text()
+            if not label:
+                continue
+            record = parse_body(0, label)
+            rows.append((message_key(record, label), label, record))
+        self.pages_read += 1
+        self.rows_read += len(rows)
+        return rows
+
+    def scroll_up(self, message_list, pages=1):
+        """Scroll towards older messages."""
+        try:
+            message_list.scroll('up', 'page', count=pages)
+        except Exception:
+            self.main_win.type_keys('{PGUP %d}' % pages)
+        if self.page_pause:
+            time.sleep(self.page_pause)
+
+    def export(self, known_keys=(), staged_pages=(), finished=False, on_page=None):
+        """Read the open chat back to its first message or to a message exported before.
+
+        known_keys are the newest keys of the previous export, oldest
+        first; scrolling stops at the first page showing the end of that
+        export (see find_exported) and only the rows below it are new. staged_pages (newest first) were read by an interrupted
+        run: the list is scrolled past them in one jump, or not at all if
+        that run had finished. on_page(rows, last) gets every page of new
+        rows. Returns the new rows oldest first.
+        """
+        pages = [[(key, label, parse_body(0, label)) for key, label in page] for page in staged_pages]
+        if finished:
+            return [row for page in reversed(pages) for row in page]
+
+        message_list = find_message_list(self.main_win)
+        if message_list is None:
+            raise LookupError("no message list found in the WhatsApp window")
+        if pages:
+            self.scroll_up(message_list, len(pages))
+
+        newer = [row[0] for row in pages[-1]] if pages else []
+        previous = None
+        stalled = 0
+        for _ in range(self.max_pages):
+            rows = self.read_page(message_list)
+            keys = [row[0] for row in rows]
+            if keys == previous:
+                stalled += 1            # the list did not move: top of the chat, or still loading
+                if stalled >= self.stall_pages:
+                    if on_page:
+                        on_page([], True)
+                    break
+                self.scroll_up(message_list)
+                continue
+            previous = keys
+            stalled = 0
+
+            repeated = page_overlap(keys, newer)
+            newer = keys
+            last_known = find_exported(keys, known_keys) if known_keys else None
+            start = 0 if last_known is None else last_known + 1
+            fresh = rows[start:len(rows) - repeated]
+            self.repeated += min(repeated, len(rows) - start)     # overlap with the previous page
+            if fresh:
+                pages.append(fresh)
+            if on_page and (fresh or last_known is not None):
+                on_page(fresh, last_known is not None)
+            if last_known is not None:
+                break
+            self.scroll_up(message_list)
+        return [row for page in reversed(pages) for row in page]
+
+
+def count_blocks(path):
+    """Number of message blocks in an existing export file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return sum(1 for _ in iter_raw_blocks(f))
+
+
+def export_chat(exporter, chat, checkpoints, output=None):
+    """Export what is new in the open chat since its checkpoint and commit it.
+
+    New rows are staged page by page while scrolling, then appended to the
+    chat's export file as one more scan section; the checkpoint is saved
+    last and the staging file removed. Returns (new rows, export file).
+    """
+    name = chat or OPEN_CHAT
+    state = checkpoints.get(name)
+    if state is None or not os.path.exists(state['export_file']):
+        path = output or export_filename(chat, datetime.now())
+        exists = os.path.exists(path)
+        state = {
+            'export_file': path,
+            'blocks': count_blocks(path) if exists else 0,
+            'size': os.path.getsize(path) if exists else 0,
+            'recent_keys': [],
+        }
+    path = state['export_file']
+
+    # A run that stopped between the append and the checkpoint left a partial section
+    if os.path.exists(path) and os.path.getsize(path) > state['size']:
+        with open(path, 'r+b') as f:
+            f.truncate(state['size'])
+
+    staging = path + STAGING_SUFFIX
+    staged, finished = read_staged(staging)
+    if staged:
+        print(f"↩️  Resuming {name} after {sum(len(page) for page in staged)} staged messages")
+    stager = BatchStager(staging)
+    try:
+        rows = exporter.export(state['recent_keys'], staged, finished, stager.write)
+    finally:
+        stager.close(remove=os.path.getsize(staging) == 0)
+
+    if rows:
+        with open(path, 'a', encoding='utf-8') as f:
+            write_scan_header(f, len(rows), datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            for number, (key, label, record) in enumerate(rows, state['blocks'] + 1):
+                write_scan_block(f, number, label)
+            f.flush()
+            os.fsync(f.fileno())
+
+    checkpoints.set(name, {
+        'export_file': path,
+        'blocks': state['blocks'] + len(rows),
+        'size': os.path.getsize(path) if os.path.exists(path) else 0,
+        'recent_keys': (state['recent_keys'] + [row[0] for row in rows])[-RECENT_KEYS:],
+        'updated': datetime.now().isoformat(),
+    })
+    if os.path.exists(staging):
+        os.remove(staging)
+    return rows, path
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Export WhatsApp chats by reading the message list")
+    parser.add_argument('--chat', action='append', default=[],
+                        help="chat to open and export (repeatable); default is the open chat")
+    parser.add_argument('--output', help="output file for a first export (single chat only)")
+    parser.add_argument('--full', action='store_true',
+                        help="ignore checkpoints and write a complete export to a new file")
+    parser.add_argument('--checkpoints', default=DEFAULT_CHECKPOINT_FILE, help="per-chat checkpoint file")
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES)
+    parser.add_argument('--pause-ms', type=float, default=0.0,
+                        help="wait after each scroll for WhatsApp to load older messages")
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_FILE, metavar='DB',
+                        help=f"also add the new messages to the message database (default {DEFAULT_STORE_FILE})")
+    parser.add_argument('--simulate', action='store_true', help="export from the simulated WhatsApp window")
+    parser.add_argument('--latency-ms', type=float, default=2.0, help="UIA call cost with --simulate")
+    args = parser.parse_args()
+
+    backend = None
+    if args.simulate:
+        from simulated_whatsapp import SimulatedWhatsApp
+        backend = SimulatedWhatsApp(uia_latency=args.latency_ms / 1000)
+    main_win, backend = connect_to_whatsapp(backend)
+    if main_win is None:
+        return
+
+    exporter = ChatExporter(main_win, max_pages=args.max_pages, page_pause=args.pause_ms / 1000)
+    checkpoints = CheckpointStore(args.checkpoints)
+    store = MessageStore(args.store) if args.store else None
+    for chat in args.chat or [None]:
+        if chat:
+            try:
+                exporter.open_chat(chat)
+            except Exception as e:
+                print(f"❌ Could not open chat '{chat}': {e}")
+                continue
+        start = time.perf_counter()
+        pages_before = exporter.pages_read
+        output = args.output if len(args.chat) <= 1 else None
+        try:
+            if args.full:
+                rows = exporter.export()
+                path = output or export_filename(chat, datetime.now())
+                write_export(path, rows, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            else:
+                rows, path = export_chat(exporter, chat, checkpoints, output)
+        except LookupError as e:
+            print(f"❌ {e}")
+            continue
+        except KeyboardInterrupt:
+            print(f"\n🟡 Export of {chat or OPEN_CHAT} interrupted - run again to resume")
+            return
+        elapsed = time.perf_counter() - start
+
+        rate = len(rows) / elapsed * 60 if elapsed else 0.0
+        print(f"✓ {chat or OPEN_CHAT}: {len(rows)} new messages from {exporter.pages_read - pages_before} pages "
+              f"in {elapsed:.1f}s ({rate:,.0f} messages/min) -> {path}")
+        if store is not None and rows:
+            store_rows(store, chat or open_chat_name(main_win), rows, datetime.now().isoformat())
+            print(f"   Stored in: {store.path}")
+
+if __name__ == "__main__":
+    main()
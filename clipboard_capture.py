@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Event-Driven Clipboard Capture
+Waits for the clipboard to actually change after Ctrl+C instead of sleeping a fixed time
+"""
+
+import argparse
+import threading
+import time
+
+from hook_metrics import LatencyHistogram
+
+try:
+    import ctypes
+    _user32 = ctypes.windll.user32
+except (ImportError, AttributeError):
+    _user32 = None
+
+DEFAULT_TIMEOUT = 1.0
+INITIAL_POLL = 0.002
+MAX_POLL = 0.01
+
+
+class ClipboardBackend:
+    """Interface to a clipboard that can report when it has been written."""
+
+    def get_text(self):
+        """Return the current clipboard text."""
+        raise NotImplementedError
+
+    def set_text(self, text):
+        """Replace the clipboard text."""
+        raise NotImplementedError
+
+    def change_token(self):
+        """Return a value that changes whenever the clipboard is written."""
+        raise NotImplementedError
+
+    def prepare(self):
+        """Called right before a copy is triggered."""
+
+
+class WindowsClipboard(ClipboardBackend):
+    """Windows clipboard; changes are detected with GetClipboardSequenceNumber."""
+
+    def __init__(self):
+        import pyperclip
+        self._pyperclip = pyperclip
+
+    def get_text(self):
+        return self._pyperclip.paste()
+
+    def set_text(self, text):
+        self._pyperclip.copy(text)
+
+    def change_token(self):
+        return _user32.GetClipboardSequenceNumber()
+
+
+class PyperclipClipboard(ClipboardBackend):
+    """Portable fallback: the clipboard is cleared first and its text is the token."""
+
+    def __init__(self):
+        import pyperclip
+        self._pyperclip = pyperclip
+
+    def get_text(self):
+        return self._pyperclip.paste()
+
+    def set_text(self, text):
+        self._pyperclip.copy(text)
+
+    def change_token(self):
+        return self._pyperclip.paste()
+
+    def prepare(self):
+        # Without a sequence number, copying the same text twice would look unchanged
+        self._pyperclip.copy("")
+
+
+class FakeClipboard(ClipboardBackend):
+    """In-memory clipboard with a change counter, for tests and benchmarks."""
+
+    def __init__(self, text=""):
+        self._text = text
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def get_text(self):
+        with self._lock:
+            return self._text
+
+    def set_text(self, text):
+        with self._lock:
+            self._text = text
+            self._sequence += 1
+
+    def change_token(self):
+        with self._lock:
+            return self._sequence
+
+    def copy_later(self, text, delay):
+        """Simulate an application writing the clipboard after delay seconds."""
+        if delay <= 0:
+            self.set_text(text)
+            return
+        timer = threading.Timer(delay, self.set_text, args=(text,))
+        timer.daemon = True
+        timer.start()
+
+
+def default_backend():
+    """Return the best clipboard backend for this platform."""
+    if _user32 is not None:
+        return WindowsClipboard()
+    return PyperclipClipboard()
+
+
+class ClipboardCapture:
+    """Triggers a copy and returns as soon as the new clipboard content arrives."""
+
+    def __init__(self, backend=None, timeout=DEFAULT_TIMEOUT, initial_poll=INITIAL_POLL, max_poll=MAX_POLL):
+        self.backend = backend or default_backend()
+        self.timeout = timeout
+        self.initial_poll = initial_poll
+        self.max_poll = max_poll
+        self.latencies = LatencyHistogram()     # fixed size however long the session runs
+        self.timeouts = 0
+
+    def capture(self, send_copy):
+        """Call send_copy() and wait for the clipboard to change.
+
+        Polls with a short, growing interval (2 ms up to 10 ms). Returns the
+        new clipboard text, or None if nothing arrived within the timeout.
+        """
+        self.backend.prepare()
+        before = self.backend.change_token()
+        start = time.perf_counter()
+        send_copy()
+
+        delay = self.initial_poll
+        while True:
+            if self.backend.change_token() != before:
+                self.latencies.record(time.perf_counter() - start)
+                return self.backend.get_text()
+            remaining = self.timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                self.timeouts += 1
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 1.5, self.max_poll)
+
+    def summary(self):
+        """Return capture latency statistics in milliseconds (percentiles to about 9%)."""
+        latencies = self.latencies
+        if not latencies.count:
+            return {'captures': 0, 'timeouts': self.timeouts}
+        return {
+            'captures': latencies.count,
+            'timeouts': self.timeouts,
+            'mean_ms': latencies.total / latencies.count * 1000,
+            'p50_ms': latencies.percentile(0.5) * 1000,
+            'p95_ms': latencies.percentile(0.95) * 1000,
+            'max_ms': latencies.max * 1000,
+        }
+
+
+def benchmark(captures=200, copy_delay=0.02):
+    """Compare adaptive capture with the old fixed 0.1 s + 0.3 s sleeps on a fake clipboard."""
+    clipboard = FakeClipboard()
+    capture = ClipboardCapture(clipboard)
+
+    start = time.perf_counter()
+    for i in range(captures):
+        text = capture.capture(lambda i=i: clipboard.copy_later(f"message {i}", copy_delay))
+        if text != f"message {i}":
+            print(f"❌ Capture {i} returned {text!r}")
+    elapsed = time.perf_counter() - start
+
+    stats = capture.summary()
+    fixed_rate = 1 / 0.4
+    print(f"📋 {captures} captures with {copy_delay * 1000:.0f} ms simulated copy delay")
+    print(f"   Adaptive: {captures / elapsed:.1f} captures/s "
+          f"(p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, max {stats['max_ms']:.1f} ms)")
+    print(f"   Fixed sleeps: {fixed_rate:.1f} captures/s")
+
+    # A copy that never lands must time out cleanly
+    timeout_capture = ClipboardCapture(FakeClipboard(), timeout=0.05)
+    result = timeout_capture.capture(lambda: None)
+    print(f"   Timeout check: {'ok' if result is None and timeout_capture.timeouts == 1 else 'FAILED'}")
+    return stats
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Benchmark clipboard capture latency")
+    parser.add_argument('--captures', type=int, default=200)
+    parser.add_argument('--delay-ms', type=float, default=20.0, help="simulated time for the copy to land")
+    args = parser.parse_args()
+    benchmark(args.captures, args.delay_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Compact Recording Format
+Binary recorded_actions files with interned strings and element descriptors, varint records and optional zlib compression
+"""
+
+import argparse
+import json
+import os
+import random
+import struct
+import time
+import zlib
+from datetime import datetime, timedelta
+
+COMPACT_SUFFIX = ".wrec"
+MAGIC = b"WREC"
+VERSION = 1
+FLAG_ZLIB = 0x01
+HEADER = struct.Struct("<4sBB")     # magic, version, flags
+CHUNK_SIZE = 64 * 1024
+
+# Record tags: every string, key layout (shape) and element descriptor is defined once,
+# before the first action using it
+TAG_STRING, TAG_ELEMENT, TAG_ACTION, TAG_SHAPE = 0, 1, 2, 3
+
+# Value types
+(T_NONE, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_LIST, T_DICT,
+ T_ELEMENT, T_TIMESTAMP, T_MONOTONIC) = range(11)
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+DOUBLE = struct.Struct("<d")
+
+
+class NeedMore(Exception):
+    """The buffer ends inside a record."""
+
+
+def write_varint(out, n):
+    while n > 0x7f:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def write_signed(out, n):
+    write_varint(out, n << 1 if n >= 0 else ((-n) << 1) - 1)     # zigzag
+
+
+def timestamp_micros(value):
+    """Microseconds since 1970 of an ISO timestamp written by datetime.isoformat(), else None."""
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None or moment.isoformat() != value:
+        return None
+    return (moment - EPOCH) // MICROSECOND
+
+
+def monotonic_micros(value):
+    """Whole microseconds of a monotonic reading when they give back exactly the same float, else None."""
+    micros = round(value * 1e6)
+    return micros if micros / 1e6 == value else None
+
+
+class CompactWriter:
+    """Writes actions one at a time to a binary recording.
+
+    Strings, the key lists of dicts (shapes) and element_info dicts are
+    interned: the first use writes a definition record and later uses are
+    a varint id, so a chat clicked a hundred times stores its name,
+    class_name and automation_id once, and a click is a shape id followed
+    by its values. 'timestamp' and 'monotonic' values are stored as
+    signed microsecond deltas from the previous action's. Anything that
+    does not fit those shapes is stored as a plain value, so every JSON
+    recording converts back unchanged.
+    """
+
+    def __init__(self, f, compress=False):
+        self.f = f
+        self.compressor = zlib.compressobj(6) if compress else None
+        self.strings = {}
+        self.shapes = {}
+        self.elements = {}
+        self.last_timestamp = 0
+        self.last_monotonic = 0
+        self.actions = 0
+        f.write(HEADER.pack(MAGIC, VERSION, FLAG_ZLIB if compress else 0))
+
+    def write(self, action):
+        defs = bytearray()
+        record = bytearray()
+        write_varint(record, TAG_ACTION)
+        self.encode_dict(action, record, defs)
+        self._emit(bytes(defs + record))
+        self.actions += 1
+
+    def close(self):
+        if self.compressor:
+            self.f.write(self.compressor.flush())
+
+    def _emit(self, data):
+        self.f.write(self.compressor.compress(data) if self.compressor else data)
+
+    def string_id(self, text, defs):
+        sid = self.strings.get(text)
+        if sid is None:
+            sid = self.strings[text] = len(self.strings)
+            data = text.encode('utf-8')
+            write_varint(defs, TAG_STRING)
+            write_varint(defs, len(data))
+            defs += data
+        return sid
+
+    def element_id(self, info, defs):
+        """Descriptor id of an element_info dict, or None when it cannot be interned."""
+        try:
+            key = tuple(info.items())
+            eid = self.elements.get(key)
+        except TypeError:       # unhashable values; stored inline instead
+            return None
+        if eid is None:
+            body = bytearray()
+            self.encode_dict(info, body, defs)
+            eid = self.elements[key] = len(self.elements)
+            write_varint(defs, TAG_ELEMENT)
+            defs += body
+        return eid
+
+    def shape_id(self, keys, defs):
+        shape = self.shapes.get(keys)
+        if shape is None:
+            sids = [self.string_id(key, defs) for key in keys]
+            shape = self.shapes[keys] = len(self.shapes)
+            write_varint(defs, TAG_SHAPE)
+            write_varint(defs, len(sids))
+            for sid in sids:
+                write_varint(defs, sid)
+        return shape
+
+    def encode_dict(self, value, out, defs):
+        write_varint(out, self.shape_id(tuple(value), defs))
+        for key, item in value.items():
+            self.encode(item, out, defs, key)
+
+    def encode(self, value, out, defs, key=None):
+        if value is None:
+            out.append(T_NONE)
+        elif value is True:
+            out.append(T_TRUE)
+        elif value is False:
+            out.append(T_FALSE)
+        elif isinstance(value, int):
+            out.append(T_INT)
+            write_signed(out, value)
+        elif isinstance(value, float):
+            micros = monotonic_micros(value) if key == 'monotonic' else None
+            if micros is not None:
+                out.append(T_MONOTONIC)
+                write_signed(out, micros - self.last_monotonic)
+                self.last_monotonic = micros
+            else:
+                out.append(T_FLOAT)
+                out += DOUBLE.pack(value)
+        elif isinstance(value, str):
+            micros = timestamp_micros(value) if key == 'timestamp' else None
+            if micros is not None:
+                out.append(T_TIMESTAMP)
+                write_signed(out, micros - self.last_timestamp)
+                self.last_timestamp = micros
+            else:
+                out.append(T_STR)
+                write_varint(out, self.string_id(value, defs))
+        elif isinstance(value, dict):
+            eid = self.element_id(value, defs) if key == 'element_info' else None
+            if eid is not None:
+                out.append(T_ELEMENT)
+                write_varint(out, eid)
+            else:
+                out.append(T_DICT)
+                self.encode_dict(value, out, defs)
+        elif isinstance(value, (list, tuple)):
+            out.append(T_LIST)
+            write_varint(out, len(value))
+            for item in value:
+                self.encode(item, out, defs)
+        else:
+            raise TypeError(f"cannot store {type(value).__name__} in a recording")
+
+
+class CompactReader:
+    """Iterates over the actions of a binary recording, reading it in chunks.
+
+    Only the string and element tables and the current chunk are held in
+    memory. A record cut by the end of a chunk is parsed again once the
+    next chunk is in.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        magic, version, flags = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("not a compact recording")
+        if version != VERSION:
+            raise ValueError(f"unsupported compact recording version {version}")
+        self.decompressor = zlib.decompressobj() if flags & FLAG_ZLIB else None
+        self.strings = []
+        self.shapes = []
+        self.elements = []
+        self.last_timestamp = 0
+        self.last_monotonic = 0
+
+    def chunks(self):
+        while True:
+            data = self.f.read(self.chunk_size)
+            if not data:
+                if self.decompressor:
+                    yield self.decompressor.flush()
+                    if not self.decompressor.eof:
+                        raise ValueError("compressed recording is truncated")
+                return
+            yield self.decompressor.decompress(data) if self.decompressor else data
+
+    def __iter__(self):
+        data, pos = b"", 0
+        for chunk in self.chunks():
+            data = data[pos:] + chunk
+            pos = 0
+            while pos < len(data):
+                start, saved = pos, (self.last_timestamp, self.last_monotonic)
+                try:
+                    action, pos = self.record(data, pos)
+                except (NeedMore, IndexError, struct.error):
+                    pos = start
+                    self.last_timestamp, self.last_monotonic = saved
+                    break
+                if action is not None:
+                    yield action
+        if pos < len(data):
+            raise ValueError("recording ends in the middle of a record")
+
+    def record(self, data, pos):
+        """Parse one record at pos; returns (action or None, next pos)."""
+        tag, pos = read_varint(data, pos)
+        if tag == TAG_ACTION:
+            return self.decode_dict(data, pos)
+        if tag == TAG_STRING:
+            length, pos = read_varint(data, pos)
+            end = pos + length
+            if end > len(data):
+                raise NeedMore()
+            self.strings.append(data[pos:end].decode('utf-8'))
+            return None, end
+        if tag == TAG_SHAPE:
+            count, pos = read_varint(data, pos)
+            sids = []
+            for _ in range(count):
+                sid, pos = read_varint(data, pos)
+                sids.append(sid)
+            self.shapes.append(tuple(self.strings[sid] for sid in sids))
+            return None, pos
+        if tag == TAG_ELEMENT:
+            info, pos = self.decode_dict(data, pos)
+            self.elements.append(info)
+            return None, pos
+        raise ValueError(f"unknown record tag {tag}")
+
+    def decode_dict(self, data, pos):
+        shape, pos = read_varint(data, pos)
+        strings = self.strings
+        value = {}
+        for key in self.shapes[shape]:
+            # The common one-byte cases inline; everything else through decode()
+            kind = data[pos]
+            if (kind == T_STR or kind == T_INT or kind == T_ELEMENT) and data[pos + 1] < 0x80:
+                small = data[pos + 1]
+                if kind == T_STR:
+                    value[key] = strings[small]
+                    pos += 2
+                    continue
+                if kind == T_INT:
+                    value[key] = (small >> 1) if not small & 1 else -((small + 1) >> 1)
+                    pos += 2
+                    continue
+                value[key] = dict(self.elements[small])
+                pos += 2
+                continue
+            value[key], pos = self.decode(data, pos)
+        return value, pos
+
+    def decode(self, data, pos):
+        kind = data[pos]
+        pos += 1
+        if kind == T_STR:
+            sid, pos = read_varint(data, pos)
+            return self.strings[sid], pos
+        if kind == T_INT:
+            return read_signed(data, pos)
+        if kind == T_TIMESTAMP:
+            delta, pos = read_signed(data, pos)
+            self.last_timestamp += delta
+            return (EPOCH + self.last_timestamp * MICROSECOND).isoformat(), pos
+        if kind == T_MONOTONIC:
+            delta, pos = read_signed(data, pos)
+            self.last_monotonic += delta
+            return self.last_monotonic / 1e6, pos
+        if kind == T_ELEMENT:
+            eid, pos = read_varint(data, pos)
+            return dict(self.elements[eid]), pos
+        if kind == T_DICT:
+            return self.decode_dict(data, pos)
+        if kind == T_LIST:
+            count, pos = read_varint(data, pos)
+            items = []
+            for _ in range(count):
+                item, pos = self.decode(data, pos)
+                items.append(item)
+            return items, pos
+        if kind == T_NONE:
+            return None, pos
+        if kind == T_TRUE:
+            return True, pos
+        if kind == T_FALSE:
+            return False, pos
+        if kind == T_FLOAT:
+            return DOUBLE.unpack_from(data, pos)[0], pos + 8
+        raise ValueError(f"unknown value type {kind}")
+
+
+def read_varint(data, pos):
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    value, shift = byte & 0x7f, 7
+    while True:
+        pos += 1
+        byte = data[pos]
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos + 1
+        shift += 7
+
+
+def read_signed(data, pos):
+    value, pos = read_varint(data, pos)
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1), pos
+
+
+def is_compact(path):
+    """True when path starts with the compact recording header."""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_compact(path, actions, compress=True):
+    """Write actions to a binary recording; returns the number written."""
+    with open(path, 'wb') as f:
+        writer = CompactWriter(f, compress)
+        for action in actions:
+            writer.write(action)
+        writer.close()
+    return writer.actions
+
+
+def read_compact(path):
+    with open(path, 'rb') as f:
+        return list(CompactReader(f))
+
+
+def write_json(path, actions):
+    """Write actions as the recorder's JSON data file, one action at a time."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for i, action in enumerate(actions):
+            f.write(",\n  " if i else "\n  ")
+            f.write(json.dumps(action, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+        f.write("\n]")
+
+
+def load_actions(path):
+    """Load a recorded_actions file in either format."""
+    if is_compact(path):
+        return read_compact(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def convert(source, target, compress=True):
+    """Convert a recording between JSON and the compact format (direction from the source)."""
+    actions = load_actions(source)
+    if is_compact(source):
+        write_json(target, actions)
+    else:
+        write_compact(target, actions, compress)
+    return len(actions)
+
+
+def synthetic_actions(count=10000, chats=30, seed=1):
+    """Actions shaped like a long recording: chat clicks, typing, keys, captures and scrolls."""
+    rng = random.Random(seed)
+    names = [f"Chat {i}" for i in range(chats)]
+    moment = datetime(2025, 11, 6, 9, 0)
+    monotonic = 1000.0
+    actions = []
+    for i in range(count):
+        gap = rng.uniform(0.2, 3.0)
+        moment += timedelta(seconds=gap)
+        monotonic = round(monotonic + gap, 6)
+        action = {'type': rng.choice(('click', 'click', 'click', 'message', 'keypress', 'selected_message', 'scroll')),
+                  'timestamp': moment.isoformat()}
+        if action['type'] == 'click':
+            name = rng.choice(names)
+            action.update({'monotonic': monotonic,
+                           'position': {'x': 150, 'y': 100 + 70 * names.index(name) % 700},
+                           'element_info': {'control_type': 'ListItem', 'name': name,
+                                            'automation_id': f"ChatListItem_{name}", 'class_name': 'ListViewItem'}})
+        elif action['type'] == 'message':
+            action['text'] = f"Message {i} about the plan for tomorrow"
+        elif action['type'] == 'keypress':
+            action['key'] = rng.choice(('esc', 'tab', 'page up', 'ctrl+f'))
+        elif action['type'] == 'selected_message':
+            action.update({'text': f"Selected message {i}", 'detection_method': 'clipboard'})
+        else:
+            action.update({'monotonic': monotonic, 'position': {'x': 780, 'y': 395}, 'notches': 12,
+                           'duration_ms': 200, 'steps': [[0, 1, 1], [20, 1, 11]]})
+        actions.append(action)
+    return actions
+
+
+def benchmark(actions, workdir, repeat=3):
+    """File size and load time of actions as JSON, compact and compact+zlib."""
+    results = {}
+    paths = {'json': os.path.join(workdir, "bench.json"),
+             'compact': os.path.join(workdir, "bench" + COMPACT_SUFFIX),
+             'compact+zlib': os.path.join(workdir, "bench.z" + COMPACT_SUFFIX)}
+    for name, path in paths.items():
+        start = time.perf_counter()
+        if name == 'json':
+            write_json(path, actions)
+        else:
+            write_compact(path, actions, compress=name == 'compact+zlib')
+        written = time.perf_counter() - start
+        load_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            loaded = load_actions(path)
+            load_times.append(time.perf_counter() - start)
+        if loaded != actions:
+            raise AssertionError(f"{name} round trip changed the actions")
+        results[name] = {'bytes': os.path.getsize(path), 'write_ms': written * 1000,
+                         'load_ms': min(load_times) * 1000}
+    return results
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Convert recorded_actions files to and from the compact binary format")
+    sub = parser.add_subparsers(dest='command', required=True)
+    convert_parser = sub.add_parser('convert', help="JSON -> compact or compact -> JSON, by the source's format")
+    convert_parser.add_argument('source')
+    convert_parser.add_argument('target')
+    convert_parser.add_argument('--no-compress', action='store_true', help="write the compact file without zlib")
+    verify_parser = sub.add_parser('verify', help="check that a JSON recording survives a round trip")
+    verify_parser.add_argument('source')
+    bench_parser = sub.add_parser('benchmark', help="compare sizes and load times")
+    bench_parser.add_argument('source', nargs='?', help="recording to measure (default: 10k synthetic actions)")
+    bench_parser.add_argument('--actions', type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        count = convert(args.source, args.target, compress=not args.no_compress)
+        before, after = os.path.getsize(args.source), os.path.getsize(args.target)
+        print(f"✓ {count} actions: {args.source} ({before:,} bytes) -> {args.target} ({after:,} bytes)")
+    elif args.command == 'verify':
+        import tempfile
+        actions = load_actions(args.source)
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "verify" + COMPACT_SUFFIX)
+            write_compact(path, actions)
+            same = read_compact(path) == actions
+        print(f"{'✓' if same else '✗'} {len(actions)} actions {'round-trip unchanged' if same else 'CHANGED by a round trip'}")
+    else:
+        import tempfile
+        actions = load_actions(args.source) if args.source else synthetic_actions(args.actions)
+        with tempfile.TemporaryDirectory() as workdir:
+            results = benchmark(actions, workdir)
+        print(f"📊 {len(actions):,} actions")
+        base = results['json']['bytes']
+        for name, stats in results.items():
+            print(f"   {name:<13} {stats['bytes']:>11,} bytes ({stats['bytes'] / base:6.1%})  "
+                  f"write {stats['write_ms']:7.1f} ms  load {stats['load_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Background UI Element Resolver
+Looks up the element under a click on a worker thread so the mouse hook returns at once
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from hook_metrics import LatencyHistogram
+
+try:
+    import ctypes
+    import ctypes.wintypes
+    _user32 = ctypes.windll.user32
+except (ImportError, AttributeError):
+    _user32 = None
+
+CACHE_CAPACITY = 64
+CACHE_MAX_AGE = 30.0
+# Leaf-like controls only: a cached List or Pane would swallow clicks on its items
+CACHEABLE_TYPES = {
+    'ListItem', 'Button', 'Edit', 'Text', 'Hyperlink', 'Image',
+    'MenuItem', 'TabItem', 'CheckBox', 'RadioButton', 'SplitButton',
+}
+# Invalidations remembered so a lookup that was queued before one does not cache a stale element
+RECENT_INVALIDATIONS = 32
+
+
+def describe_element(element):
+    """Return the element_info dict stored with recorded clicks."""
+    info = element.element_info
+    return {
+        'control_type': info.control_type,
+        'name': info.name,
+        'automation_id': info.automation_id,
+        'class_name': info.class_name,
+    }
+
+
+def element_rect(element):
+    """Return the (left, top, right, bottom) bounding rectangle of an element."""
+    rect = element.element_info.rectangle
+    return rect.left, rect.top, rect.right, rect.bottom
+
+
+def window_rect(handle):
+    """Return the screen rectangle of a top-level window (cheap user32 call, not UIA)."""
+    if _user32 is None or not handle:
+        return None
+    rect = ctypes.wintypes.RECT()
+    if not _user32.GetWindowRect(handle, ctypes.byref(rect)):
+        return None
+    return rect.left, rect.top, rect.right, rect.bottom
+
+
+def overlaps(rect, region):
+    """True when two (left, top, right, bottom) rectangles share any area."""
+    return rect[0] < region[2] and region[0] < rect[2] and rect[1] < region[3] and region[1] < rect[3]
+
+
+def desktop_from_point(x, y):
+    """Default hit test: the UIA element at screen position (x, y)."""
+    from pywinauto import Desktop
+    return Desktop(backend="uia").from_point(x, y)
+
+
+def init_worker_com():
+    """UIA calls need COM initialised on every worker thread."""
+    try:
+        import comtypes
+        comtypes.CoInitialize()
+    except Exception:
+        pass
+
+
+class ElementCache:
+    """LRU cache of resolved elements keyed by their bounding rectangles.
+
+    A click inside a cached rectangle is answered from memory; when several
+    cached rectangles contain the point the smallest one wins. Everything is
+    dropped when the WhatsApp window moves or resizes, and entries older
+    than max_age seconds are ignored. The recorder reports UI changes with
+    the screen region they affect (the message list after a scroll, say),
+    so the chat list, input box and buttons stay cached meanwhile.
+    """
+
+    def __init__(self, capacity=CACHE_CAPACITY, max_age=CACHE_MAX_AGE, window_rect=None):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.window_rect = window_rect      # callable returning the window rectangle
+        self._entries = OrderedDict()       # rect -> (element_info, stored at)
+        self._window = None
+        self._lock = threading.Lock()
+        self.generation = 0                 # number of invalidate() calls so far
+        self._recent = deque(maxlen=RECENT_INVALIDATIONS)   # (generation, region) of the last invalidations
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self, x, y):
+        """Return the cached element_info containing (x, y), or None."""
+        current_window = self.window_rect() if self.window_rect else None
+        now = time.monotonic()
+        with self._lock:
+            if current_window != self._window:
+                if self._entries:
+                    self._clear_locked()
+                self._window = current_window
+
+            best = None
+            for rect, (info, stored_at) in self._entries.items():
+                left, top, right, bottom = rect
+                if left <= x < right and top <= y < bottom and now - stored_at <= self.max_age:
+                    area = (right - left) * (bottom - top)
+                    if best is None or area < best[0]:
+                        best = (area, rect, info)
+
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best[1])
+            self.hits += 1
+            return dict(best[2])
+
+    def store(self, rect, element_info, since=None):
+        """Remember a resolved element if it is a leaf-like control.
+
+        since is the generation the lookup was queued at; the element is not
+        kept when an invalidation after that covered its rectangle.
+        """
+        if not element_info or element_info.get('control_type') not in CACHEABLE_TYPES:
+            return
+        left, top, right, bottom = rect
+        if right <= left or bottom <= top:
+            return
+        with self._lock:
+            if since is not None and since != self.generation:
+                if not self._recent or self._recent[0][0] > since + 1:
+                    return      # too many invalidations since to tell
+                if any(generation > since and (region is None or overlaps(rect, region))
+                       for generation, region in self._recent):
+                    return
+            self._entries[rect] = (dict(element_info), time.monotonic())
+            self._entries.move_to_end(rect)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, region=None):
+        """Forget the cached elements overlapping region, or all of them (the UI tree changed there)."""
+        with self._lock:
+            self.generation += 1
+            self._recent.append((self.generation, region))
+            if region is None:
+                if self._entries:
+                    self._clear_locked()
+                return
+            stale = [rect for rect in self._entries if overlaps(rect, region)]
+            for rect in stale:
+                del self._entries[rect]
+            if stale:
+                self.invalidations += 1
+
+    def _clear_locked(self):
+        self._entries.clear()
+        self.invalidations += 1
+
+    def summary(self):
+        """Return hit/miss counters."""
+        total = self.hits + self.misses
+        return {
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_hit_rate': self.hits / total if total else 0.0,
+            'cache_invalidations': self.invalidations,
+        }
+
+
+class ElementResolver:
+    """Resolves clicked elements on a small thread pool.
+
+    submit() answers from the ElementCache when it can and otherwise only
+    queues the lookup; the callback receives the element_info dict (or None)
+    once the worker is done. A lookup only caches its element when no
+    invalidation of that part of the window happened while it was queued.
+    Queue wait and UIA time go into fixed-size histograms and only the
+    deepest queue is kept, so a long session does not grow them.
+    """
+
+    def __init__(self, from_point=desktop_from_point, workers=1, cache=None):
+        self.from_point = from_point
+        self.cache = cache if cache is not None else ElementCache()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="element-resolver",
+                                            initializer=init_worker_com)
+        self._lock = threading.Lock()
+        self._futures = set()
+        self._pending = 0
+        self.waits = LatencyHistogram()         # time in the queue per lookup
+        self.resolves = LatencyHistogram()      # time in UIA per lookup
+        self.max_depth = 0                      # deepest the queue got, counted at submit
+        self.failures = 0
+
+    def submit(self, x, y, callback):
+        """Resolve the element at (x, y) from the cache, or queue a lookup."""
+        cached = self.cache.lookup(x, y)
+        if cached is not None:
+            callback(cached)
+            return
+        since = self.cache.generation
+        queued_at = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+            depth = self._pending
+        future = self._executor.submit(self._resolve, x, y, since, queued_at, depth, callback)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+
+    def _forget(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _resolve(self, x, y, since, queued_at, depth, callback):
+        started = time.perf_counter()
+        try:
+            element = self.from_point(x, y)
+            info = describe_element(element)
+        except Exception:
+            info = None
+        else:
+            try:
+                self.cache.store(element_rect(element), info, since)
+            except Exception:
+                pass
+        finished = time.perf_counter()
+
+        with self._lock:
+            self._pending -= 1
+            self.waits.record(started - queued_at)
+            self.resolves.record(finished - started)
+            self.max_depth = max(self.max_depth, depth)
+            if info is None:
+                self.failures += 1
+        callback(info)
+
+    @property
+    def pending(self):
+        """Number of clicks still waiting for their element."""
+        with self._lock:
+            return self._pending
+
+    def drain(self, timeout=10.0):
+        """Wait for all queued lookups to finish."""
+        with self._lock:
+            futures = list(self._futures)
+        if futures:
+            wait(futures, timeout=timeout)
+
+    def shutdown(self):
+        """Finish queued lookups and stop the workers."""
+        self._executor.shutdown(wait=True)
+
+    def summary(self):
+        """Return resolution latency (to about 9%) and backlog statistics in milliseconds."""
+        with self._lock:
+            waits, resolves, failures = self.waits, self.resolves, self.failures
+            if not resolves.count:
+                return {'resolved': 0, 'failed': failures, **self.cache.summary()}
+            return {
+                'resolved': resolves.count - failures,
+                'failed': failures,
+                'resolve_p50_ms': resolves.percentile(0.5) * 1000,
+                'resolve_p95_ms': resolves.percentile(0.95) * 1000,
+                'resolve_max_ms': resolves.max * 1000,
+                'wait_p95_ms': waits.percentile(0.95) * 1000,
+                'wait_max_ms': waits.max * 1000,
+                'max_queue_depth': self.max_depth,
+                **self.cache.summary(),
+            }
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Input Event Loop
+One queue and one consumer thread for keyboard, mouse and hotkey callbacks: ordered, lock-free handlers, instant stop, no polling
+"""
+
+import queue
+import sys
+import threading
+import time
+
+# A blocking get() cannot be interrupted by Ctrl+C on Windows, so there the
+# consumer wakes up this often to let KeyboardInterrupt through
+INTERRUPT_CHECK = 1.0 if sys.platform == 'win32' else None
+
+
+class EventLoop:
+    """Runs posted callbacks one at a time, in arrival order, on the thread that calls run().
+
+    Hook threads only post (name, callback, args) and return, so they never
+    block the OS input hooks, and the handlers never race each other on
+    shared session state. run() sleeps in the queue while idle and returns
+    as soon as stop() is called: right after the current callback when
+    stopped from a handler, or at once from any other thread.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics      # optional HookMetrics: queue wait and time per handler
+        self._queue = queue.SimpleQueue()
+        self._stopped = threading.Event()
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def post(self, name, callback, *args):
+        """Queue callback(*args) for the consumer; safe from any thread."""
+        self._queue.put((name, callback, args, time.perf_counter()))
+
+    def wrap(self, name, callback):
+        """Return a hook callback that posts callback with its arguments."""
+        def post(*args):
+            self._queue.put((name, callback, args, time.perf_counter()))
+        return post
+
+    def flush(self, timeout=None):
+        """Wait until every event posted so far has been handled; False on timeout."""
+        done = threading.Event()
+        self.post('flush', done.set)
+        return done.wait(timeout)
+
+    def stop(self):
+        """Make run() return; events still queued are dropped."""
+        self._stopped.set()
+        self._queue.put(None)       # wake the consumer if it is waiting
+
+    def drain(self, *names):
+        """After stop(): run the events still queued under these names on this thread, drop the others."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is None or item[0] not in names:
+                continue
+            name, callback, args, posted = item
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Warning: {name} handler failed: {e}")
+
+    def run(self):
+        """Process events until stop() is called."""
+        while not self._stopped.is_set():
+            try:
+                item = self._queue.get(timeout=INTERRUPT_CHECK)
+            except queue.Empty:
+                continue
+            if item is None:
+                continue
+            name, callback, args, posted = item
+            start = time.perf_counter()
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Warning: {name} handler failed: {e}")
+            if self.metrics and name != 'flush':
+                self.metrics.record('queue_wait', posted, start - posted)
+                self.metrics.record(name, start, time.perf_counter() - start)
+
+    def run_in_thread(self):
+        """Start run() on a daemon thread and return the thread (for tests and benchmarks)."""
+        thread = threading.Thread(target=self.run, name="event-loop", daemon=True)
+        thread.start()
+        return thread
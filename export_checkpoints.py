@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Chat Export Checkpoints
+Per-chat record of how far an export got, plus the staging file that makes a run resumable
+"""
+
+import json
+import os
+
+DEFAULT_CHECKPOINT_FILE = "export_checkpoints.json"
+STAGING_SUFFIX = ".staging.jsonl"
+# Keys of the newest messages kept per chat; any of them ends the next scroll-back
+RECENT_KEYS = 20
+
+
+class CheckpointStore:
+    """Export state of every chat, kept in one small JSON file.
+
+    Per chat: the export file, how many blocks and bytes it held after the
+    last committed run, and the keys of its newest messages. The file is
+    replaced atomically on every update.
+    """
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_FILE):
+        self.path = path
+        self.chats = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.chats = json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not load export checkpoints: {e}")
+
+    def get(self, chat):
+        """Return the checkpoint of a chat, or None if it was never exported."""
+        return self.chats.get(chat)
+
+    def set(self, chat, state):
+        """Store the checkpoint of a chat and write the file."""
+        self.chats[chat] = state
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.chats, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class BatchStager:
+    """Append-only file of the pages read so far by an unfinished export.
+
+    Every page is flushed to disk before the next scroll, so a run that is
+    interrupted resumes after its last written page. The page that reached
+    the previous checkpoint (or the top of the chat) is marked as the last.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, rows, last=False):
+        """Stage one page of (key, label, ...) rows."""
+        entry = {'rows': [[row[0], row[1]] for row in rows], 'last': last}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self, remove=False):
+        """Close the staging file; remove it once its rows are committed."""
+        self._file.close()
+        if remove:
+            os.remove(self.path)
+
+
+def read_staged(path):
+    """Return (pages of (key, label) rows, whether the walk had finished).
+
+    A half-written last line is cut off so new pages can be appended.
+    """
+    pages = []
+    finished = False
+    if not os.path.exists(path):
+        return pages, finished
+    good = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            pages.append([tuple(row) for row in entry['rows']])
+            finished = entry['last']
+            good += len(line)
+    if good != os.path.getsize(path):
+        with open(path, 'r+b') as f:
+            f.truncate(good)
+    return pages, finished
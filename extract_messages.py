@@ -4,22 +4,47 @@ WhatsApp Message Extractor
 A simple tool to extract selected messages from WhatsApp Desktop
 """
 
-import pyperclip
-import time
-import keyboard
+import argparse
 from datetime import datetime
-from pywinauto.application import Application
+from automation_backend import default_backend
+from chat_exporter import open_chat_name
+from seen_index import SeenIndex
+from clipboard_capture import ClipboardCapture
+from hook_metrics import HookMetrics, print_summary
+from event_loop import EventLoop
+from message_store import (TOTAL_WIDTH, MessageStore, render_extracted_entries,
+                           render_extracted_header)
 
 class MessageExtractor:
-    def __init__(self):
+    def __init__(self, backend=None, store=None, text_files=True, trace_file=None):
+        self.backend = backend or default_backend()
+        self._store = store             # opened on first use, see store
+        self.text_files = text_files    # the database is the record; the text file is a rendering of it
+        self.session_id = None
         self.extracted_messages = []
+        self.seen = SeenIndex()
+        self.captured_keys = set()      # seen-index keys of this session's messages, until they are saved
+        self.clipboard = ClipboardCapture(self.backend.clipboard)
+        self.metrics = HookMetrics(trace_file)
+        self.loop = EventLoop(self.metrics)
         self.app = None
         self.running = False
+        self.output_file = None
+        self.saved_count = 0
+        self.stored_count = 0
+        self.total_offset = 0
+    
+    @property
+    def store(self):
+        """The message database, opened by the first save."""
+        if self._store is None:
+            self._store = MessageStore()
+        return self._store
     
     def connect_to_whatsapp(self):
         """Connect to WhatsApp Desktop."""
         try:
-            self.app = Application(backend="uia").connect(title="WhatsApp")
+            self.app = self.backend.connect(title="WhatsApp")
             print("✅ Connected to WhatsApp Desktop")
             return True
         except Exception as e:
@@ -38,21 +63,24 @@ class MessageExtractor:
             
             # Method 1: Use Ctrl+C to copy selected text
             print("📋 Copying selected text...")
-            main_win.type_keys("^c")  # Ctrl+C
-            time.sleep(0.3)  # Wait for clipboard
             
-            # Get text from clipboard
-            selected_text = pyperclip.paste()
+            # Get text from clipboard as soon as the copy lands
+            with self.metrics.measure('clipboard_copy'):
+                selected_text = self.clipboard.capture(lambda: main_win.type_keys("^c"))
             
             if selected_text and selected_text.strip():
                 message_text = selected_text.strip()
                 
-                # Check if we already have this message
-                if message_text not in [msg['text'] for msg in self.extracted_messages]:
+                # Check if we already have this message (this or an earlier session);
+                # the index only learns it once the message is saved
+                key = self.seen.key(message_text)
+                if key not in self.captured_keys and message_text not in self.seen:
+                    self.captured_keys.add(key)
                     message_info = {
                         'text': message_text,
                         'timestamp': datetime.now().isoformat(),
-                        'length': len(message_text)
+                        'length': len(message_text),
+                        'chat': open_chat_name(main_win)
                     }
                     self.extracted_messages.append(message_info)
                     
@@ -69,30 +97,52 @@ class MessageExtractor:
             print(f"❌ Error extracting message: {e}")
     
     def save_messages(self):
-        """Save extracted messages to file."""
+        """Store extracted messages and render them to a file.
+        
+        Every save adds only the messages extracted since the last one to
+        the database. The first save of a session creates the text file;
+        later saves append to it and update the total in the header.
+        """
         if not self.extracted_messages:
             print("📭 No messages to save")
             return
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"extracted_whatsapp_messages_{timestamp}.txt"
+        new_messages = self.extracted_messages[self.saved_count:]
+        if not new_messages:
+            print(f"✓ All {self.saved_count} messages already saved to: {self.output_file or self.store.path}")
+            return self.output_file
         
+        now = datetime.now()
+        total = len(self.extracted_messages)
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write("WhatsApp Extracted Messages\n")
-                f.write("=" * 50 + "\n")
-                f.write(f"Extracted on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Total messages: {len(self.extracted_messages)}\n")
-                f.write("=" * 50 + "\n\n")
+            if self.session_id is None:
+                self.session_id = self.store.start_session('extraction', now.isoformat())
+            if self.stored_count < total:   # a failed file write must not store the messages twice
+                unstored = self.extracted_messages[self.stored_count:]
+                self.store.add_messages(self.session_id, 'extracted', unstored)
+                self.store.end_session(self.session_id, now.isoformat())
+                self.stored_count = total
+                for message in unstored:
+                    self.seen.add(message['text'])
+            
+            if self.text_files:
+                if self.output_file is None:
+                    self.output_file = f"extracted_whatsapp_messages_{now.strftime('%Y%m%d_%H%M%S')}.txt"
+                    header, self.total_offset = render_extracted_header(now.strftime('%Y-%m-%d %H:%M:%S'), total)
+                    with open(self.output_file, 'w', encoding='utf-8') as f:
+                        f.write(header)
+                else:
+                    # The total is padded to a fixed width so it can be rewritten in place
+                    with open(self.output_file, 'r+b') as f:
+                        f.seek(self.total_offset)
+                        f.write(f"Total messages: {total:<{TOTAL_WIDTH}}".encode('utf-8'))
                 
-                for i, message in enumerate(self.extracted_messages, 1):
-                    f.write(f"Message {i:3d} | {message['timestamp']} | {message['length']} chars\n")
-                    f.write("-" * 80 + "\n")
-                    f.write(message['text'] + "\n")
-                    f.write("\n" + "=" * 80 + "\n\n")
+                with open(self.output_file, 'a', encoding='utf-8') as f:
+                    f.write(render_extracted_entries(new_messages, self.saved_count + 1))
             
-            print(f"💾 Saved {len(self.extracted_messages)} messages to: {filename}")
-            return filename
+            self.saved_count = total
+            print(f"💾 Saved {len(new_messages)} new messages ({total} total) to: {self.output_file or self.store.path}")
+            return self.output_file
         except Exception as e:
             print(f"❌ Error saving messages: {e}")
             return None
@@ -114,25 +164,33 @@ class MessageExtractor:
         print("4. Press Q to quit")
         print("-" * 60)
         
-        # Set up hotkeys
-        keyboard.add_hotkey('space', self.extract_selected_message)
-        keyboard.add_hotkey('s', self.save_messages)
-        keyboard.add_hotkey('q', self.quit_extraction)
+        # Set up hotkeys; they only queue the work for the event loop below
+        self.backend.add_hotkey('space', self.metrics.wrap('extract_hotkey',
+                                                           self.loop.wrap('extract', self.extract_selected_message)))
+        self.backend.add_hotkey('s', self.metrics.wrap('save_hotkey', self.loop.wrap('save', self.save_messages)))
+        self.backend.add_hotkey('q', self.loop.wrap('quit', self.quit_extraction))
         
         print("🎤 Hotkeys active! Select messages in WhatsApp and press SPACE")
         
         try:
-            while self.running:
-                time.sleep(0.1)
+            self.loop.run()
         except KeyboardInterrupt:
             pass
         finally:
-            keyboard.unhook_all()
+            self.backend.unhook_all()
+            self.metrics.close()
             print("\n✅ Message extraction stopped")
+            summary = self.metrics.summary()
+            if summary:
+                print("⏱️  Hook latency:")
+                print_summary(summary, "   ")
+            if self.metrics.trace:
+                print(f"   Trace: {self.metrics.trace.path}")
     
     def quit_extraction(self):
         """Stop the extraction process."""
         self.running = False
+        self.loop.stop()
         print(f"\n🛑 Stopping extraction... {len(self.extracted_messages)} messages extracted")
 
 def manual_extraction():
@@ -170,6 +228,10 @@ def manual_extraction():
 
 def main():
     """Main menu."""
+    parser = argparse.ArgumentParser(description="Extract selected WhatsApp Desktop messages")
+    parser.add_argument('--trace', metavar='FILE', help="write every timed hotkey event to this JSONL file")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("📱 WHATSAPP MESSAGE EXTRACTOR")
     print("=" * 60)
@@ -181,7 +243,7 @@ def main():
     choice = input("\nEnter your choice (1-3): ").strip()
     
     if choice == "1":
-        extractor = MessageExtractor()
+        extractor = MessageExtractor(trace_file=args.trace)
         extractor.start_interactive_extraction()
     elif choice == "2":
         manual_extraction()
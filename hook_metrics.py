@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Hook Latency Metrics
+Log-bucketed latency histograms around input hooks and capture steps, with an optional per-event trace file
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Buckets per doubling: every bucket is about 9% wide
+SUB_BUCKETS = 8
+# 1 µs .. 2^26 µs (about 67 s); slower events land in the last bucket
+BUCKETS = 26 * SUB_BUCKETS + 1
+TRACE_FLUSH_INTERVAL = 1.0
+
+
+class LatencyHistogram:
+    """Counts of latencies in logarithmic buckets.
+
+    Recording is one log2 and one list increment, and memory is fixed
+    however many events a session has. Percentiles are read back as the
+    upper edge of their bucket, so they are accurate to about 9%.
+    """
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = seconds * 1e6
+        bucket = int(math.log2(micros) * SUB_BUCKETS) + 1 if micros > 1 else 0
+        self.counts[min(bucket, BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Upper bound in seconds of the latency at fraction (0-1) of the events."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * fraction))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(2 ** (bucket / SUB_BUCKETS) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        """Count, p50/p95/p99/max and total in milliseconds."""
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'p50_ms': self.percentile(0.50) * 1000,
+            'p95_ms': self.percentile(0.95) * 1000,
+            'p99_ms': self.percentile(0.99) * 1000,
+            'max_ms': self.max * 1000,
+            'total_ms': self.total * 1000,
+        }
+
+
+class TraceWriter:
+    """Per-event trace lines, buffered in memory and written by a background thread."""
+
+    def __init__(self, path, flush_interval=TRACE_FLUSH_INTERVAL):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._buffer = []
+        self._lock = threading.Lock()          # guards the buffer
+        self._write_lock = threading.Lock()    # guards the file
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, args=(flush_interval,), daemon=True)
+        self._flusher.start()
+
+    def write(self, name, start, seconds):
+        # Serialized later on the flusher thread; the hook only appends a tuple
+        with self._lock:
+            self._buffer.append((name, start, seconds, threading.current_thread().name))
+
+    def flush(self):
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+        if pending:
+            self._write(pending)
+
+    def _write(self, pending):
+        with self._write_lock:
+            if self._file.closed:
+                return
+            self._file.write("".join(
+                json.dumps({'name': name, 'start': round(start, 6), 'ms': round(seconds * 1000, 4),
+                            'thread': thread}) + "\n"
+                for name, start, seconds, thread in pending))
+            self._file.flush()
+
+    def _flush_periodically(self, interval):
+        while not self._closed.wait(interval):
+            self.flush()
+
+    def close(self):
+        self._closed.set()
+        self.flush()
+        with self._write_lock:
+            self._file.close()
+
+
+class HookMetrics:
+    """One LatencyHistogram per hook callback or capture step, by name.
+
+    wrap() times a callback every time it is called and measure() times a
+    block; both are safe to use from the keyboard, mouse and worker threads
+    at once. With trace_path every event is also written to a JSONL file
+    (name, start in seconds since the metrics were created, ms, thread).
+    """
+
+    def __init__(self, trace_path=None):
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.trace = TraceWriter(trace_path) if trace_path else None
+
+    def record(self, name, start, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(seconds)
+        if self.trace:
+            self.trace.write(name, start - self.origin, seconds)
+
+    @contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start)
+
+    def wrap(self, name, callback):
+        """Return callback with every call timed under name."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                self.record(name, start, time.perf_counter() - start)
+        return timed
+
+    def summary(self):
+        """Return {name: histogram summary}, busiest first."""
+        with self._lock:
+            items = [(name, histogram.summary()) for name, histogram in self.histograms.items()]
+        return dict(sorted(items, key=lambda item: -item[1].get('total_ms', 0)))
+
+    def close(self):
+        if self.trace:
+            self.trace.close()
+
+
+def print_summary(summary, indent=""):
+    """Print a metrics summary as one line per hook or step."""
+    for name, stats in summary.items():
+        if not stats.get('count'):
+            continue
+        print(f"{indent}{name:<16} {stats['count']:>6}x  p50 {stats['p50_ms']:7.2f} ms  p95 {stats['p95_ms']:7.2f} ms  "
+              f"p99 {stats['p99_ms']:7.2f} ms  max {stats['max_ms']:8.2f} ms")
+
+
+def summarize_trace(path):
+    """Rebuild the histograms from a trace file."""
+    metrics = HookMetrics()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            metrics.record(event['name'], metrics.origin, event['ms'] / 1000)
+    return metrics.summary()
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Summarize a hook latency trace written with --trace")
+    parser.add_argument('trace', help="trace file (JSON lines)")
+    args = parser.parse_args()
+
+    summary = summarize_trace(args.trace)
+    if not summary:
+        print(f"📭 No events in {args.trace}")
+        return
+    print(f"⏱️  Hook latency from {args.trace}")
+    print_summary(summary, "   ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Message Store
+One SQLite database (WAL mode) for typed, selected and extracted messages; the text files are rendered from it
+"""
+
+import argparse
+import sqlite3
+import threading
+
+from capture_formats import CAPTURED_TITLE, EXTRACTED_TITLE, SELECTED_TITLE
+
+DEFAULT_STORE_FILE = "whatsapp_messages.db"
+BATCH_SIZE = 500
+TOTAL_WIDTH = 8         # "Total messages:" field of extracted files, rewritten in place by later saves
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,             -- 'recording', 'extraction', 'export' or 'ingest'
+    started TEXT NOT NULL,
+    ended TEXT,
+    chat TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    kind TEXT NOT NULL,             -- 'typed', 'selected', 'extracted', 'exported' or 'ingested'
+    chat TEXT,
+    sender TEXT,
+    timestamp TEXT,
+    method TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages(session_id, kind);
+CREATE INDEX IF NOT EXISTS messages_chat ON messages(chat, timestamp);
+CREATE INDEX IF NOT EXISTS messages_sender ON messages(sender, timestamp);
+CREATE INDEX IF NOT EXISTS messages_time ON messages(timestamp);
+"""
+MESSAGE_COLUMNS = ('id', 'session_id', 'kind', 'chat', 'sender', 'timestamp', 'method', 'text')
+
+
+class MessageStore:
+    """Sessions and their messages in SQLite.
+
+    WAL mode lets the tools write while another process reads, and rows
+    are inserted with executemany in transactions of batch_size messages.
+    The connection is shared by the hook threads, so calls are serialized.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_FILE, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def start_session(self, kind, started, chat=None):
+        """Create a session; returns its id."""
+        with self._lock, self.db:
+            cursor = self.db.execute("INSERT INTO sessions (kind, started, chat) VALUES (?, ?, ?)",
+                                     (kind, started, chat))
+            return cursor.lastrowid
+
+    def end_session(self, session_id, ended):
+        with self._lock, self.db:
+            self.db.execute("UPDATE sessions SET ended = ? WHERE id = ?", (ended, session_id))
+
+    def add_messages(self, session_id, kind, messages, chat=None):
+        """Insert message dicts (text, and optionally timestamp, method, sender) in batches."""
+        rows = [(session_id, kind, message.get('chat', chat), message.get('sender'),
+                 message.get('timestamp'), message.get('method'), message['text']) for message in messages]
+        with self._lock:
+            for i in range(0, len(rows), self.batch_size):
+                with self.db:
+                    self.db.executemany(
+                        "INSERT INTO messages (session_id, kind, chat, sender, timestamp, method, text) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)", rows[i:i + self.batch_size])
+        return len(rows)
+
+    def _select(self, sql, params):
+        with self._lock:
+            return [dict(zip(MESSAGE_COLUMNS, row)) for row in self.db.execute(sql, params)]
+
+    def session_messages(self, session_id, kind):
+        """Messages of one kind from a session, in the order they were saved."""
+        return self._select("SELECT * FROM messages WHERE session_id = ? AND kind = ? ORDER BY id",
+                            (session_id, kind))
+
+    def query(self, chat=None, sender=None, since=None, until=None, kind=None, limit=100):
+        """Messages filtered by chat, sender, kind and timestamp range, newest first."""
+        conditions, params = [], []
+        for column, value in (('chat', chat), ('sender', sender), ('kind', kind)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return self._select(f"SELECT * FROM messages{where} ORDER BY timestamp DESC, id DESC LIMIT ?",
+                            params + [limit])
+
+    def sessions(self, limit=20):
+        """Recent sessions with their message counts, newest first."""
+        with self._lock:
+            return self.db.execute(
+                "SELECT s.id, s.kind, s.started, s.ended, s.chat, COUNT(m.id) FROM sessions s "
+                "LEFT JOIN messages m ON m.session_id = s.id GROUP BY s.id ORDER BY s.id DESC LIMIT ?",
+                (limit,)).fetchall()
+
+    def session(self, session_id):
+        with self._lock:
+            return self.db.execute("SELECT id, kind, started, ended, chat FROM sessions WHERE id = ?",
+                                   (session_id,)).fetchone()
+
+
+# --- Text renderings -----------------------------------------------------
+
+def render_captured(recorded_on, messages):
+    """captured_messages_*.txt content for typed messages."""
+    parts = [
+        CAPTURED_TITLE + "\n",
+        "=" * 30 + "\n",
+        f"Recorded on: {recorded_on}\n",
+        f"Total messages: {len(messages)}\n",
+        "=" * 30 + "\n\n",
+    ]
+    parts.extend(f"{i:3d}. {message['text']}\n" for i, message in enumerate(messages, 1))
+    return "".join(parts)
+
+
+def render_selected(recorded_on, messages):
+    """selected_messages_*.txt content."""
+    parts = [
+        SELECTED_TITLE + "\n",
+        "=" * 30 + "\n",
+        f"Recorded on: {recorded_on}\n",
+        f"Total selected messages: {len(messages)}\n",
+        "=" * 30 + "\n\n",
+    ]
+    parts.extend(f"{i:3d}. [{message['timestamp']}] [{message['method']}]\n     {message['text']}\n\n"
+                 for i, message in enumerate(messages, 1))
+    return "".join(parts)
+
+
+def render_extracted_header(extracted_on, total):
+    """Header of extracted_whatsapp_messages_*.txt; returns (text, offset of the total line)."""
+    head = EXTRACTED_TITLE + "\n" + "=" * 50 + "\n" + f"Extracted on: {extracted_on}\n"
+    text = head + f"Total messages: {total:<{TOTAL_WIDTH}}\n" + "=" * 50 + "\n\n"
+    return text, len(head.encode('utf-8'))
+
+
+def render_extracted_entries(messages, first_number=1):
+    """Entries of extracted_whatsapp_messages_*.txt."""
+    return "".join(
+        f"Message {i:3d} | {message['timestamp']} | {len(message['text'])} chars\n"
+        + "-" * 80 + "\n" + message['text'] + "\n" + "\n" + "=" * 80 + "\n\n"
+        for i, message in enumerate(messages, first_number))
+
+
+def render_session(store, session_id):
+    """Write the text files of a stored session again; returns the file names."""
+    session = store.session(session_id)
+    if session is None:
+        raise KeyError(f"no session {session_id}")
+    _, kind, started, ended, _ = session
+    stamp = started[:19].replace("-", "").replace(":", "").replace("T", "_").replace(" ", "_")
+    shown = started[:19].replace("T", " ")
+    written = []
+    if kind == 'recording':
+        for message_kind, name, render in (('typed', 'captured_messages', render_captured),
+                                           ('selected', 'selected_messages', render_selected)):
+            messages = store.session_messages(session_id, message_kind)
+            if messages:
+                written.append(write_text(f"{name}_{stamp}.txt", render(shown, messages)))
+    elif kind == 'extraction':
+        messages = store.session_messages(session_id, 'extracted')
+        if messages:
+            header, _ = render_extracted_header((ended or started)[:19].replace("T", " "), len(messages))
+            written.append(write_text(f"extracted_whatsapp_messages_{stamp}.txt",
+                                      header + render_extracted_entries(messages)))
+    return written
+
+
+def write_text(path, content):
+    """Write a rendering in one call."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Query the WhatsApp message store")
+    parser.add_argument('--store', default=DEFAULT_STORE_FILE, help="database file")
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('sessions', help="list recent sessions")
+    query_parser = sub.add_parser('query', help="list stored messages")
+    query_parser.add_argument('--chat')
+    query_parser.add_argument('--sender')
+    query_parser.add_argument('--kind', choices=('typed', 'selected', 'extracted'))
+    query_parser.add_argument('--since', help="ISO date or timestamp")
+    query_parser.add_argument('--until', help="ISO date or timestamp")
+    query_parser.add_argument('--limit', type=int, default=50)
+    render_parser = sub.add_parser('render', help="write the text files of a session")
+    render_parser.add_argument('session_id', type=int)
+    args = parser.parse_args()
+
+    store = MessageStore(args.store)
+    try:
+        if args.command == 'sessions':
+            for session_id, kind, started, ended, chat, count in store.sessions():
+                print(f"{session_id:5d}. {kind:<10} {started[:19]}  {count:5d} messages"
+                      + (f"  [{chat}]" if chat else ""))
+        elif args.command == 'query':
+            for message in store.query(args.chat, args.sender, args.since, args.until, args.kind, args.limit):
+                print(f"[{(message['timestamp'] or '')[:19]}] {message['kind']:<9} "
+                      f"{message['sender'] or ''} {message['text'][:100]}")
+        elif args.command == 'render':
+            try:
+                for path in render_session(store, args.session_id):
+                    print(f"📝 {path}")
+            except KeyError as e:
+                print(f"❌ {e.args[0]}")
+        else:
+            parser.print_help()
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
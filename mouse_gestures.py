@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Mouse Gesture Coalescing
+Merges raw mouse move, button and wheel events into scroll and drag actions stored as delta-encoded runs
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import namedtuple
+from datetime import datetime
+
+# A scroll gesture ends when the wheel rests this long or the pointer drifts this far
+SCROLL_GAP = 0.6
+SCROLL_DRIFT = 40
+# A left press that moves further than this (pixels) before its release is a drag, not a click
+DRAG_THRESHOLD = 5
+# Points of a drag path are sampled at most this often
+MOVE_INTERVAL = 0.015
+# Step times are stored in multiples of this, so steady gestures form long runs
+TIME_QUANTUM_MS = 10
+GESTURE_TYPES = ('scroll', 'drag')
+
+# Events shaped like the ones the mouse module passes to its hooks
+ButtonEvent = namedtuple('ButtonEvent', 'event_type button time')
+WheelEvent = namedtuple('WheelEvent', 'delta time')
+MoveEvent = namedtuple('MoveEvent', 'x y time')
+
+
+def quantize_ms(seconds):
+    """Seconds -> whole milliseconds, rounded to TIME_QUANTUM_MS."""
+    return int(round(seconds * 1000 / TIME_QUANTUM_MS)) * TIME_QUANTUM_MS
+
+
+def append_run(runs, *step):
+    """Append a step to a list of [*step, repeat] runs, extending the last run when it is the same step."""
+    if runs and runs[-1][:-1] == list(step):
+        runs[-1][-1] += 1
+    else:
+        runs.append([*step, 1])
+
+
+def expand_runs(runs):
+    """Yield every step of a list of [*step, repeat] runs."""
+    for *step, repeat in runs:
+        for _ in range(repeat):
+            yield step
+
+
+def scroll_steps(action):
+    """(seconds since the previous notch, wheel delta) for every notch of a scroll action."""
+    return [(dt / 1000, delta) for dt, delta in expand_runs(action['steps'])]
+
+
+def drag_path(action):
+    """(seconds since the previous point, x, y) for every sampled point of a drag after its start."""
+    x, y = action['position']['x'], action['position']['y']
+    path = []
+    for dt, dx, dy in expand_runs(action['steps']):
+        x += dx
+        y += dy
+        path.append((dt / 1000, x, y))
+    return path
+
+
+def path_points(action, limit=None):
+    """The (x, y) points of a drag after its start, thinned to at most limit points; always ends at its end."""
+    points = [(x, y) for _, x, y in drag_path(action)] or [(action['end']['x'], action['end']['y'])]
+    if limit and len(points) > limit:
+        step = len(points) / limit
+        points = [points[int((i + 1) * step) - 1] for i in range(limit)]
+    return points
+
+
+def wheel_delta(delta):
+    """Wheel deltas are whole notches on most mice; keep them as ints in the JSON when they are."""
+    return int(delta) if delta == int(delta) else round(delta, 3)
+
+
+class GestureCoalescer:
+    """Turns the raw events of a mouse hook into scroll and drag actions.
+
+    Wheel notches are merged into one scroll action until the wheel rests
+    for SCROLL_GAP seconds, the pointer drifts away or anything else is
+    recorded. A left press that moves more than DRAG_THRESHOLD pixels
+    before its release becomes one drag action. Both store their steps as
+    runs of deltas: [ms since the previous step, wheel delta, repeat] or
+    [ms, dx, dy, repeat], so a steady scroll-back of hundreds of notches
+    is a few runs. Other moves only update the pointer position.
+
+    feed() does a few comparisons per event but is not thread-safe; call it
+    from one thread (the recorder's event loop).
+    """
+
+    def __init__(self, emit, position=None):
+        self.emit = emit            # called with every finished gesture action
+        self.position = position    # pointer position before the first move event is seen
+        self.pointer = None
+        self.scroll = None
+        self.press = None
+        self.dragged = False        # the last left release ended a drag
+        self.events = 0
+        self.gestures = 0
+
+    def feed(self, event):
+        """Handle one mouse module event (ButtonEvent, WheelEvent or MoveEvent)."""
+        self.events += 1
+        if hasattr(event, 'delta'):
+            self.wheel(event)
+        elif hasattr(event, 'x'):
+            self.move(event)
+        elif event.button == 'left':
+            if event.event_type in ('down', 'double'):
+                self.button_down(event)
+            elif event.event_type == 'up':
+                self.button_up(event)
+
+    def current_pointer(self):
+        if self.pointer is None and self.position is not None:
+            self.pointer = tuple(self.position())
+        return self.pointer or (0, 0)
+
+    def wheel(self, event):
+        x, y = self.current_pointer()
+        scroll = self.scroll
+        if scroll and (event.time - scroll['last'] > SCROLL_GAP or
+                       abs(x - scroll['x']) > SCROLL_DRIFT or abs(y - scroll['y']) > SCROLL_DRIFT):
+            self.flush()
+            scroll = None
+        if scroll is None:
+            scroll = self.scroll = {'start': event.time, 'last': event.time, 'x': x, 'y': y,
+                                    'total': 0, 'runs': []}
+        append_run(scroll['runs'], quantize_ms(event.time - scroll['last']), wheel_delta(event.delta))
+        scroll['total'] += event.delta
+        scroll['last'] = event.time
+
+    def move(self, event):
+        self.pointer = (event.x, event.y)
+        press = self.press
+        if press is None:
+            return
+        if not press['dragging'] and (abs(event.x - press['x']) > DRAG_THRESHOLD or
+                                      abs(event.y - press['y']) > DRAG_THRESHOLD):
+            press['dragging'] = True
+        if event.time - press['sampled'] >= MOVE_INTERVAL:
+            self.sample(press, event.x, event.y, event.time)
+
+    def sample(self, press, x, y, at):
+        last_x, last_y = press['last']
+        if (x, y) != (last_x, last_y):
+            append_run(press['runs'], quantize_ms(at - press['sampled']), x - last_x, y - last_y)
+            press['last'] = (x, y)
+            press['sampled'] = at
+
+    def button_down(self, event):
+        self.flush()
+        x, y = self.current_pointer()
+        self.press = {'start': event.time, 'sampled': event.time, 'x': x, 'y': y, 'last': (x, y),
+                      'dragging': False, 'runs': []}
+        self.dragged = False
+
+    def button_up(self, event):
+        press, self.press = self.press, None
+        if press is None or not press['dragging']:
+            return
+        self.sample(press, *self.current_pointer(), event.time)
+        end_x, end_y = press['last']
+        self.dragged = True
+        self.emit_gesture({
+            'type': 'drag',
+            **self.stamp(press['start']),
+            'position': {'x': press['x'], 'y': press['y']},
+            'end': {'x': end_x, 'y': end_y},
+            'button': 'left',
+            'duration_ms': quantize_ms(event.time - press['start']),
+            'steps': press['runs'],
+        })
+
+    def take_drag_release(self):
+        """True once after a drag's release, so the click hook can skip it."""
+        dragged, self.dragged = self.dragged, False
+        return dragged
+
+    def flush(self):
+        """Emit the scroll gesture in progress, if any."""
+        scroll, self.scroll = self.scroll, None
+        if scroll is None:
+            return
+        self.emit_gesture({
+            'type': 'scroll',
+            **self.stamp(scroll['start']),
+            'position': {'x': scroll['x'], 'y': scroll['y']},
+            'notches': wheel_delta(scroll['total']),
+            'duration_ms': quantize_ms(scroll['last'] - scroll['start']),
+            'steps': scroll['runs'],
+        })
+
+    def emit_gesture(self, action):
+        self.gestures += 1
+        self.emit(action)
+
+    @staticmethod
+    def stamp(event_time):
+        """ISO and monotonic timestamps of a hook event time (time.time() clock)."""
+        return {'timestamp': datetime.fromtimestamp(event_time).isoformat(),
+                'monotonic': round(time.monotonic() - (time.time() - event_time), 6)}
+
+
+def synthetic_session(notches=2000, seed=1):
+    """Mouse events of a long scroll-back with pauses, pointer jitter and a drag selection."""
+    rng = random.Random(seed)
+    events = []
+    now = time.time()
+    x, y = 600, 400
+    flick = 0
+    for i in range(notches):
+        if flick == 0:
+            # A flick of the wheel: a burst of notches at a steady rate, then a short rest
+            flick = rng.randint(5, 15)
+            now += rng.uniform(0.1, 0.4) + (1.5 if i and rng.random() < 0.01 else 0)
+            x += rng.choice((-1, 0, 1))
+            events.append(MoveEvent(x, y, now))
+        now += 0.016
+        flick -= 1
+        events.append(WheelEvent(1.0, now))
+    events.append(ButtonEvent('down', 'left', now + 0.5))
+    now += 0.5
+    for _ in range(120):
+        now += 0.004
+        x += 2
+        events.append(MoveEvent(x, y, now))
+    events.append(ButtonEvent('up', 'left', now))
+    return events
+
+
+def benchmark(notches=2000):
+    """Coalesce a synthetic session; returns event and action counts, sizes and feed cost."""
+    events = synthetic_session(notches)
+    actions = []
+    coalescer = GestureCoalescer(actions.append)
+    start = time.perf_counter()
+    for event in events:
+        coalescer.feed(event)
+    coalescer.flush()
+    elapsed = time.perf_counter() - start
+    raw_bytes = len(json.dumps([event._asdict() for event in events]))
+    return {'events': len(events), 'actions': len(actions),
+            'scrolls': sum(action['type'] == 'scroll' for action in actions),
+            'drags': sum(action['type'] == 'drag' for action in actions),
+            'raw_bytes': raw_bytes, 'action_bytes': len(json.dumps(actions)),
+            'us_per_event': elapsed / len(events) * 1e6,
+            'notches_kept': sum(delta for _, delta in
+                                (step for action in actions if action['type'] == 'scroll'
+                                 for step in scroll_steps(action)))}
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Coalesce raw mouse events into scroll and drag gestures")
+    parser.add_argument('--notches', type=int, default=2000, help="wheel notches in the synthetic scroll-back")
+    args = parser.parse_args()
+
+    stats = benchmark(args.notches)
+    print(f"🖱️  {stats['events']:,} mouse events -> {stats['actions']} actions "
+          f"({stats['scrolls']} scrolls, {stats['drags']} drags, {stats['notches_kept']:g} notches kept)")
+    print(f"💾 {stats['raw_bytes'] / 1024:.1f} KB of raw events -> {stats['action_bytes'] / 1024:.1f} KB of actions")
+    print(f"⏱️  {stats['us_per_event']:.2f} µs per event")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Recording History Log
+Append-only JSONL history of recording sessions with a small offset index
+"""
+
+import json
+import os
+import struct
+
+DEFAULT_HISTORY_FILE = "recording_history.jsonl"
+LEGACY_HISTORY_FILE = "recording_history.json"
+OFFSET = struct.Struct("<Q")
+
+
+class HistoryLog:
+    """Recording sessions stored one JSON object per line.
+
+    A sidecar .idx file holds the byte offset of every line (8 bytes each),
+    so adding a session is one append to each file and any session, the
+    last one in particular, is read with a single seek.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE, legacy_path=LEGACY_HISTORY_FILE):
+        self.path = path
+        self.index_path = path + ".idx"
+        if legacy_path and not os.path.exists(path) and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+        self._repair_index()
+
+    def _import_legacy(self, legacy_path):
+        """Convert the old recording_history.json list into the log."""
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                sessions = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not import {legacy_path}: {e}")
+            return
+        for session in sessions:
+            self.append(session)
+        print(f"✓ Imported {len(sessions)} sessions from {legacy_path}")
+
+    def _read_offsets(self):
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % OFFSET.size
+        return [offset for (offset,) in OFFSET.iter_unpack(data[:usable])]
+
+    def _repair_index(self):
+        """Bring the index in line with the log after a crash between the two appends."""
+        if not os.path.exists(self.path):
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            return
+
+        size = os.path.getsize(self.path)
+        offsets = self._read_offsets()
+        if offsets and offsets[-1] >= size:
+            offsets = []        # log was truncated or replaced: rebuild from scratch
+
+        with open(self.path, 'rb') as f:
+            start = 0
+            if offsets:
+                f.seek(offsets[-1])
+                if f.readline().endswith(b"\n"):
+                    start = f.tell()
+                    if start == size and os.path.getsize(self.index_path) == len(offsets) * OFFSET.size:
+                        return
+                else:
+                    start = offsets.pop()
+            f.seek(start)
+            new_offsets = []
+            torn_at = None
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    torn_at = offset    # half-written last session
+                    break
+                if line.strip():
+                    new_offsets.append(offset)
+
+        if torn_at is not None:
+            with open(self.path, 'r+b') as f:
+                f.truncate(torn_at)
+        with open(self.index_path, 'wb') as f:
+            f.write(b"".join(OFFSET.pack(offset) for offset in offsets + new_offsets))
+
+    def __len__(self):
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // OFFSET.size
+
+    def append(self, session):
+        """Add a session: one append to the log and one to the index."""
+        line = (json.dumps(session, ensure_ascii=False) + "\n").encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(line)
+        with open(self.index_path, 'ab') as f:
+            f.write(OFFSET.pack(offset))
+
+    def get(self, position):
+        """Return session number position (0 = oldest, negative counts from the end)."""
+        count = len(self)
+        if position < 0:
+            position += count
+        if not 0 <= position < count:
+            raise IndexError("history position out of range")
+        with open(self.index_path, 'rb') as f:
+            f.seek(position * OFFSET.size)
+            (offset,) = OFFSET.unpack(f.read(OFFSET.size))
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def last(self):
+        """Return the most recent session, or None if there is no history."""
+        return self.get(-1) if len(self) else None
+
+    def page(self, page=0, page_size=10):
+        """Return one page of sessions, newest first."""
+        count = len(self)
+        newest = count - 1 - page * page_size
+        oldest = max(newest - page_size + 1, 0)
+        if newest < 0:
+            return []
+
+        with open(self.index_path, 'rb') as f:
+            f.seek(oldest * OFFSET.size)
+            data = f.read((newest - oldest + 1) * OFFSET.size)
+        sessions = []
+        with open(self.path, 'rb') as f:
+            for (offset,) in OFFSET.iter_unpack(data):
+                f.seek(offset)
+                sessions.append(json.loads(f.readline()))
+        sessions.reverse()
+        return sessions
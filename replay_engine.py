@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+WhatsApp Action Replayer
+Runs a recorded_actions_* file (JSON or compact) directly, waiting for each target to be ready instead of sleeping
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from automation_backend import default_backend
+from clipboard_capture import ClipboardCapture
+from compact_recording import load_actions
+from mouse_gestures import drag_path, scroll_steps
+
+MODES = ('original', 'scaled', 'fast')
+READY_TIMEOUT = 10.0
+RETRY_INTERVAL = 0.05
+
+# keyboard-module key names -> pywinauto type_keys codes
+KEY_CODES = {
+    'esc': 'ESC', 'escape': 'ESC', 'enter': 'ENTER', 'tab': 'TAB', 'space': 'SPACE',
+    'backspace': 'BACKSPACE', 'delete': 'DELETE', 'insert': 'INSERT',
+    'home': 'HOME', 'end': 'END', 'page up': 'PGUP', 'page down': 'PGDN',
+    'up': 'UP', 'down': 'DOWN', 'left': 'LEFT', 'right': 'RIGHT',
+    'caps lock': 'CAPSLOCK', 'print screen': 'PRTSC', 'windows': 'LWIN', 'left windows': 'LWIN',
+    'right windows': 'RWIN', 'menu': 'APPS',
+}
+MODIFIER_CODES = {'ctrl': '^', 'alt': '%', 'shift': '+'}
+SPECIAL_CHARS = set('+^%~(){}[]')
+
+
+def key_code(key):
+    """Return the pywinauto type_keys sequence for a keyboard-module key name or combination ('ctrl+f')."""
+    *modifiers, name = key.split('+') if key.strip('+') else [key]
+    if name == '' and modifiers:    # 'ctrl++'
+        modifiers, name = modifiers[:-1], '+'
+    prefix = ''.join(MODIFIER_CODES.get(modifier, '') for modifier in modifiers)
+    code = KEY_CODES.get(name)
+    if code is None:
+        code = name if len(name) == 1 else name.upper().replace(' ', '')
+    return prefix + '{' + code + '}'
+
+
+def escape_keys(text):
+    """Escape text so type_keys types it literally."""
+    escaped = []
+    for char in text:
+        if char in SPECIAL_CHARS:
+            escaped.append('{' + char + '}')
+        elif char == '\n':
+            escaped.append('+{ENTER}')      # Shift+Enter: new line without sending
+        else:
+            escaped.append(char)
+    return ''.join(escaped)
+
+
+def recorded_gap(previous, action):
+    """Seconds between two recorded actions (monotonic clock when both have it)."""
+    if 'monotonic' in previous and 'monotonic' in action:
+        return action['monotonic'] - previous['monotonic']
+    return (datetime.fromisoformat(action['timestamp']) -
+            datetime.fromisoformat(previous['timestamp'])).total_seconds()
+
+
+def connect_to_whatsapp(backend=None):
+    """Connect to WhatsApp Desktop; returns (main window, backend) or (None, None)."""
+    backend = backend or default_backend()
+    try:
+        app = backend.connect(title="WhatsApp")
+        print("✓ Connected to WhatsApp Desktop")
+        return app.WhatsApp, backend
+    except Exception as e:
+        print(f"✗ Could not connect to WhatsApp: {e}")
+        print("Please make sure WhatsApp Desktop is running and logged in.")
+        return None, None
+
+
+class ActionReplayer:
+    """Replays recorded actions against the WhatsApp window.
+
+    Modes:
+      original - keep the gaps between actions as recorded
+      scaled   - recorded gaps divided by speed
+      fast     - no gaps at all; only readiness waits
+    """
+
+    def __init__(self, main_win, backend, mode='fast', speed=1.0, ready_timeout=READY_TIMEOUT, clipboard=None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        if speed <= 0:
+            raise ValueError(f"speed must be greater than 0, got {speed:g}")
+        self.main_win = main_win
+        self.backend = backend
+        self.mode = mode
+        self.speed = speed if mode == 'scaled' else 1.0
+        self.ready_timeout = ready_timeout
+        self.clipboard = clipboard or ClipboardCapture(backend.clipboard)
+        self.steps = []
+
+    def delay_before(self, previous, action):
+        """Seconds to pause before action according to the playback mode."""
+        if self.mode == 'fast' or previous is None:
+            return 0.0
+        try:
+            gap = recorded_gap(previous, action)
+        except (KeyError, ValueError):
+            return 0.0
+        return max(gap, 0.0) / self.speed
+
+    def run(self, actions):
+        """Replay all actions; returns the list of per-step timings."""
+        self.steps = []
+        previous = None
+        for index, action in enumerate(actions):
+            delay = self.delay_before(previous, action)
+            if delay:
+                time.sleep(delay)
+
+            start = time.perf_counter()
+            status, error = 'ok', None
+            try:
+                self.perform(action)
+            except Exception as e:
+                status, error = 'failed', str(e)
+            elapsed = time.perf_counter() - start
+
+            self.steps.append({
+                'index': index + 1,
+                'type': action['type'],
+                'delay_s': delay,
+                'run_s': elapsed,
+                'status': status,
+                'error': error,
+            })
+            mark = "✓" if status == 'ok' else "✗"
+            print(f"{mark} {index + 1:4d}. {action['type']:<16} {elapsed * 1000:8.1f} ms"
+                  f"{'' if error is None else '  ' + error[:60]}")
+            previous = action
+        return self.steps
+
+    def perform(self, action):
+        """Execute a single action."""
+        handler = {
+            'click': self.click,
+            'message': self.type_message,
+            'keypress': self.press_key,
+            'selected_message': self.capture_selected,
+            'scroll': self.scroll,
+            'drag': self.drag,
+        }.get(action['type'])
+        if handler is None:
+            raise ValueError(f"unknown action type {action['type']!r}")
+        handler(action)
+
+    def wait_ready(self, spec):
+        """Wait until an element exists and accepts input, then return its wrapper."""
+        spec.wait('exists visible enabled', timeout=self.ready_timeout, retry_interval=RETRY_INTERVAL)
+        return spec.wrapper_object()
+
+    def click(self, action):
+        """Click the recorded element, or its recorded position if it cannot be found."""
+        info = action.get('element_info')
+        if info and info.get('name'):
+            try:
+                element = self.wait_ready(self.main_win.child_window(
+                    title=info['name'], control_type=info['control_type']))
+                element.click_input()
+                return
+            except Exception:
+                pass    # fall back to the recorded position
+        position = action['position']
+        self.backend.from_point(position['x'], position['y']).click_input()
+
+    def type_message(self, action):
+        """Type a message into the input box once it is ready."""
+        input_box = self.wait_ready(self.main_win.child_window(control_type='Edit'))
+        input_box.click_input()
+        input_box.type_keys(escape_keys(action['text']), with_spaces=True, pause=0)
+
+    def press_key(self, action):
+        """Send a special key once the window is ready."""
+        self.main_win.wait('ready', timeout=self.ready_timeout, retry_interval=RETRY_INTERVAL)
+        self.main_win.type_keys(key_code(action['key']), pause=0)
+
+    def capture_selected(self, action):
+        """Copy the current selection and check it matches the recording."""
+        text = self.clipboard.capture(lambda: self.main_win.type_keys('^c'))
+        if not text or action['text'][:30] not in text:
+            raise RuntimeError("selected text differs from the recording")
+
+    def scroll(self, action):
+        """Turn the wheel over the recorded position; all at once in fast mode, else notch by notch."""
+        self.main_win.wait('ready', timeout=self.ready_timeout, retry_interval=RETRY_INTERVAL)
+        x, y = action['position']['x'], action['position']['y']
+        if self.mode == 'fast':
+            self.backend.mouse_wheel(x, y, action['notches'])
+            return
+        for delay, delta in scroll_steps(action):
+            if delay:
+                time.sleep(delay / self.speed)
+            self.backend.mouse_wheel(x, y, delta)
+
+    def drag(self, action):
+        """Press at the start of the drag, follow its recorded path and release at its end."""
+        self.main_win.wait('ready', timeout=self.ready_timeout, retry_interval=RETRY_INTERVAL)
+        button = action.get('button', 'left')
+        start, end = action['position'], action['end']
+        self.backend.mouse_press(start['x'], start['y'], button)
+        try:
+            for delay, x, y in drag_path(action):
+                if delay and self.mode != 'fast':
+                    time.sleep(delay / self.speed)
+                self.backend.mouse_move(x, y)
+        finally:
+            self.backend.mouse_release(end['x'], end['y'], button)
+
+    def report(self):
+        """Print total time and the slowest steps."""
+        if not self.steps:
+            print("No actions replayed.")
+            return
+        run_total = sum(step['run_s'] for step in self.steps)
+        delay_total = sum(step['delay_s'] for step in self.steps)
+        failed = [step for step in self.steps if step['status'] != 'ok']
+
+        print("\n" + "=" * 50)
+        print("⏱️  REPLAY SUMMARY")
+        print("=" * 50)
+        print(f"Mode: {self.mode}" + (f" (x{self.speed:g})" if self.mode == 'scaled' else ""))
+        print(f"Steps: {len(self.steps)}, failed: {len(failed)}")
+        print(f"Time in actions: {run_total:.2f}s, time in recorded gaps: {delay_total:.2f}s")
+        print("Slowest steps:")
+        for step in sorted(self.steps, key=lambda step: step['run_s'], reverse=True)[:5]:
+            print(f"  {step['index']:4d}. {step['type']:<16} {step['run_s'] * 1000:8.1f} ms")
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Replay a recorded_actions_*.json or *.wrec file")
+    parser.add_argument('actions_file')
+    parser.add_argument('--mode', choices=MODES, default='fast',
+                        help="original timing, timing scaled by --speed, or as fast as possible")
+    parser.add_argument('--speed', type=float, default=2.0, help="speed multiplier for --mode scaled")
+    parser.add_argument('--timeout', type=float, default=READY_TIMEOUT,
+                        help="seconds to wait for each target to become ready")
+    parser.add_argument('--optimize', action='store_true', help="drop redundant actions before replaying")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be greater than 0")
+
+    actions = load_actions(args.actions_file)
+    if args.optimize:
+        from action_optimizer import optimize_actions, print_report
+        recorded = len(actions)
+        actions, removed = optimize_actions(actions)
+        print_report(recorded, removed)
+    main_win, backend = connect_to_whatsapp()
+    if main_win is None:
+        return
+
+    replayer = ActionReplayer(main_win, backend, mode=args.mode, speed=args.speed, ready_timeout=args.timeout)
+    print(f"▶️  Replaying {len(actions)} actions from {args.actions_file}")
+    replayer.run(actions)
+    replayer.report()
+
+
+if __name__ == "__main__":
+    main()
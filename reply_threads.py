@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Reply Thread Builder
+Links every reply to the message it quotes through a per-sender prefix index, then reports reply trees and depth statistics
+"""
+
+import argparse
+import csv
+import random
+import time
+from bisect import bisect_left
+
+from batch_ingest import load_scan_messages
+from scan_dedup import normalize_text
+
+# WhatsApp cuts long quotes and may end them with an ellipsis
+ELLIPSES = ("…", "...")
+
+
+def sender_key(name):
+    """Names are compared case-insensitively, without the '~' of unsaved contacts."""
+    return (name or "").lstrip("~").strip().casefold()
+
+
+def normalize_quote(quoted):
+    """Normalize a quoted tail for prefix matching; returns "" when there is nothing to match."""
+    quote = normalize_text(quoted or "")
+    for ellipsis in ELLIPSES:
+        if quote.endswith(ellipsis):
+            quote = quote[:-len(ellipsis)].rstrip()
+    return quote
+
+
+class SenderPrefixIndex:
+    """Sorted normalized bodies per sender.
+
+    Every body that starts with a quote sorts directly at or after the
+    quote itself, so the candidates for a quote are found with one bisect
+    and a short forward scan, in the quoted sender's messages only.
+    """
+
+    def __init__(self, messages):
+        by_sender = {}
+        for message_id, message in enumerate(messages):
+            body = normalize_text(message['text'] or "")
+            if body:
+                by_sender.setdefault(sender_key(message['sender']), []).append((body, message_id))
+        self.bodies = {}
+        self.ids = {}
+        for sender, entries in by_sender.items():
+            entries.sort()
+            self.bodies[sender] = [body for body, _ in entries]
+            self.ids[sender] = [message_id for _, message_id in entries]
+
+    def candidates(self, sender, quote):
+        """Ids of the sender's messages whose body starts with quote."""
+        bodies = self.bodies.get(sender_key(sender))
+        if not bodies or not quote:
+            return []
+        ids = self.ids[sender_key(sender)]
+        found = []
+        i = bisect_left(bodies, quote)
+        while i < len(bodies) and bodies[i].startswith(quote):
+            found.append(ids[i])
+            i += 1
+        return found
+
+    def find(self, sender, quote, before):
+        """The latest matching message before id `before`, else the earliest one after it, else None."""
+        best = None
+        for message_id in self.candidates(sender, quote):
+            if message_id == before:
+                continue
+            if message_id < before:
+                if best is None or best > before or message_id > best:
+                    best = message_id
+            elif best is None or (best > before and message_id < best):
+                best = message_id
+        return best
+
+
+def link_replies(messages, index=None):
+    """Return (parent, unmatched): parent[i] is the id of the message i replies to, or None."""
+    index = index or SenderPrefixIndex(messages)
+    parent = [None] * len(messages)
+    unmatched = []
+    for message_id, message in enumerate(messages):
+        if not message.get('reply_to'):
+            continue
+        source = index.find(message['reply_to'], normalize_quote(message.get('quoted')), message_id)
+        if source is None:
+            unmatched.append(message_id)
+        else:
+            parent[message_id] = source
+    return parent, unmatched
+
+
+def brute_force_link(messages):
+    """Reference linker: compares every reply with every earlier message (quadratic)."""
+    bodies = [normalize_text(message['text'] or "") for message in messages]
+    parent = [None] * len(messages)
+    for message_id, message in enumerate(messages):
+        if not message.get('reply_to'):
+            continue
+        quote = normalize_quote(message.get('quoted'))
+        sender = sender_key(message['reply_to'])
+        if not quote:
+            continue
+        for source in range(message_id - 1, -1, -1):
+            if sender_key(messages[source]['sender']) == sender and bodies[source].startswith(quote):
+                parent[message_id] = source
+                break
+    return parent
+
+
+def build_threads(parent):
+    """Return (children, depth, roots) for the reply forest given by parent.
+
+    depth is 0 for a message that replies to nothing; roots are the
+    messages that start a thread (have replies but reply to nothing).
+    Chains are followed iteratively, and a cycle (possible only with
+    forward links in shuffled input) is cut where it closes.
+    """
+    children = {}
+    for message_id, source in enumerate(parent):
+        if source is not None:
+            children.setdefault(source, []).append(message_id)
+
+    depth = [None] * len(parent)
+    for message_id in range(len(parent)):
+        chain = []
+        current = message_id
+        on_chain = set()
+        while current is not None and depth[current] is None and current not in on_chain:
+            chain.append(current)
+            on_chain.add(current)
+            current = parent[current]
+        base = depth[current] + 1 if current is not None and depth[current] is not None else 0
+        for offset, node in enumerate(reversed(chain)):
+            depth[node] = base + offset
+
+    roots = [message_id for message_id in children if parent[message_id] is None or depth[message_id] == 0]
+    roots.sort()
+    return children, depth, roots
+
+
+def thread_shape(children, depth, root):
+    """Return (messages, depth) of the thread below root."""
+    size, deepest, stack = 0, 0, [root]
+    while stack:
+        node = stack.pop()
+        size += 1
+        deepest = max(deepest, depth[node] - depth[root])
+        stack.extend(children.get(node, ()))
+    return size, deepest
+
+
+def thread_stats(parent, unmatched, children, depth, roots):
+    """Summary numbers for the report."""
+    replies = sum(source is not None for source in parent) + len(unmatched)
+    shapes = [thread_shape(children, depth, root) for root in roots]
+    sizes = [size for size, _ in shapes]
+    depths = [deepest for _, deepest in shapes]
+    histogram = {}
+    for value in depths:
+        histogram[value] = histogram.get(value, 0) + 1
+    return {
+        'replies': replies,
+        'linked': replies - len(unmatched),
+        'unmatched': len(unmatched),
+        'threads': len(roots),
+        'max_depth': max(depths, default=0),
+        'mean_depth': sum(depths) / len(depths) if depths else 0.0,
+        'largest_thread': max(sizes, default=0),
+        'depth_histogram': dict(sorted(histogram.items())),
+    }
+
+
+def write_edges(path, messages, parent, depth):
+    """Write the reply edges as CSV: one row per linked reply."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('reply_id', 'source_id', 'reply_sender', 'source_sender', 'reply_time', 'source_time',
+                         'depth', 'reply_text', 'source_text'))
+        for message_id, source in enumerate(parent):
+            if source is None:
+                continue
+            reply, original = messages[message_id], messages[source]
+            writer.writerow((message_id, source, reply['sender'], original['sender'], reply['time'],
+                             original['time'], depth[message_id], reply['text'], original['text']))
+
+
+def print_tree(messages, children, root, width=70):
+    """Print one thread, replies indented under the message they quote."""
+    stack = [(root, 0)]
+    while stack:
+        node, level = stack.pop()
+        message = messages[node]
+        text = " ".join((message['text'] or message.get('media') or "").split())
+        print(f"  {'    ' * level}{'↳ ' if level else ''}{message['sender']} · {message['time']}: {text[:width]}")
+        stack.extend((child, level + 1) for child in reversed(children.get(node, ())))
+
+
+def benchmark(count=20_000, reply_rate=0.15, brute_force_limit=5_000):
+    """Time the prefix index against the brute-force linker on a synthetic group chat."""
+    rng = random.Random(3)
+    words = ("see", "you", "at", "the", "retreat", "rehab", "link", "tonight", "dinner", "plan", "thanks",
+             "coming", "later", "photo", "weekend", "tomorrow", "okay", "who", "bring", "snacks")
+    senders = [f"Member {i}" for i in range(60)]
+    messages = []
+    truth = []
+    for message_id in range(count):
+        message = {'sender': rng.choice(senders), 'time': f"{message_id // 60 % 12 + 1}:{message_id % 60:02d} PM",
+                   'text': " ".join(rng.choice(words) for _ in range(rng.randint(4, 16))),
+                   'reply_to': None, 'quoted': None}
+        source = None
+        if messages and rng.random() < reply_rate:
+            source = rng.randrange(message_id)
+            words_kept = messages[source]['text'].split()[:rng.randint(3, 8)]
+            message.update(reply_to=messages[source]['sender'], quoted=" ".join(words_kept) + "…")
+        messages.append(message)
+        truth.append(source)
+
+    start = time.perf_counter()
+    parent, unmatched = link_replies(messages)
+    indexed = time.perf_counter() - start
+    correct = sum(found == expected for found, expected in zip(parent, truth) if expected is not None)
+    replies = sum(expected is not None for expected in truth)
+    print(f"📊 {count:,} messages, {replies:,} replies")
+    print(f"   prefix index: {indexed * 1000:8.1f} ms, {correct}/{replies} linked to the right message")
+
+    sample = messages[:brute_force_limit]
+    start = time.perf_counter()
+    sample_parent, _ = link_replies(sample)
+    sample_indexed = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = brute_force_link(sample)
+    brute = time.perf_counter() - start
+    agree = sample_parent == expected
+    print(f"   first {len(sample):,} messages: prefix index {sample_indexed * 1000:.1f} ms, "
+          f"brute force {brute * 1000:.1f} ms ({'same links' if agree else 'DIFFERENT links'})")
+    return {'messages': count, 'indexed_seconds': indexed, 'brute_force_seconds': brute, 'correct': correct,
+            'replies': replies, 'agree': agree}
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Reconstruct reply threads from WhatsApp scan dumps and chat exports")
+    parser.add_argument('paths', nargs='*', default=["."], help="files, glob patterns or directories")
+    parser.add_argument('--trees', type=int, default=5, help="largest threads to print")
+    parser.add_argument('--edges', help="write the reply edge list to this CSV file")
+    parser.add_argument('--workers', type=int, default=None, help="processes used for parsing")
+    parser.add_argument('--benchmark', nargs='?', type=int, const=20_000, metavar='MESSAGES',
+                        help="time the prefix index against brute force (default 20,000 messages)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+
+    messages, errors = load_scan_messages(args.paths, args.workers)
+    for error in errors:
+        print(f"Warning: Could not parse {error}")
+    if not messages:
+        print("📭 No messages found in scan dumps or chat exports")
+        return
+
+    start = time.perf_counter()
+    parent, unmatched = link_replies(messages)
+    children, depth, roots = build_threads(parent)
+    elapsed = time.perf_counter() - start
+    stats = thread_stats(parent, unmatched, children, depth, roots)
+
+    print(f"🧵 {len(messages)} messages, {stats['replies']} replies: {stats['linked']} linked, "
+          f"{stats['unmatched']} source not found ({elapsed * 1000:.1f} ms)")
+    print(f"   {stats['threads']} threads, largest {stats['largest_thread']} messages, "
+          f"depth max {stats['max_depth']}, mean {stats['mean_depth']:.2f}")
+    print("   Threads by depth: " + ", ".join(f"{d}: {n}" for d, n in stats['depth_histogram'].items()))
+
+    largest = sorted(roots, key=lambda root: -thread_shape(children, depth, root)[0])[:args.trees]
+    for root in largest:
+        print()
+        print_tree(messages, children, root)
+
+    if args.edges:
+        write_edges(args.edges, messages, parent, depth)
+        print(f"\n💾 {stats['linked']} reply edges saved to: {args.edges}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+WhatsApp Scan Dump Deduplicator
+Collapses the repeated fragments of a window scan dump into one canonical message each
+"""
+
+import argparse
+import hashlib
+import json
+import re
+from dataclasses import replace
+
+from scan_parser import parse_scan_file
+
+# Fragments at least this long may match a message they are a prefix of
+PREFIX_LEN = 24
+# Shorter lines of a message body are too generic to index ("We start Monday.")
+MIN_LINE_LEN = 12
+
+# U+200E/U+200F marks and the bidi embedding controls WhatsApp wraps names and times in
+BIDI_RE = re.compile("[\u200e\u200f\u202a-\u202e\u2066-\u2069]")
+
+
+def normalize_text(text):
+    """Normalize message text for comparison: drop bidi marks, collapse whitespace, casefold."""
+    return " ".join(BIDI_RE.sub("", text).split()).casefold()
+
+
+def content_hash(text):
+    """Return an 8-byte digest of already normalized text."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+class FragmentIndex:
+    """Hash index over canonical message bodies.
+
+    Every canonical message is registered under the hash of its full body,
+    of each of its longer lines and of its first PREFIX_LEN characters, so
+    a fragment is matched with a constant number of dict lookups.
+    """
+
+    def __init__(self):
+        self.bodies = []        # normalized body per canonical message
+        self.full = {}
+        self.lines = {}
+        self.prefixes = {}
+
+    def add(self, message_id, text):
+        """Register the body of a canonical message."""
+        norm = normalize_text(text)
+        self.bodies.append(norm)
+        if not norm:
+            return
+        self.full.setdefault(content_hash(norm), message_id)
+        for line in text.splitlines():
+            line = normalize_text(line)
+            if len(line) >= MIN_LINE_LEN and line != norm:
+                self.lines.setdefault(content_hash(line), message_id)
+        if len(norm) >= PREFIX_LEN:
+            self.prefixes.setdefault(content_hash(norm[:PREFIX_LEN]), message_id)
+
+    def match(self, text):
+        """Return the id of the canonical message containing text, or None."""
+        norm = normalize_text(text)
+        if not norm:
+            return None
+        key = content_hash(norm)
+        if key in self.full:
+            return self.full[key]
+        if key in self.lines:
+            return self.lines[key]
+        if len(norm) >= PREFIX_LEN:
+            message_id = self.prefixes.get(content_hash(norm[:PREFIX_LEN]))
+            if message_id is not None and self.bodies[message_id].startswith(norm):
+                return message_id
+        return None
+
+
+def collapse_fragments(records):
+    """Merge scan dump fragments into canonical messages.
+
+    records is an iterable of ScanMessage in dump order. Returns
+    (messages, stats) where messages are the canonical 'message' records
+    with reactions attached, and stats counts what was merged. The input
+    records are not changed; a message that gets reactions is a copy.
+    Runs in linear time: every fragment costs a few hash lookups.
+    """
+    records = list(records)
+    messages = []
+    index = FragmentIndex()
+    by_label = {}
+    resolved = [None] * len(records)   # canonical id for every block, if any
+    stats = {
+        'blocks': len(records),
+        'messages': 0,
+        'duplicate_labels': 0,
+        'fragments_merged': 0,
+        'reactions_attached': 0,
+        'quotes_matched': 0,
+        'orphans': 0,
+    }
+
+    # Pass 1: full aria labels become canonical messages
+    for i, record in enumerate(records):
+        if record.kind != 'message':
+            continue
+        label_key = content_hash("\x1f".join((
+            record.sender or "", record.time or "", record.media or "", normalize_text(record.text),
+        )))
+        message_id = by_label.get(label_key)
+        if message_id is None:
+            message_id = len(messages)
+            by_label[label_key] = message_id
+            messages.append(record)
+            index.add(message_id, record.text)
+        else:
+            stats['duplicate_labels'] += 1
+        resolved[i] = message_id
+
+    # Pass 2: bare bodies, reactions and quoted tails, in dump order
+    last_id = None
+    for i, record in enumerate(records):
+        if record.kind == 'message':
+            last_id = resolved[i]
+            if record.quoted and index.match(record.quoted) is not None:
+                stats['quotes_matched'] += 1
+        elif record.kind == 'reaction':
+            # "You reacted X to ..." names its message; bare reaction rows follow theirs
+            target = index.match(record.quoted) if record.quoted else last_id
+            if target is None:
+                stats['orphans'] += 1
+                continue
+            messages[target] = merge_reaction(messages[target], record)
+            resolved[i] = target
+            stats['reactions_attached'] += 1
+        else:
+            target = index.match(record.text)
+            if target is None:
+                # Chat list rows and link previews break the run of a message's blocks
+                last_id = None
+                stats['orphans'] += 1
+                continue
+            resolved[i] = last_id = target
+            stats['fragments_merged'] += 1
+
+    stats['messages'] = len(messages)
+    stats['merged'] = stats['duplicate_labels'] + stats['fragments_merged'] + stats['reactions_attached']
+    return messages, stats
+
+
+def merge_reaction(message, reaction):
+    """Return a copy of message with a reaction block folded in, keeping the highest reported total.
+
+    The message is one of the caller's records, so it is left unchanged.
+    """
+    emojis = list(message.reactions)
+    for emoji in reaction.reactions:
+        if emoji not in emojis:
+            emojis.append(emoji)
+    total = len(emojis) if reaction.sender == "You" else reaction.reaction_count
+    return replace(message, reactions=tuple(emojis), reaction_count=max(message.reaction_count, total))
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Collapse duplicate blocks in WhatsApp scan dumps")
+    parser.add_argument('files', nargs='+', help="whatsapp_scan_*.txt files")
+    parser.add_argument('--json', action='store_true', help="print canonical messages as JSON lines")
+    args = parser.parse_args()
+
+    for path in args.files:
+        messages, stats = collapse_fragments(parse_scan_file(path))
+        if args.json:
+            for message in messages:
+                print(json.dumps(message.to_dict(), ensure_ascii=False))
+            continue
+        print(f"📄 {path}")
+        print(f"   Blocks: {stats['blocks']} -> canonical messages: {stats['messages']}")
+        print(f"   Merged {stats['merged']} fragments "
+              f"({stats['duplicate_labels']} duplicate labels, {stats['fragments_merged']} bare bodies, "
+              f"{stats['reactions_attached']} reactions)")
+        print(f"   Quoted tails matched: {stats['quotes_matched']}, unmatched blocks: {stats['orphans']}")
+
+
+if __name__ == "__main__":
+    main()
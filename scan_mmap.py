@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Random Access Scan Dump Reader
+Memory-maps a whatsapp_scan_*.txt dump and decodes any block or range of blocks through a cached offset index
+"""
+
+import argparse
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_right
+
+from scan_parser import iter_raw_blocks, parse_body
+from stats import percentile
+
+# A block starts at a "Message N:" line directly followed by the dashed body separator
+BLOCK_START_RE = re.compile(rb"^Message\s+(\d+):\r?\n-{20}\r?$", re.M)
+SCANNED_ON_RE = re.compile(rb"^Scanned on: (.*?)\r?$", re.M)
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"SCANIDX1"
+# magic, dump mtime (ns), dump size, block count, "Scanned on" line count; the arrays
+# that follow it are little-endian too, so an index is valid on any machine
+INDEX_HEADER = struct.Struct("<8sqQQQ")
+
+
+def little_endian_bytes(values):
+    """The items of an array as little-endian bytes."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def little_endian_array(typecode, data):
+    """An array of typecode read from little-endian bytes."""
+    values = array(typecode, data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class ScanDumpIndex:
+    """Offsets of every block of a scan dump, over a read-only memory map.
+
+    The byte offset of each "Message N:" line is kept in an array('Q'),
+    its label number in an array('I') and the offsets of the "Scanned on"
+    header lines in another array('Q'). The arrays are saved next to the
+    dump in a sidecar file that is rebuilt when the dump's mtime or size
+    changes. Decoding a block only touches its own pages of the file.
+    """
+
+    def __init__(self, path, rebuild=False):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.offsets = array('Q')
+        self.numbers = array('I')
+        self.scanned = array('Q')
+        self._by_number = None
+        self.f = open(path, 'rb')
+        stat = os.fstat(self.f.fileno())
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        # mmap cannot map an empty file; an empty dump simply has no blocks
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+        start = time.perf_counter()
+        self.cached = not rebuild and self._load()
+        if not self.cached:
+            self._build()
+            self._save()
+        self.index_seconds = time.perf_counter() - start
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.f.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _build(self):
+        """Scan the mapped dump once for block starts and headers."""
+        self.offsets = array('Q')
+        self.numbers = array('I')
+        for match in BLOCK_START_RE.finditer(self.mm):
+            self.offsets.append(match.start())
+            self.numbers.append(int(match.group(1)))
+        self.scanned = array('Q', (match.start() for match in SCANNED_ON_RE.finditer(self.mm)))
+
+    def _load(self):
+        """Read the sidecar index; False when it is missing, damaged or stale."""
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return False
+        if len(data) < INDEX_HEADER.size:
+            return False
+        magic, mtime_ns, size, blocks, scanned = INDEX_HEADER.unpack_from(data)
+        expected = INDEX_HEADER.size + blocks * (8 + 4) + scanned * 8
+        if magic != INDEX_MAGIC or mtime_ns != self.mtime_ns or size != self.size or len(data) != expected:
+            return False
+        pos = INDEX_HEADER.size
+        self.offsets = little_endian_array('Q', data[pos:pos + blocks * 8])
+        pos += blocks * 8
+        self.numbers = little_endian_array('I', data[pos:pos + blocks * 4])
+        pos += blocks * 4
+        self.scanned = little_endian_array('Q', data[pos:])
+        return True
+
+    def _save(self):
+        """Write the sidecar index, little-endian throughout."""
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, self.mtime_ns, self.size, len(self.offsets), len(self.scanned)))
+                for values in (self.offsets, self.numbers, self.scanned):
+                    f.write(little_endian_bytes(values))
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Warning: Could not save scan index: {e}")
+
+    def scanned_on(self, offset):
+        """The "Scanned on" value of the dump section containing offset, or None."""
+        i = bisect_right(self.scanned, offset) - 1
+        if i < 0:
+            return None
+        match = SCANNED_ON_RE.match(self.mm, self.scanned[i])
+        return match.group(1).decode('utf-8') if match else None
+
+    def blocks(self, start, stop=None):
+        """Decode blocks start..stop-1 (positions in the dump, from 0) as ScanMessage records."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return []
+        begin = self.offsets[start]
+        end = self.offsets[stop] if stop < len(self) else len(self.mm)
+        lines = self.mm[begin:end].decode('utf-8').split("\n")
+        scanned_on = self.scanned_on(begin)
+        if scanned_on is not None:
+            lines.insert(0, f"Scanned on: {scanned_on}")
+        return [parse_body(number, body, scanned) for number, body, scanned in iter_raw_blocks(lines)]
+
+    def block(self, position):
+        """Decode the block at a position in the dump (from 0)."""
+        if not 0 <= position < len(self):
+            raise IndexError(f"block {position} out of range (dump has {len(self)} blocks)")
+        return self.blocks(position, position + 1)[0]
+
+    def find(self, number):
+        """Positions of the blocks labelled "Message <number>:" (one per concatenated dump)."""
+        if self._by_number is None:
+            self._by_number = {}
+            for position, label in enumerate(self.numbers):
+                self._by_number.setdefault(label, []).append(position)
+        return self._by_number.get(number, [])
+
+    def sample(self, count, seed=None):
+        """Decode count blocks picked at random."""
+        rng = random.Random(seed)
+        positions = sorted(rng.sample(range(len(self)), min(count, len(self))))
+        return [self.block(position) for position in positions]
+
+
+def measure_lookups(index, count=1000, seed=1):
+    """Decode count random blocks; returns latency percentiles in milliseconds."""
+    rng = random.Random(seed)
+    timings = []
+    for _ in range(count):
+        position = rng.randrange(len(index))
+        start = time.perf_counter()
+        index.block(position)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {'lookups': count, 'p50_ms': percentile(timings, 0.5), 'p99_ms': percentile(timings, 0.99),
+            'max_ms': timings[-1]}
+
+
+def parse_range(text):
+    """'100:200' -> (99, 200): block numbers 100 to 200 as positions from 0."""
+    first, _, last = text.partition(":")
+    start = int(first) - 1 if first else 0
+    stop = int(last) if last else None
+    return max(start, 0), stop
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Random access to the blocks of a WhatsApp scan dump")
+    parser.add_argument('dump', help="whatsapp_scan_*.txt file")
+    parser.add_argument('--number', type=int, action='append', default=[],
+                        help='decode the block(s) labelled "Message N:" (repeatable)')
+    parser.add_argument('--range', help="decode blocks FIRST:LAST, counted from 1 in dump order")
+    parser.add_argument('--sample', type=int, help="decode this many random blocks")
+    parser.add_argument('--latency', nargs='?', type=int, const=1000, metavar='LOOKUPS',
+                        help="measure the latency of random block lookups (default 1000)")
+    parser.add_argument('--json', action='store_true', help="print the decoded blocks as JSON")
+    parser.add_argument('--rebuild', action='store_true', help="ignore the cached index")
+    args = parser.parse_args()
+
+    try:
+        index = ScanDumpIndex(args.dump, rebuild=args.rebuild)
+    except OSError as e:
+        print(f"❌ Could not open {args.dump}: {e}")
+        return
+
+    try:
+        how = "loaded from" if index.cached else "built and saved to"
+        print(f"📇 {len(index):,} blocks in {index.size / (1024 * 1024):.1f} MB; index {how} "
+              f"{index.index_path} in {index.index_seconds * 1000:.1f} ms")
+
+        wanted = []
+        start = time.perf_counter()
+        for number in args.number:
+            positions = index.find(number)
+            if not positions:
+                print(f"❌ No block labelled Message {number}")
+            wanted.extend(index.block(position) for position in positions)
+        if args.range:
+            wanted.extend(index.blocks(*parse_range(args.range)))
+        if args.sample:
+            wanted.extend(index.sample(args.sample))
+        elapsed = time.perf_counter() - start
+
+        for message in wanted:
+            if args.json:
+                print(json.dumps(message.to_dict(), ensure_ascii=False))
+            else:
+                who = f"{message.sender} · {message.time}: " if message.kind == 'message' else f"[{message.kind}] "
+                print(f"Message {message.number:>5}  {who}{' '.join((message.text or message.media or '').split())[:100]}")
+        if wanted:
+            print(f"⏱️  Decoded {len(wanted)} blocks in {elapsed * 1000:.2f} ms")
+
+        if args.latency and len(index):
+            stats = measure_lookups(index, args.latency)
+            print(f"⏱️  {stats['lookups']} random lookups: p50 {stats['p50_ms']:.3f} ms, "
+                  f"p99 {stats['p99_ms']:.3f} ms, max {stats['max_ms']:.3f} ms")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
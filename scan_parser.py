@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+WhatsApp Scan Dump Parser
+Streams "Message N:" blocks out of whatsapp_scan_*.txt window dumps as typed records
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+
+DUMP_TITLE = "WhatsApp Window Text Scan"
+BLOCK_SEPARATOR = "=" * 50
+BODY_SEPARATOR = "-" * 20
+LRM = "\u200e"
+
+MESSAGE_RE = re.compile(r"^Message\s+(\d+):$")
+SCANNED_ON_RE = re.compile(r"^Scanned on: (.+)$")
+
+# Times are wrapped in U+200E marks: "\u200e12\u200e:\u200e58\u200e \u200ePM"
+TIME_PATTERN = r"\u200e?(?P<hour>\d{1,2})\u200e?:\u200e?(?P<minute>\d{2})\u200e?\s\u200e?(?P<ampm>[AP]M)"
+LABEL_RE = re.compile(
+    r"^(?P<sender>[^\n:]+?)"
+    r"(?:, replying to (?P<reply_to>[^\n:]+?))?"
+    r": (?P<text>.*?),? " + TIME_PATTERN +
+    r"(?:, quoted message: (?P<quoted>.*))?\Z",
+    re.S,
+)
+PHONE_RE = re.compile(r"^(?P<name>.*?)\s*(?P<phone>\+\d[\d ()\-]{6,}\d)$")
+REACTION_RE = re.compile(r"^Reaction (?P<emojis>.+), (?P<count>\d+) in total$")
+YOU_REACTED_RE = re.compile(r'^(?:.*? )?You reacted (?P<emoji>\S+) to "(?P<quoted>.*)"$', re.S)
+
+# Media placeholders WhatsApp puts in front of the message text
+MEDIA_MARKERS = ("Image",)
+
+
+@dataclass(slots=True)
+class ScanMessage:
+    """One parsed block of a window scan dump."""
+    number: int
+    kind: str                      # 'message', 'reaction' or 'text'
+    text: str
+    sender: str = None
+    phone: str = None
+    reply_to: str = None
+    reply_to_phone: str = None
+    time: str = None
+    quoted: str = None
+    media: str = None
+    reactions: tuple = field(default_factory=tuple)
+    reaction_count: int = 0
+    scanned_on: str = None
+
+    def to_dict(self):
+        """Return the record as a plain dict (for JSON output)."""
+        data = asdict(self)
+        data['reactions'] = list(self.reactions)
+        return data
+
+
+def split_contact(contact):
+    """Split '~Arya +1 (647) 331-8805' into ('Arya', '+1 (647) 331-8805')."""
+    contact = contact.strip()
+    match = PHONE_RE.match(contact)
+    if match:
+        name, phone = match.group('name'), match.group('phone')
+    else:
+        name, phone = contact, None
+    name = name.lstrip('~').strip()
+    return (name or phone), phone
+
+
+def parse_body(number, body, scanned_on=None):
+    """Parse the body of a single block into a ScanMessage."""
+    match = LABEL_RE.match(body) if ": " in body else None
+    if match:
+        sender, phone = split_contact(match.group('sender'))
+        reply_to = reply_to_phone = None
+        if match.group('reply_to'):
+            reply_to, reply_to_phone = split_contact(match.group('reply_to'))
+
+        text = match.group('text')
+        media = None
+        for marker in MEDIA_MARKERS:
+            if text == marker:
+                media, text = marker, ""
+                break
+            if text.startswith(marker + ", "):
+                media, text = marker, text[len(marker) + 2:]
+                break
+
+        return ScanMessage(
+            number=number,
+            kind='message',
+            text=text,
+            sender=sender,
+            phone=phone,
+            reply_to=reply_to,
+            reply_to_phone=reply_to_phone,
+            time=f"{int(match.group('hour'))}:{match.group('minute')} {match.group('ampm')}",
+            quoted=match.group('quoted'),
+            media=media,
+            scanned_on=scanned_on,
+        )
+
+    match = REACTION_RE.match(body) if body.startswith("Reaction ") else None
+    if match:
+        return ScanMessage(
+            number=number,
+            kind='reaction',
+            text="",
+            reactions=tuple(match.group('emojis').split(", ")),
+            reaction_count=int(match.group('count')),
+            scanned_on=scanned_on,
+        )
+
+    match = YOU_REACTED_RE.match(body) if "You reacted " in body else None
+    if match:
+        return ScanMessage(
+            number=number,
+            kind='reaction',
+            text="",
+            sender="You",
+            quoted=match.group('quoted'),
+            reactions=(match.group('emoji'),),
+            reaction_count=1,
+            scanned_on=scanned_on,
+        )
+
+    return ScanMessage(number=number, kind='text', text=body, scanned_on=scanned_on)
+
+
+def iter_raw_blocks(lines):
+    """Yield (number, body, scanned_on) for every block in an iterable of lines.
+
+    Works line by line, so only the block currently being read is held in
+    memory. Several dumps concatenated into one stream are handled: each new
+    "WhatsApp Window Text Scan" header just updates scanned_on.
+    """
+    scanned_on = None
+    number = None
+    body = []
+    dashes_read = False
+    pending = None      # a "Message N:" line seen inside a body, waiting for its dashes
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+
+        if number is None:
+            match = MESSAGE_RE.match(line)
+            if match:
+                number, body, dashes_read = int(match.group(1)), [], False
+                continue
+            match = SCANNED_ON_RE.match(line)
+            if match:
+                scanned_on = match.group(1)
+            continue
+
+        if pending is not None:
+            if line == BODY_SEPARATOR:
+                # The previous block was cut off before its separator
+                yield number, finish_body(body), scanned_on
+                number, body, dashes_read = int(MESSAGE_RE.match(pending).group(1)), [], True
+                pending = None
+                continue
+            body.append(pending)
+            pending = None
+
+        if line == BLOCK_SEPARATOR:
+            yield number, finish_body(body), scanned_on
+            number, body = None, []
+        elif not dashes_read and not body and line == BODY_SEPARATOR:
+            dashes_read = True
+        elif line.startswith("Message ") and MESSAGE_RE.match(line):
+            pending = line
+        else:
+            body.append(line)
+
+    if number is not None:
+        if pending is not None:
+            body.append(pending)
+        yield number, finish_body(body), scanned_on
+
+
+def finish_body(body):
+    """Join the collected body lines, dropping the trailing blank lines."""
+    while body and body[-1] == "":
+        body.pop()
+    return "\n".join(body)
+
+
+def iter_scan_messages(lines):
+    """Yield a ScanMessage for every block in an iterable of lines."""
+    for number, body, scanned_on in iter_raw_blocks(lines):
+        yield parse_body(number, body, scanned_on)
+
+
+def parse_scan_file(path):
+    """Stream ScanMessage records from a scan dump on disk."""
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from iter_scan_messages(f)
+
+
+def write_scan_header(f, total, scanned_on=None):
+    """Write the dump header used by the window scanner."""
+    f.write(DUMP_TITLE + "\n")
+    f.write("=" * 30 + "\n")
+    f.write(f"Scanned on: {scanned_on or time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+    f.write(f"Total potential messages: {total}\n")
+    f.write("=" * 30 + "\n\n")
+
+
+def write_scan_block(f, number, body):
+    """Write a single "Message N:" block in the scan dump layout."""
+    f.write(f"Message {number:3d}:\n")
+    f.write(BODY_SEPARATOR + "\n")
+    f.write(body + "\n\n")
+    f.write(BLOCK_SEPARATOR + "\n\n")
+
+
+def benchmark(target_blocks=1_000_000, sample_path=None):
+    """Measure parser throughput on the bundled sample scaled up to target_blocks."""
+    if sample_path is None:
+        sample_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   "whatsapp_scan_20251106_234155.txt")
+    with open(sample_path, 'r', encoding='utf-8') as f:
+        sample = [body for _, body, _ in iter_raw_blocks(f)]
+    if not sample:
+        print(f"❌ No blocks found in {sample_path}")
+        return None
+
+    fd, bench_path = tempfile.mkstemp(prefix="scan_bench_", suffix=".txt")
+    try:
+        print(f"🛠️  Building {target_blocks:,} blocks from {len(sample)} sample blocks...")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            write_scan_header(f, target_blocks)
+            for i in range(target_blocks):
+                write_scan_block(f, i + 1, sample[i % len(sample)])
+        size = os.path.getsize(bench_path)
+
+        start_rss = peak_rss_kb()
+        start = time.perf_counter()
+        counts = {}
+        for message in parse_scan_file(bench_path):
+            counts[message.kind] = counts.get(message.kind, 0) + 1
+        elapsed = time.perf_counter() - start
+        end_rss = peak_rss_kb()
+
+        total = sum(counts.values())
+        results = {
+            'blocks': total,
+            'bytes': size,
+            'seconds': elapsed,
+            'blocks_per_second': total / elapsed if elapsed else 0.0,
+            'mb_per_second': size / (1024 * 1024) / elapsed if elapsed else 0.0,
+            'kinds': counts,
+            'peak_rss_growth_kb': (end_rss - start_rss) if start_rss is not None else None,
+        }
+
+        print(f"📊 Parsed {total:,} blocks ({size / (1024 * 1024):.1f} MB) in {elapsed:.2f}s")
+        print(f"   {results['blocks_per_second']:,.0f} blocks/s, {results['mb_per_second']:.1f} MB/s")
+        print(f"   Kinds: {counts}")
+        if results['peak_rss_growth_kb'] is not None:
+            print(f"   Peak RSS growth while parsing: {results['peak_rss_growth_kb']:,} KB")
+        return results
+    finally:
+        os.remove(bench_path)
+
+
+def peak_rss_kb():
+    """Return the peak resident set size in KB, or None where unavailable (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Parse WhatsApp window scan dumps")
+    parser.add_argument('files', nargs='*', help="whatsapp_scan_*.txt files to parse")
+    parser.add_argument('--json', action='store_true', help="print one JSON record per block")
+    parser.add_argument('--benchmark', nargs='?', type=int, const=1_000_000, metavar='BLOCKS',
+                        help="run the throughput benchmark (default 1,000,000 blocks)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+
+    if not args.files:
+        parser.print_help()
+        return
+
+    for path in args.files:
+        counts = {}
+        for message in parse_scan_file(path):
+            counts[message.kind] = counts.get(message.kind, 0) + 1
+            if args.json:
+                print(json.dumps(message.to_dict(), ensure_ascii=False))
+        if not args.json:
+            print(f"📄 {path}: {sum(counts.values())} blocks {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Message Search Index
+SQLite FTS5 full-text index over every scan, export and capture file, updated incrementally
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from batch_ingest import find_files, ingest, message_key
+
+DEFAULT_INDEX_FILE = "message_search.db"
+# Fewer changed files than this are parsed inline instead of on a process pool
+PARALLEL_THRESHOLD = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    messages INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    position INTEGER,
+    source TEXT,
+    timestamp TEXT,
+    sender TEXT,
+    time TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_file ON messages(file);
+CREATE INDEX IF NOT EXISTS messages_sender ON messages(sender COLLATE NOCASE);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    text, sender, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, text, sender) VALUES (new.id, new.text, new.sender);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, text, sender) VALUES ('delete', old.id, old.text, old.sender);
+END;
+"""
+
+
+def phrase_query(text):
+    """Quote text as a single FTS5 phrase."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    """Full-text index of messages, one row per message per file.
+
+    Every indexed file is remembered with its mtime and size; update()
+    re-parses only files that are new or changed and drops the rows of
+    files that are gone, so refreshing after a new export is cheap.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        try:
+            self.db.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            self.db.close()
+            raise RuntimeError(f"SQLite here has no FTS5 support ({e}); a newer Python/SQLite is needed") from e
+
+    def close(self):
+        self.db.close()
+
+    def update(self, paths, workers=None):
+        """Index new and changed files below paths; returns counts of what changed."""
+        start = time.perf_counter()
+        indexed = {path: (mtime, size) for path, mtime, size in self.db.execute("SELECT path, mtime, size FROM files")}
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'messages': 0}
+
+        changed = {}
+        for path in find_files(paths):
+            path = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if indexed.get(path) == (stat.st_mtime, stat.st_size):
+                stats['unchanged'] += 1
+            else:
+                changed[path] = stat
+        gone = [path for path in indexed if path not in changed and not os.path.exists(path)]
+
+        records = []
+        if changed:
+            workers = 1 if len(changed) < PARALLEL_THRESHOLD else workers
+            records, errors, _ = ingest(sorted(changed), workers)
+            for error in errors:
+                print(f"Warning: Could not index {error}")
+
+        by_file = {path: [] for path in changed}
+        for item in records:
+            by_file[item['file']].append(item)
+
+        with self.db:
+            for path in gone:
+                self.db.execute("DELETE FROM messages WHERE file = ?", (path,))
+                self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+                stats['removed'] += 1
+            for path, items in by_file.items():
+                if path in indexed:
+                    self.db.execute("DELETE FROM messages WHERE file = ?", (path,))
+                    stats['updated'] += 1
+                else:
+                    stats['added'] += 1
+                self.db.executemany(
+                    "INSERT INTO messages (file, position, source, timestamp, sender, time, text) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(path, item['position'], item['source'], item['timestamp'], item['sender'],
+                      item['time'], item['text']) for item in items])
+                self.db.execute("INSERT OR REPLACE INTO files (path, mtime, size, messages) VALUES (?, ?, ?, ?)",
+                                (path, changed[path].st_mtime, changed[path].st_size, len(items)))
+                stats['messages'] += len(items)
+        stats['seconds'] = time.perf_counter() - start
+        return stats
+
+    def search(self, query, sender=None, phrase=False, limit=20):
+        """Return (matches, milliseconds); each match is listed once, best ranked copy first."""
+        start = time.perf_counter()
+        sql = ("SELECT m.sender, m.time, m.timestamp, m.source, m.file, m.text, "
+               "snippet(messages_fts, 0, '[', ']', '…', 12) "
+               "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+               "WHERE messages_fts MATCH ?")
+        params = [phrase_query(query) if phrase else query]
+        if sender:
+            sql += " AND m.sender = ? COLLATE NOCASE"
+            params.append(sender)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit * 4)    # room for copies of the same message in other files
+
+        matches = []
+        seen = set()
+        for row in self.db.execute(sql, params):
+            match = dict(zip(('sender', 'time', 'timestamp', 'source', 'file', 'text', 'snippet'), row))
+            key = message_key(match)
+            if key in seen:
+                continue
+            seen.add(key)
+            matches.append(match)
+            if len(matches) == limit:
+                break
+        return matches, (time.perf_counter() - start) * 1000
+
+    def stats(self):
+        """Return the number of indexed files and messages."""
+        files, messages = self.db.execute("SELECT COUNT(*), COALESCE(SUM(messages), 0) FROM files").fetchone()
+        return {'files': files, 'messages': messages}
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Full-text search over exported and captured WhatsApp messages")
+    parser.add_argument('--index', default=DEFAULT_INDEX_FILE, help="index database file")
+    sub = parser.add_subparsers(dest='command')
+    update_parser = sub.add_parser('update', help="index new and changed files")
+    update_parser.add_argument('paths', nargs='*', default=["."], help="files, glob patterns or directories")
+    search_parser = sub.add_parser('search', help="search the index")
+    search_parser.add_argument('query', help="FTS5 query, e.g. rehab OR retreat, \"good girl\", rehab*")
+    search_parser.add_argument('--phrase', action='store_true', help="match the query as one exact phrase")
+    search_parser.add_argument('--sender', help="only messages from this sender")
+    search_parser.add_argument('--limit', type=int, default=20)
+    sub.add_parser('stats', help="show what is indexed")
+    args = parser.parse_args()
+
+    if args.command is None:
+        parser.print_help()
+        return
+    try:
+        index = SearchIndex(args.index)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+
+    try:
+        if args.command == 'update':
+            stats = index.update(args.paths)
+            print(f"✓ Index updated in {stats['seconds']:.2f}s: {stats['added']} new, {stats['updated']} changed, "
+                  f"{stats['removed']} removed, {stats['unchanged']} unchanged files "
+                  f"({stats['messages']} messages indexed)")
+        elif args.command == 'search':
+            try:
+                matches, elapsed_ms = index.search(args.query, args.sender, args.phrase, args.limit)
+            except sqlite3.OperationalError as e:
+                print(f"❌ Invalid query: {e}")
+                return
+            print(f"🔎 {len(matches)} matches in {elapsed_ms:.1f} ms")
+            for match in matches:
+                who = match['sender'] or "(unknown sender)"
+                when = match['time'] or (match['timestamp'] or "")[:16]
+                print(f"\n  {who} · {when} · {os.path.basename(match['file'])}")
+                print(f"    {' '.join(match['snippet'].split())}")
+        elif args.command == 'stats':
+            stats = index.stats()
+            print(f"📚 {stats['files']} files, {stats['messages']} messages indexed in {index.path}")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Persistent Seen-Message Index
+Remembers which messages were already captured, across sessions, by normalized-text hash
+"""
+
+import os
+
+from scan_dedup import content_hash, normalize_text
+
+DEFAULT_INDEX_FILE = "seen_messages.idx"
+DEFAULT_MAX_ENTRIES = 100_000
+DIGEST_SIZE = 8
+
+
+class SeenIndex:
+    """Set of message hashes with O(1) membership, persisted as an append-only file.
+
+    Each new message costs one 8-byte append. When the index grows past
+    max_entries the oldest hashes are dropped and the file is rewritten,
+    so it never exceeds max_entries * 8 bytes on disk.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_FILE, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._hashes = {}       # insertion ordered, oldest first
+        self._load()
+
+    def _load(self):
+        """Read the hashes saved by earlier sessions."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Warning: Could not load seen-message index: {e}")
+            return
+
+        usable = len(data) - len(data) % DIGEST_SIZE    # ignore a torn final write
+        for offset in range(0, usable, DIGEST_SIZE):
+            self._hashes[data[offset:offset + DIGEST_SIZE]] = None
+
+        if usable != len(data) or len(self._hashes) * DIGEST_SIZE != usable or len(self._hashes) > self.max_entries:
+            self._compact()
+
+    def _compact(self):
+        """Drop the oldest hashes beyond the limit and rewrite the file."""
+        keep = self.max_entries * 9 // 10 if len(self._hashes) > self.max_entries else len(self._hashes)
+        if len(self._hashes) > keep:
+            hashes = list(self._hashes)[-keep:] if keep else []
+            self._hashes = dict.fromkeys(hashes)
+
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(b"".join(self._hashes))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not rewrite seen-message index: {e}")
+
+    @staticmethod
+    def key(text):
+        """Return the index key for a message text."""
+        return content_hash(normalize_text(text))
+
+    def __contains__(self, text):
+        return self.key(text) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, text):
+        """Remember a message. Returns False if it was already known."""
+        digest = self.key(text)
+        if digest in self._hashes:
+            return False
+        self._hashes[digest] = None
+
+        if len(self._hashes) > self.max_entries:
+            self._compact()
+            return True
+        try:
+            with open(self.path, 'ab') as f:
+                f.write(digest)
+        except OSError as e:
+            print(f"Warning: Could not update seen-message index: {e}")
+        return True
@@ -0,0 +1,842 @@
+#!/usr/bin/env python3
+"""
+Simulated WhatsApp Desktop
+An in-memory WhatsApp window, clipboard and input hooks for running and benchmarking the tools headlessly
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from automation_backend import AutomationBackend
+from clipboard_capture import FakeClipboard
+
+WINDOW_RECT = (0, 0, 1200, 800)
+DESKTOP_RECT = (0, 0, 1920, 1080)
+CHAT_ROW_HEIGHT = 70
+MESSAGE_ROW_HEIGHT = 60
+VISIBLE_MESSAGES = 10
+SCROLL_ROWS = 2             # message rows moved per wheel notch
+COPY_DELAY = 0.005          # time for WhatsApp to write the clipboard after Ctrl+C
+LRM = "\u200e"
+
+SENDERS = [
+    ('Arya', '+1 (647) 331-8805'),
+    ('Mina', '+44 7700 900123'),
+    ('Jonas', '+49 151 2345678'),
+    ('Priya', '+91 98765 43210'),
+    ('Leo', '+1 (415) 555-0134'),
+    ('Sofia', '+34 612 345 678'),
+]
+CHAT_NAMES = ['Family', 'Book Club', 'Project Team', 'Running Group', 'Neighbours',
+              'Old Friends', 'Work', 'Weekend Trip', 'Choir', 'Landlord']
+WORDS = ("hey sure tomorrow meeting link thanks great plan call later photo weekend see you soon "
+         "okay done running late dinner tonight who is coming bring snacks check the doc agenda").split()
+
+MODIFIERS = {'ctrl', 'shift', 'alt', 'windows'}
+
+# Events shaped like the ones the keyboard and mouse modules pass to their hooks
+KeyboardEvent = namedtuple('KeyboardEvent', 'event_type name scan_code time')
+ButtonEvent = namedtuple('ButtonEvent', 'event_type button time')
+WheelEvent = namedtuple('WheelEvent', 'delta time')
+MoveEvent = namedtuple('MoveEvent', 'x y time')
+
+
+class ElementNotFoundError(LookupError):
+    """No element matches a window specification."""
+
+
+class SimRect(namedtuple('SimRect', 'left top right bottom')):
+    """Bounding rectangle with the helpers of pywinauto's RECT."""
+
+    def width(self):
+        return self.right - self.left
+
+    def height(self):
+        return self.bottom - self.top
+
+    def mid_point(self):
+        return (self.left + self.right) // 2, (self.top + self.bottom) // 2
+
+    def contains(self, x, y):
+        return self.left <= x < self.right and self.top <= y < self.bottom
+
+    def moved(self, dx, dy):
+        return SimRect(self.left + dx, self.top + dy, self.right + dx, self.bottom + dy)
+
+
+def format_time(minutes):
+    """Format minutes after midnight the way WhatsApp labels do, U+200E marks included."""
+    hour, minute = divmod(minutes % (24 * 60), 60)
+    ampm = 'AM' if hour < 12 else 'PM'
+    hour = hour % 12 or 12
+    return f"{LRM}{hour}{LRM}:{LRM}{minute:02d}{LRM} {LRM}{ampm}"
+
+
+def message_label(message):
+    """Build the accessible name WhatsApp gives a message row."""
+    if message['phone']:
+        head = f"~{message['sender']} {message['phone']}"
+    else:
+        head = message['sender']
+    if message.get('reply_to'):
+        head += f", replying to ~{message['reply_to']} {message['reply_to_phone']}"
+    label = f"{head}: {message['text']}, {format_time(message['minutes'])}"
+    if message.get('quoted'):
+        label += f", quoted message: {message['quoted']}"
+    return label
+
+
+def generate_conversation(rng, count, start_minutes=9 * 60):
+    """Generate count message dicts, some of them replies to earlier ones."""
+    messages = []
+    minutes = start_minutes
+    for _ in range(count):
+        sender, phone = rng.choice(SENDERS)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 14))).capitalize()
+        minutes += rng.randint(0, 7)
+        message = {'sender': sender, 'phone': phone, 'text': text, 'minutes': minutes,
+                   'reply_to': None, 'reply_to_phone': None, 'quoted': None}
+        if messages and rng.random() < 0.1:
+            source = rng.choice(messages[-20:])
+            message.update(reply_to=source['sender'], reply_to_phone=source['phone'], quoted=source['text'])
+        message['label'] = message_label(message)
+        messages.append(message)
+    return messages
+
+
+def parse_keys(keys, with_spaces=False):
+    """Split a pywinauto type_keys string into (modifiers, key) pairs.
+
+    key is a single character for text and an upper-case name such as
+    'ENTER' or 'PGUP' for special keys; modifiers is a string of + ^ %.
+    """
+    tokens = []
+    modifiers = ""
+    i = 0
+    while i < len(keys):
+        char = keys[i]
+        if char in "+^%":
+            modifiers += char
+            i += 1
+            continue
+        if char == "{":
+            end = keys.find("}", i + 2)     # "{}}" is a literal brace
+            if end == -1:
+                raise ValueError(f"unbalanced braces in {keys!r}")
+            body = keys[i + 1:end]
+            if len(body) == 1:
+                tokens.append((modifiers, body))
+            else:
+                name, _, repeat = body.partition(" ")
+                key = name if len(name) == 1 else name.upper()
+                tokens.extend([(modifiers, key)] * int(repeat or 1))
+            i = end + 1
+        else:
+            if char == "~":
+                tokens.append((modifiers, 'ENTER'))
+            elif char != " " or with_spaces:
+                tokens.append((modifiers, char))
+            i += 1
+        modifiers = ""
+    return tokens
+
+
+class SimElementInfo:
+    """element_info of a simulated element; every property read is one UIA round trip."""
+
+    def __init__(self, element):
+        self._element = element
+
+    def _read(self, attribute):
+        self._element.backend.uia_call()
+        return getattr(self._element, attribute)
+
+    control_type = property(lambda self: self._read('control_type'))
+    name = property(lambda self: self._read('name'))
+    automation_id = property(lambda self: self._read('automation_id'))
+    class_name = property(lambda self: self._read('class_name'))
+    rectangle = property(lambda self: self._read('rect'))
+    handle = property(lambda self: self._read('handle'))
+
+
+class SimElement:
+    """A node of the simulated UI tree with the wrapper methods the tools use."""
+
+    def __init__(self, backend, control_type, name="", automation_id="", class_name="",
+                 rect=(0, 0, 0, 0), handle=0):
+        self.backend = backend
+        self.control_type = control_type
+        self.name = name
+        self.automation_id = automation_id
+        self.class_name = class_name
+        self.rect = SimRect(*rect)
+        self.handle = handle
+        self.parent = None
+        self.visible = True
+        self.enabled = True
+        self.items = []
+
+    def add(self, child):
+        child.parent = self
+        self.items.append(child)
+        return child
+
+    @property
+    def element_info(self):
+        return SimElementInfo(self)
+
+    def matches(self, criteria):
+        for key, value in criteria.items():
+            if key in ('title', 'name'):
+                actual = self.name
+            elif key == 'control_type':
+                actual = self.control_type
+            elif key in ('auto_id', 'automation_id'):
+                actual = self.automation_id
+            elif key == 'class_name':
+                actual = self.class_name
+            elif key == 'visible_only':
+                continue
+            else:
+                raise ValueError(f"unsupported search criterion {key!r}")
+            if actual != value:
+                return False
+        return True
+
+    def walk(self):
+        """Yield the visible elements below this one, depth first."""
+        for child in self.items:
+            if child.visible:
+                yield child
+                yield from child.walk()
+
+    def children(self, **criteria):
+        self.backend.uia_call()
+        return [child for child in self.items if child.visible and child.matches(criteria)]
+
+    def descendants(self, **criteria):
+        self.backend.uia_call()
+        return [element for element in self.walk() if element.matches(criteria)]
+
+    def child_window(self, **criteria):
+        return SimSpec(self, criteria)
+
+    def wrapper_object(self):
+        return self
+
+    def exists(self, timeout=None, retry_interval=None):
+        return True
+
+    def wait(self, wait_for=None, timeout=None, retry_interval=None):
+        return self
+
+    def window_text(self):
+        self.backend.uia_call()
+        return self.name
+
+    def rectangle(self):
+        self.backend.uia_call()
+        return self.rect
+
+    def is_visible(self):
+        return self.visible
+
+    def is_enabled(self):
+        return self.enabled
+
+    def set_focus(self):
+        self.backend.uia_call()
+        self.backend.focus = self
+        return self
+
+    def click_input(self, button='left', double=False, **kwargs):
+        self.backend.uia_call()
+        self.backend.activate(self)
+
+    def type_keys(self, keys, pause=None, with_spaces=False, **kwargs):
+        self.backend.uia_call()
+        if self.control_type == 'Edit':
+            self.backend.focus = self
+        self.backend.send_keys(keys, with_spaces)
+        return self
+
+    def scroll(self, direction, amount, count=1, retry_interval=None):
+        self.backend.uia_call()
+        self.backend.scroll_messages(direction, amount, count)
+
+    def print_control_identifiers(self, depth=None):
+        print("Control Identifiers:\n")
+        self._print_tree(0, depth)
+
+    def _print_tree(self, level, depth):
+        indent = "   | " * level
+        rect = self.rect
+        print(f"{indent}{self.control_type} - {self.name[:60]!r}    "
+              f"(L{rect.left}, T{rect.top}, R{rect.right}, B{rect.bottom})")
+        print(f'{indent}child_window(title={self.name[:60]!r}, auto_id="{self.automation_id}", '
+              f'control_type="{self.control_type}")')
+        if depth is None or level + 1 < depth:
+            for child in self.items:
+                if child.visible:
+                    child._print_tree(level + 1, depth)
+
+    def __repr__(self):
+        return f"<SimElement {self.control_type} {self.name[:30]!r}>"
+
+
+class SimSpec:
+    """Lazy element lookup like pywinauto's WindowSpecification."""
+
+    def __init__(self, parent, criteria):
+        self.parent = parent
+        self.criteria = criteria
+
+    def resolve(self):
+        parent = self.parent.resolve() if isinstance(self.parent, SimSpec) else self.parent
+        parent.backend.uia_call()
+        for element in parent.walk():
+            if element.matches(self.criteria):
+                return element
+        raise ElementNotFoundError(f"no element matches {self.criteria}")
+
+    def wrapper_object(self):
+        return self.resolve()
+
+    def child_window(self, **criteria):
+        return SimSpec(self, criteria)
+
+    def exists(self, timeout=0, retry_interval=0.05):
+        try:
+            self.wait('exists', timeout, retry_interval)
+            return True
+        except TimeoutError:
+            return False
+
+    def wait(self, wait_for='exists', timeout=5.0, retry_interval=0.05):
+        """Poll until the element exists (and is visible/enabled when asked)."""
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            try:
+                element = self.resolve()
+                if ('visible' not in wait_for or element.visible) and ('enabled' not in wait_for or element.enabled):
+                    return element
+            except ElementNotFoundError:
+                pass
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"timed out waiting for {self.criteria} to be {wait_for}")
+            time.sleep(retry_interval)
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+
+class SimApplication:
+    """What connect() returns: app.WhatsApp is the main window specification."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def window(self, **criteria):
+        return SimSpec(self.backend.desktop, criteria)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self.window(title=name)
+
+
+class SimulatedWhatsApp(AutomationBackend):
+    """WhatsApp Desktop in memory: chat list, virtualized message list, input box and clipboard.
+
+    Only visible_messages message rows exist at a time; scrolling re-binds
+    the same ListItem objects to other messages, as the real list does.
+    Every UIA operation sleeps uia_latency seconds, Ctrl+C writes the
+    clipboard after copy_delay seconds, and user_click/user_press/
+    user_type/user_scroll play synthetic input through the registered
+    hooks, timing each hook callback.
+    """
+
+    name = 'simulated'
+
+    def __init__(self, chats=6, messages_per_chat=300, uia_latency=0.0, copy_delay=COPY_DELAY,
+                 visible_messages=VISIBLE_MESSAGES, seed=1):
+        self.uia_latency = uia_latency
+        self.copy_delay = copy_delay
+        self.visible_messages = visible_messages
+        self.clipboard = FakeClipboard()
+        self.uia_calls = 0
+        self._lock = threading.Lock()
+
+        self.hotkeys = {}
+        self.key_hooks = []
+        self.click_hooks = []
+        self.mouse_hooks = []
+        self.hook_latencies = {'keyboard': [], 'click': [], 'mouse': []}
+        self.position = (0, 0)
+        self.pressed = None
+        self.held = set()
+
+        rng = random.Random(seed)
+        self.conversations = {name: generate_conversation(rng, messages_per_chat)
+                              for name in CHAT_NAMES[:chats]}
+        self.current_chat = None
+        self.first_visible = 0
+        self.selected = None
+        self.draft = ""
+        self.sent = []
+        self._build_tree()
+        self.open_chat(CHAT_NAMES[0])
+
+    # --- UI tree -------------------------------------------------------
+
+    def _build_tree(self):
+        left, top, right, bottom = WINDOW_RECT
+        self.desktop = SimElement(self, 'Pane', 'Desktop', rect=DESKTOP_RECT)
+        self.window = self.desktop.add(SimElement(self, 'Window', 'WhatsApp', class_name='ApplicationFrameWindow',
+                                                  rect=WINDOW_RECT, handle=0x10001))
+        self.chat_list = self.window.add(SimElement(self, 'List', 'Chats', 'ChatList', 'ListView',
+                                                    rect=(left, top + 60, left + 360, bottom)))
+        for row, name in enumerate(self.conversations):
+            row_top = top + 60 + row * CHAT_ROW_HEIGHT
+            self.chat_list.add(SimElement(self, 'ListItem', name, class_name='ListViewItem',
+                                          rect=(left, row_top, left + 360, row_top + CHAT_ROW_HEIGHT)))
+        self.header = self.window.add(SimElement(self, 'Text', '', 'ConversationHeader',
+                                                 rect=(left + 360, top, right, top + 60)))
+        self.message_list = self.window.add(SimElement(self, 'List', 'Messages', 'MessageList', 'ListView',
+                                                       rect=(left + 360, top + 60, right, bottom - 70)))
+        self.message_rows = []
+        for row in range(self.visible_messages):
+            row_top = top + 60 + row * MESSAGE_ROW_HEIGHT
+            self.message_rows.append(self.message_list.add(SimElement(
+                self, 'ListItem', class_name='ListViewItem',
+                rect=(left + 360, row_top, right, row_top + MESSAGE_ROW_HEIGHT))))
+        self.input_box = self.window.add(SimElement(self, 'Edit', 'Type a message', 'InputBox', 'TextBox',
+                                                    rect=(left + 360, bottom - 70, right - 80, bottom)))
+        self.send_button = self.window.add(SimElement(self, 'Button', 'Send', 'SendButton', 'Button',
+                                                      rect=(right - 80, bottom - 70, right, bottom)))
+        self.focus = self.input_box
+
+    def _bind_rows(self):
+        """Point the realized message rows at the messages now in view."""
+        messages = self.conversations[self.current_chat]
+        for row, element in enumerate(self.message_rows):
+            position = self.first_visible + row
+            if position < len(messages):
+                element.name = messages[position]['label']
+                element.visible = True
+            else:
+                element.name = ""
+                element.visible = False
+
+    def open_chat(self, name):
+        """Show a conversation scrolled to its newest message."""
+        self.current_chat = name
+        self.header.name = name
+        self.selected = None
+        messages = self.conversations[name]
+        self.first_visible = max(len(messages) - self.visible_messages, 0)
+        self._bind_rows()
+
+    def scroll_messages(self, direction, amount='line', count=1):
+        """Scroll the message list by lines or pages."""
+        rows = self.visible_messages if amount == 'page' else 1
+        step = -rows * count if direction == 'up' else rows * count
+        last = max(len(self.conversations[self.current_chat]) - self.visible_messages, 0)
+        self.first_visible = min(max(self.first_visible + step, 0), last)
+        self._bind_rows()
+
+    def select_message(self, position):
+        """Select the text of a message of the open chat (as a click-and-drag would)."""
+        messages = self.conversations[self.current_chat]
+        self.selected = messages[position % len(messages)]
+
+    def move_window(self, dx, dy):
+        """Move the main window and everything in it."""
+        for element in [self.window, *self.window.walk()]:
+            element.rect = element.rect.moved(dx, dy)
+        for element in self.message_rows:
+            if not element.visible:
+                element.rect = element.rect.moved(dx, dy)
+
+    def activate(self, element):
+        """What a click on element does in WhatsApp."""
+        if element.parent is self.chat_list:
+            self.open_chat(element.name)
+        elif element.parent is self.message_list:
+            self.selected = self.conversations[self.current_chat][
+                self.first_visible + self.message_rows.index(element)]
+        elif element is self.send_button:
+            self.send_draft()
+        if element.control_type == 'Edit':
+            self.focus = element
+
+    def send_draft(self):
+        """Send the text in the input box to the open chat."""
+        text = self.draft.strip()
+        self.draft = ""
+        if not text:
+            return
+        messages = self.conversations[self.current_chat]
+        minutes = messages[-1]['minutes'] + 1 if messages else 9 * 60
+        message = {'sender': 'You', 'phone': None, 'text': text, 'minutes': minutes,
+                   'reply_to': None, 'reply_to_phone': None, 'quoted': None}
+        message['label'] = message_label(message)
+        messages.append(message)
+        self.sent.append((self.current_chat, text))
+        self.open_chat(self.current_chat)
+
+    def send_keys(self, keys, with_spaces=False):
+        """Apply a type_keys string to the focused element."""
+        for modifiers, key in parse_keys(keys, with_spaces):
+            if modifiers == '^' and key.lower() == 'c':
+                if self.selected is not None:
+                    self.clipboard.copy_later(self.selected['text'], self.copy_delay)
+            elif modifiers == '^' and key.lower() == 'v':
+                if self.focus is self.input_box:
+                    self.draft += self.clipboard.get_text()
+            elif key == 'ENTER':
+                if self.focus is self.input_box:
+                    if modifiers == '+':
+                        self.draft += "\n"
+                    else:
+                        self.send_draft()
+            elif key == 'BACKSPACE' and modifiers == '^':
+                words = self.draft.rstrip().split(' ')
+                self.draft = ' '.join(words[:-1]) + (' ' if len(words) > 1 else '')
+            elif key == 'BACKSPACE':
+                self.draft = self.draft[:-1]
+            elif key in ('PGUP', 'PGDN'):
+                self.scroll_messages('up' if key == 'PGUP' else 'down', 'page')
+            elif key == 'ESC':
+                self.selected = None
+            elif len(key) == 1 and not modifiers.strip('+'):
+                if self.focus is self.input_box:
+                    self.draft += key.upper() if modifiers == '+' else key
+
+    def element_at(self, x, y):
+        """Deepest visible element containing (x, y)."""
+        found = self.desktop
+        children = self.desktop.items
+        while True:
+            for child in reversed(children):
+                if child.visible and child.rect.contains(x, y):
+                    found, children = child, child.items
+                    break
+            else:
+                return found
+
+    # --- AutomationBackend ---------------------------------------------
+
+    def uia_call(self):
+        """Account for one cross-process UIA round trip."""
+        with self._lock:
+            self.uia_calls += 1
+        if self.uia_latency:
+            time.sleep(self.uia_latency)
+
+    def connect(self, **criteria):
+        self.uia_call()
+        title = criteria.get('title')
+        if title is not None and title != self.window.name:
+            raise ElementNotFoundError(f"no window titled {title!r}")
+        return SimApplication(self)
+
+    def start(self, path):
+        return SimApplication(self)
+
+    def window(self, **criteria):
+        return SimSpec(self.desktop, criteria)
+
+    def from_point(self, x, y):
+        self.uia_call()
+        return self.element_at(x, y)
+
+    def window_rect(self, app):
+        return lambda: tuple(self.window.rect)
+
+    def add_hotkey(self, hotkey, callback):
+        self.hotkeys[frozenset(hotkey.split('+'))] = callback
+
+    def hook_keyboard(self, callback):
+        self.key_hooks.append(callback)
+
+    def on_click(self, callback):
+        self.click_hooks.append(callback)
+
+    def hook_mouse(self, callback):
+        self.mouse_hooks.append(callback)
+
+    def unhook_all(self):
+        self.hotkeys.clear()
+        self.key_hooks.clear()
+        self.click_hooks.clear()
+        self.mouse_hooks.clear()
+
+    def mouse_position(self):
+        return self.position
+
+    # --- Synthetic input -----------------------------------------------
+
+    def _dispatch(self, kind, hooks, *args):
+        for callback in list(hooks):
+            start = time.perf_counter()
+            callback(*args)
+            self.hook_latencies[kind].append(time.perf_counter() - start)
+
+    def _key_event(self, name, event_type):
+        if event_type == 'down':
+            self.held.add(name)
+        else:
+            self.held.discard(name)
+        self._dispatch('keyboard', self.key_hooks, KeyboardEvent(event_type, name, 0, time.time()))
+
+    def user_press(self, combination):
+        """Press and release a key or a combination such as 'ctrl+r'."""
+        names = combination.split('+') if combination != '+' else ['+']
+        *modifiers, key = names
+        for modifier in modifiers:
+            self._key_event(modifier, 'down')
+        self._key_event(key, 'down')
+
+        callback = self.hotkeys.get(frozenset(names))
+        if callback is not None:
+            callback()
+        elif self.focus is self.input_box and key not in MODIFIERS:
+            held = ''.join(code for name, code in (('ctrl', '^'), ('alt', '%'), ('shift', '+'))
+                           if name in modifiers)
+            if len(key) == 1:
+                self.send_keys(held + '{' + key + '}')
+            elif key in ('space', 'enter', 'backspace'):
+                self.send_keys(held + {'space': '{ }', 'enter': '{ENTER}', 'backspace': '{BACKSPACE}'}[key],
+                               with_spaces=True)
+
+        self._key_event(key, 'up')
+        for modifier in reversed(modifiers):
+            self._key_event(modifier, 'up')
+
+    def user_type(self, text):
+        """Type text key by key, with shift for capitals."""
+        for char in text:
+            if char == ' ':
+                self.user_press('space')
+            elif char == '\n':
+                self.user_press('shift+enter')
+            elif char.isupper():
+                self.user_press('shift+' + char)
+            else:
+                self.user_press(char)
+
+    def user_move(self, x, y):
+        """Move the pointer."""
+        self.position = (x, y)
+        self._dispatch('mouse', self.mouse_hooks, MoveEvent(x, y, time.time()))
+
+    def user_click(self, x, y):
+        """Left-click at (x, y) and let WhatsApp react to it."""
+        self.mouse_press(x, y)
+        self.mouse_release(x, y)
+
+    def user_drag(self, x1, y1, x2, y2, steps=20):
+        """Press at (x1, y1), move to (x2, y2) in steps and release; on a message row it selects the text."""
+        self.mouse_press(x1, y1)
+        for i in range(1, steps + 1):
+            self.user_move(x1 + (x2 - x1) * i // steps, y1 + (y2 - y1) * i // steps)
+        self.mouse_release(x2, y2)
+
+    def user_scroll(self, delta, x=None, y=None):
+        """Turn the mouse wheel; positive delta scrolls towards older messages."""
+        if x is not None:
+            self.user_move(x, y)
+        self._dispatch('mouse', self.mouse_hooks, WheelEvent(delta, time.time()))
+        rows = int(round(abs(delta) * SCROLL_ROWS))
+        if rows and self.message_list.rect.contains(*self.position):
+            self.scroll_messages('up' if delta > 0 else 'down', 'line', rows)
+
+    # The synthetic mouse input a replayer sends is the same as a user's
+
+    def mouse_wheel(self, x, y, delta):
+        self.user_scroll(delta, x, y)
+
+    def mouse_press(self, x, y, button='left'):
+        if (x, y) != self.position:
+            self.user_move(x, y)
+        self.pressed = self.element_at(x, y)
+        self._dispatch('mouse', self.mouse_hooks, ButtonEvent('down', button, time.time()))
+
+    def mouse_move(self, x, y):
+        self.user_move(x, y)
+
+    def mouse_release(self, x, y, button='left'):
+        if (x, y) != self.position:
+            self.user_move(x, y)
+        self._dispatch('mouse', self.mouse_hooks, ButtonEvent('up', button, time.time()))
+        pressed, self.pressed = self.pressed, None
+        if button != 'left':
+            return
+        self._dispatch('click', self.click_hooks)
+        released = self.element_at(x, y)
+        if pressed is released:
+            self.activate(released)
+        elif pressed is not None and pressed.parent is self.message_list:
+            self.activate(pressed)      # dragging across a message selects its text
+
+    def hook_summary(self):
+        """Return p50/p95/max milliseconds spent in each kind of hook callback."""
+        from stats import percentile
+        summary = {}
+        for kind, samples in self.hook_latencies.items():
+            if samples:
+                ordered = sorted(samples)
+                summary[kind] = {
+                    'events': len(ordered),
+                    'p50_ms': percentile(ordered, 0.5) * 1000,
+                    'p95_ms': percentile(ordered, 0.95) * 1000,
+                    'max_ms': ordered[-1] * 1000,
+                }
+        return summary
+
+
+def benchmark(uia_latency=0.002, copy_delay=COPY_DELAY, captures=200, clicks=100, messages=20,
+              notches=300, ready_timeout=1.0, verbose=False):
+    """Measure captures/s, hook latency and replay time against the simulator.
+
+    Runs in a temporary directory, so the seen index, history and
+    generated files of the run do not touch the working directory.
+    """
+    from clipboard_capture import ClipboardCapture
+    from extract_messages import MessageExtractor
+    from replay_engine import ActionReplayer
+    from whatsapp_recorder import WhatsAppRecorder
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            # 1. Clipboard captures through the extractor
+            sim = SimulatedWhatsApp(uia_latency=uia_latency, copy_delay=copy_delay,
+                                    messages_per_chat=max(captures, 50))
+            extractor = MessageExtractor(backend=sim)
+            with output:
+                extractor.connect_to_whatsapp()
+                start = time.perf_counter()
+                for i in range(captures):
+                    sim.select_message(i)
+                    extractor.extract_selected_message()
+                elapsed = time.perf_counter() - start
+            results['captures'] = {'count': len(extractor.extracted_messages),
+                                   'per_second': captures / elapsed, **extractor.clipboard.summary()}
+
+            # 2. Hook latency while recording clicks and typing
+            sim = SimulatedWhatsApp(uia_latency=uia_latency, copy_delay=copy_delay)
+            recorder = WhatsAppRecorder(backend=sim)
+            rng = random.Random(7)
+            with output:
+                recorder.connect_to_whatsapp()
+                recorder.begin_recording()
+                consumer = recorder.loop.run_in_thread()
+                start = time.perf_counter()
+                for i in range(clicks):
+                    if i % 10 == 0:
+                        sim.user_click(*sim.chat_list.items[rng.randrange(len(sim.chat_list.items))].rect.mid_point())
+                    elif i % 10 == 9:
+                        # Replay types messages without sending them, so only pick messages that were there before
+                        rows = [row for row in sim.message_rows if row.visible and not row.name.startswith("You: Benchmark")]
+                        sim.user_click(*rows[rng.randrange(len(rows))].rect.mid_point())
+                        sim.user_press('f2')
+                        recorder.loop.flush()   # a user waits for the capture before clicking on
+                    else:
+                        sim.user_click(*sim.input_box.rect.mid_point())
+                    if i % (max(clicks // messages, 1)) == 0:
+                        sim.user_type(f"Benchmark message {i} with some text")
+                        sim.user_press('enter')
+                # A long scroll-back, then a drag selection of a message that is captured with F2
+                sim.user_move(*sim.message_list.rect.mid_point())
+                for i in range(notches):
+                    sim.user_scroll(1)
+                row = sim.message_rows[0].rect
+                sim.user_drag(row.left + 20, row.mid_point()[1], row.right - 20, row.mid_point()[1])
+                sim.user_press('f2')
+                recorder.loop.flush()
+                sim.user_press('ctrl+r')
+                consumer.join()
+                record_elapsed = time.perf_counter() - start
+            actions = list(recorder.recorded_actions)
+            results['recording'] = {'actions': len(actions), 'seconds': record_elapsed,
+                                    'mouse_events': recorder.gestures.events,
+                                    'gestures': recorder.gestures.gestures,
+                                    'hooks': sim.hook_summary(), 'elements': recorder.resolver.summary()}
+
+            # 3. Fast replay of the recorded actions on a fresh window
+            sim = SimulatedWhatsApp(uia_latency=uia_latency, copy_delay=copy_delay)
+            app = sim.connect(title="WhatsApp")
+            replayer = ActionReplayer(app.WhatsApp, sim, mode='fast', ready_timeout=ready_timeout,
+                                      clipboard=ClipboardCapture(sim.clipboard, timeout=ready_timeout))
+            with output:
+                start = time.perf_counter()
+                steps = replayer.run(actions)
+                replay_elapsed = time.perf_counter() - start
+            results['replay'] = {'steps': len(steps), 'seconds': replay_elapsed,
+                                 'failed': sum(step['status'] != 'ok' for step in steps),
+                                 'failures': [step for step in steps if step['status'] != 'ok'],
+                                 'uia_calls': sim.uia_calls}
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def print_benchmark(results, uia_latency):
+    """Print the benchmark results."""
+    print(f"🧪 Simulated WhatsApp, {uia_latency * 1000:g} ms per UIA call")
+    captures = results['captures']
+    print(f"   Captures: {captures['count']} at {captures['per_second']:.1f}/s "
+          f"(p50 {captures.get('p50_ms', 0):.1f} ms, p95 {captures.get('p95_ms', 0):.1f} ms, "
+          f"{captures['timeouts']} timeouts)")
+
+    recording = results['recording']
+    print(f"   Recording: {recording['actions']} actions in {recording['seconds']:.2f}s "
+          f"({recording['mouse_events']} mouse events -> {recording['gestures']} scroll/drag actions)")
+    for kind, stats in recording['hooks'].items():
+        print(f"   {kind.capitalize()} hook: {stats['events']} events, p50 {stats['p50_ms']:.2f} ms, "
+              f"p95 {stats['p95_ms']:.2f} ms, max {stats['max_ms']:.2f} ms")
+    elements = recording['elements']
+    if elements.get('resolve_p50_ms') is not None:
+        print(f"   Element lookups: {elements['resolved']} resolved, p50 {elements['resolve_p50_ms']:.1f} ms, "
+              f"cache hit rate {elements['cache_hit_rate']:.0%}")
+
+    replay = results['replay']
+    print(f"   Replay: {replay['steps']} steps in {replay['seconds']:.2f}s "
+          f"({replay['failed']} failed, {replay['uia_calls']} UIA calls)")
+    for step in replay['failures']:
+        print(f"   ✗ Step {step['index']} ({step['type']}): {step['error']}")
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Benchmark the WhatsApp tools against a simulated window")
+    parser.add_argument('--latency-ms', type=float, default=2.0, help="simulated cost of one UIA call")
+    parser.add_argument('--copy-delay-ms', type=float, default=COPY_DELAY * 1000,
+                        help="simulated time for Ctrl+C to reach the clipboard")
+    parser.add_argument('--captures', type=int, default=200)
+    parser.add_argument('--clicks', type=int, default=100)
+    parser.add_argument('--verbose', action='store_true', help="show the tools' own output")
+    args = parser.parse_args()
+
+    results = benchmark(args.latency_ms / 1000, args.copy_delay_ms / 1000, args.captures, args.clicks,
+                        verbose=args.verbose)
+    print_benchmark(results, args.latency_ms / 1000)
+    if results['replay']['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
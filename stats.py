@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+Sample Statistics
+Small helpers shared by the benchmarks and timing summaries
+"""
+
+
+def percentile(ordered, fraction):
+    """Return the value at fraction (0-1) of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
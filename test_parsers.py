@@ -0,0 +1,140 @@
+"""
+Parser Tests
+Scan dumps through scan_parser and scan_dedup, and every capture file format rendered and read back
+"""
+
+import io
+import os
+
+from capture_formats import parse_capture_file
+from message_store import (render_captured, render_extracted_entries, render_extracted_header,
+                           render_selected)
+from scan_dedup import collapse_fragments
+from scan_parser import iter_scan_messages, write_scan_block, write_scan_header
+
+SAMPLE_SCAN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "whatsapp_scan_20251106_234155.txt")
+
+ARYA = "~Arya +1 (647) 331-8805: Join us, \u200e12\u200e:\u200e58\u200e \u200ePM"
+MERIS = "~Meris +1 (778) 772-1121: Signed up. Immediately. \u200e12\u200e:\u200e59\u200e \u200ePM"
+
+
+def scan_dump(*bodies):
+    """A scan dump holding bodies as its blocks, as the window scanner writes it."""
+    f = io.StringIO()
+    write_scan_header(f, len(bodies), "2025-11-06 23:41:55")
+    for number, body in enumerate(bodies, 1):
+        write_scan_block(f, number, body)
+    f.seek(0)
+    return f
+
+
+def write_file(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding='utf-8')
+    return str(path)
+
+
+def test_sample_scan_collapses_to_messages():
+    with open(SAMPLE_SCAN, 'r', encoding='utf-8') as f:
+        messages, stats = collapse_fragments(iter_scan_messages(f))
+
+    assert stats['blocks'] == 209
+    assert len(messages) == stats['messages'] == 18
+    assert stats['fragments_merged'] == 25
+    assert stats['reactions_attached'] == 8
+
+    first = messages[0]
+    assert (first.sender, first.phone, first.time) == ("Arya", "+1 (647) 331-8805", "12:58 PM")
+    assert first.text.startswith("I know so many of us were taught")
+    assert first.reactions == ('❤️',) and first.reaction_count == 3
+    assert first.scanned_on == "2025-11-06 23:41:55"
+
+    reply = messages[2]
+    assert (reply.sender, reply.reply_to, reply.time) == ("Jaclynn", "Arya", "1:08 PM")
+    assert reply.quoted.startswith("I know so many of us")
+
+    image = next(message for message in messages if message.media and not message.text)
+    assert (image.sender, image.media, image.time) == ("Sav", "Image", "3:11 PM")
+
+
+def test_fragments_collapse_into_their_message():
+    body = "Signed up. Immediately."
+    messages, stats = collapse_fragments(iter_scan_messages(scan_dump(MERIS, body, MERIS, body)))
+
+    assert [message.text for message in messages] == [body]
+    assert stats['duplicate_labels'] == 1
+    assert stats['fragments_merged'] == 2
+    assert stats['orphans'] == 0
+
+
+def test_reactions_fold_into_a_copy():
+    records = list(iter_scan_messages(scan_dump(
+        ARYA,
+        "Reaction ❤️, 3 in total",
+        MERIS,
+        "Reaction 🔥, 👍, 2 in total",
+        'Sacred Shiver Vancouver You reacted 😂 to "Signed up. Immediately."',
+    )))
+    messages, stats = collapse_fragments(records)
+
+    assert stats['reactions_attached'] == 3
+    assert [(message.reactions, message.reaction_count) for message in messages] == [
+        (('❤️',), 3),
+        (('🔥', '👍', '😂'), 3),
+    ]
+    # The records passed in keep their own reactions
+    assert records[0].reactions == () and records[2].reactions == ()
+
+
+def test_scan_round_trip(tmp_path):
+    dump = scan_dump(ARYA, "Join us", MERIS, "Reaction 🔥, 👍, 2 in total").getvalue()
+    records = parse_capture_file(write_file(tmp_path, "whatsapp_scan_test.txt", dump))
+
+    assert [(item['position'], item['sender'], item['time'], item['text']) for item in records] == [
+        (1, "Arya", "12:58 PM", "Join us"),
+        (2, "Meris", "12:59 PM", "Signed up. Immediately."),
+    ]
+    assert records[1]['reactions'] == ['🔥', '👍'] and records[1]['reaction_count'] == 2
+    assert records[0]['timestamp'] == "2025-11-06T23:41:55"
+
+
+def test_captured_round_trip(tmp_path):
+    messages = [{'text': "see you tonight"}, {'text': "first line\nsecond line"}]
+    path = write_file(tmp_path, "captured_messages_test.txt", render_captured("2025-11-06 23:41:55", messages))
+    records = parse_capture_file(path)
+
+    assert [(item['source'], item['position'], item['text']) for item in records] == [
+        ('captured', 1, "see you tonight"),
+        ('captured', 2, "first line\nsecond line"),
+    ]
+    assert all(item['timestamp'] == "2025-11-06T23:41:55" for item in records)
+
+
+def test_selected_round_trip(tmp_path):
+    messages = [
+        {'timestamp': "2025-11-06T23:42:01", 'method': 'clipboard', 'text': "Signed up. Immediately."},
+        {'timestamp': "2025-11-06T23:42:09", 'method': 'element', 'text': "two\nlines"},
+    ]
+    path = write_file(tmp_path, "selected_messages_test.txt", render_selected("2025-11-06 23:41:55", messages))
+    records = parse_capture_file(path)
+
+    assert [(item['position'], item['timestamp'], item['method'], item['text']) for item in records] == [
+        (1, "2025-11-06T23:42:01", 'clipboard', "Signed up. Immediately."),
+        (2, "2025-11-06T23:42:09", 'element', "two\nlines"),
+    ]
+
+
+def test_extracted_round_trip_with_closing_rule_in_text(tmp_path):
+    tricky = "before\n" + "=" * 80 + "\nafter"
+    messages = [
+        {'timestamp': "2025-11-06T23:42:01", 'text': tricky},
+        {'timestamp': "2025-11-06T23:42:02", 'text': "plain"},
+    ]
+    header, _ = render_extracted_header("2025-11-06 23:42:05", len(messages))
+    path = write_file(tmp_path, "extracted_whatsapp_messages_test.txt", header + render_extracted_entries(messages))
+    records = parse_capture_file(path)
+
+    assert [(item['position'], item['timestamp'], item['text']) for item in records] == [
+        (1, "2025-11-06T23:42:01", tricky),
+        (2, "2025-11-06T23:42:02", "plain"),
+    ]
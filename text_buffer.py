@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Typed Message Buffer
+Rebuilds what is typed into the WhatsApp input box from raw key events: a gap buffer with cursor, selection, word deletion and paste
+"""
+
+import argparse
+import random
+import re
+import time
+
+from stats import percentile
+
+# keyboard-module names of modifier keys -> the modifier they hold
+MODIFIER_KEYS = {
+    'shift': 'shift', 'left shift': 'shift', 'right shift': 'shift',
+    'ctrl': 'ctrl', 'left ctrl': 'ctrl', 'right ctrl': 'ctrl',
+    'alt': 'alt', 'left alt': 'alt', 'right alt': 'alt', 'alt gr': 'alt',
+    'windows': 'windows', 'left windows': 'windows', 'right windows': 'windows',
+}
+MODIFIER_ORDER = ('ctrl', 'alt', 'shift', 'windows')
+# Keys that never change the text nor need replaying
+IGNORED_KEYS = {'caps lock', 'num lock', 'scroll lock', 'tab', 'insert'}
+# Keys that move the cursor while there is text, and navigate WhatsApp when the box is empty
+NAVIGATION_KEYS = {'left', 'right', 'home', 'end', 'up', 'down'}
+# Line and word ends are searched in str windows starting this long and doubling
+SEARCH_WINDOW = 64
+# The rest of a word and the whitespace after it, as Ctrl+Right skips them
+WORD_AND_SPACE_RE = re.compile(r"\S*\s*")
+
+
+class GapBuffer:
+    """Characters in a list with a gap at the cursor.
+
+    Typing and deleting at the cursor cost O(1); moving the cursor costs
+    the distance moved, so the per-key cost stays constant however long
+    the message gets.
+    """
+
+    def __init__(self, capacity=64):
+        self.chars = [''] * capacity
+        self.gap_start = 0          # also the cursor position
+        self.gap_end = capacity
+
+    def __len__(self):
+        return len(self.chars) - (self.gap_end - self.gap_start)
+
+    @property
+    def cursor(self):
+        return self.gap_start
+
+    def _grow(self, needed):
+        """Widen the gap to at least needed slots, doubling the storage."""
+        size = len(self.chars)
+        new_size = max(size * 2, size + needed)
+        tail = self.chars[self.gap_end:]
+        self.chars[self.gap_start:] = [''] * (new_size - self.gap_start - len(tail)) + tail
+        self.gap_end = new_size - len(tail)
+
+    def insert(self, text):
+        """Insert text at the cursor and move the cursor past it."""
+        if self.gap_end - self.gap_start < len(text):
+            self._grow(len(text))
+        self.chars[self.gap_start:self.gap_start + len(text)] = text
+        self.gap_start += len(text)
+
+    def move_to(self, position):
+        """Move the cursor (and the gap) to position."""
+        position = max(0, min(position, len(self)))
+        if position < self.gap_start:
+            count = self.gap_start - position
+            self.chars[self.gap_end - count:self.gap_end] = self.chars[position:self.gap_start]
+            self.gap_start = position
+            self.gap_end -= count
+        elif position > self.gap_start:
+            count = position - self.gap_start
+            self.chars[self.gap_start:self.gap_start + count] = self.chars[self.gap_end:self.gap_end + count]
+            self.gap_start += count
+            self.gap_end += count
+
+    def delete(self, start, end):
+        """Remove the characters start..end-1; the cursor ends up at start."""
+        if start < self.gap_start <= end:
+            self.gap_end += end - self.gap_start
+            self.gap_start = start
+        else:
+            self.move_to(end)
+            self.gap_start = start
+
+    def text_between(self, start, end):
+        """Return the characters start..end-1 as a str."""
+        if end <= self.gap_start:
+            return ''.join(self.chars[start:end])
+        offset = self.gap_end - self.gap_start
+        if start >= self.gap_start:
+            return ''.join(self.chars[start + offset:end + offset])
+        return ''.join(self.chars[start:self.gap_start]) + ''.join(self.chars[self.gap_end:end + offset])
+
+    def text(self):
+        return ''.join(self.chars[:self.gap_start]) + ''.join(self.chars[self.gap_end:])
+
+    def clear(self):
+        self.gap_start = 0
+        self.gap_end = len(self.chars)
+
+
+class StringBuffer:
+    """The GapBuffer interface over a plain str, as the old recorder did it (for the benchmark)."""
+
+    def __init__(self):
+        self.value = ""
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.value)
+
+    def insert(self, text):
+        self.value = self.value[:self.cursor] + text + self.value[self.cursor:]
+        self.cursor += len(text)
+
+    def move_to(self, position):
+        self.cursor = max(0, min(position, len(self.value)))
+
+    def delete(self, start, end):
+        self.value = self.value[:start] + self.value[end:]
+        self.cursor = start
+
+    def text_between(self, start, end):
+        return self.value[start:end]
+
+    def text(self):
+        return self.value
+
+    def clear(self):
+        self.value = ""
+        self.cursor = 0
+
+
+class MessageEditor:
+    """Applies keyboard-module key events to a text buffer the way the input box does.
+
+    Only 'down' events edit (key repeat included); 'up' events just
+    release modifiers. feed() returns None when the key was an edit and
+    otherwise the key, with held modifiers, as 'ctrl+f' style combination
+    for the caller to handle: 'enter' sends the message, navigation keys
+    pass through while the box is empty, anything else is a shortcut.
+    """
+
+    def __init__(self, paste=None, buffer=None):
+        self.paste = paste              # returns the clipboard text for Ctrl+V
+        self.buffer = buffer if buffer is not None else GapBuffer()
+        self.anchor = None              # other end of the selection, if any
+        self.held = set()
+
+    def text(self):
+        return self.buffer.text()
+
+    def clear(self):
+        self.buffer.clear()
+        self.anchor = None
+
+    def take(self):
+        """Return the typed text and empty the box (the message was sent)."""
+        text = self.buffer.text()
+        self.clear()
+        return text
+
+    def combination(self, name):
+        return '+'.join([modifier for modifier in MODIFIER_ORDER if modifier in self.held] + [name])
+
+    def feed(self, event):
+        """Process one key event."""
+        name = event.name
+        if name is None:
+            return None
+        modifier = MODIFIER_KEYS.get(name)
+        if event.event_type != 'down':
+            if modifier:
+                self.held.discard(modifier)
+            return None
+        if modifier:
+            self.held.add(modifier)
+            return None
+        return self.press(name)
+
+    # --- Selection -------------------------------------------------------
+
+    def selection(self):
+        """Return (start, end) of the selection, or None."""
+        if self.anchor is None or self.anchor == self.buffer.cursor:
+            return None
+        return min(self.anchor, self.buffer.cursor), max(self.anchor, self.buffer.cursor)
+
+    def delete_selection(self):
+        """Delete the selected text; returns False when nothing was selected."""
+        selected = self.selection()
+        self.anchor = None
+        if selected is None:
+            return False
+        self.buffer.delete(*selected)
+        return True
+
+    def move(self, position, extend):
+        """Move the cursor, extending the selection with Shift held."""
+        if extend:
+            if self.anchor is None:
+                self.anchor = self.buffer.cursor
+        else:
+            self.anchor = None
+        self.buffer.move_to(position)
+
+    # --- Positions -------------------------------------------------------
+
+    def text_before(self, position):
+        """Yield (start, text[start:position]) for windows reaching twice as far back each time.
+
+        A boundary d characters away is found after O(d) work, done by str
+        methods rather than one char at a time.
+        """
+        size = SEARCH_WINDOW
+        while True:
+            start = max(0, position - size)
+            yield start, self.buffer.text_between(start, position)
+            if start == 0:
+                return
+            size *= 2
+
+    def text_after(self, position):
+        """Yield (end, text[position:end]) for windows reaching twice as far ahead each time."""
+        size = SEARCH_WINDOW
+        length = len(self.buffer)
+        while True:
+            end = min(length, position + size)
+            yield end, self.buffer.text_between(position, end)
+            if end == length:
+                return
+            size *= 2
+
+    def word_start(self, position):
+        for start, text in self.text_before(position):
+            body = text.rstrip()
+            if body:
+                word = body.rsplit(None, 1)[-1]
+                if len(word) < len(body) or start == 0:
+                    return start + len(body) - len(word)
+        return 0
+
+    def word_end(self, position):
+        for end, text in self.text_after(position):
+            skipped = WORD_AND_SPACE_RE.match(text).end()
+            if skipped < len(text) or end == len(self.buffer):
+                return position + skipped
+        return position
+
+    def line_start(self, position):
+        for start, text in self.text_before(position):
+            found = text.rfind('\n')
+            if found >= 0:
+                return start + found + 1
+        return 0
+
+    def line_end(self, position):
+        for end, text in self.text_after(position):
+            found = text.find('\n')
+            if found >= 0:
+                return position + found
+        return len(self.buffer)
+
+    def target(self, name, ctrl):
+        """Where a navigation key moves the cursor."""
+        cursor = self.buffer.cursor
+        if name == 'left':
+            return self.word_start(cursor) if ctrl else cursor - 1
+        if name == 'right':
+            return self.word_end(cursor) if ctrl else cursor + 1
+        if name == 'home':
+            return 0 if ctrl else self.line_start(cursor)
+        if name == 'end':
+            return len(self.buffer) if ctrl else self.line_end(cursor)
+        start = self.line_start(cursor)
+        column = cursor - start
+        if name == 'up':
+            if start == 0:
+                return 0
+            above = self.line_start(start - 1)
+            return min(above + column, start - 1)
+        end = self.line_end(cursor)
+        if end == len(self.buffer):
+            return end
+        return min(end + 1 + column, self.line_end(end + 1))
+
+    # --- Keys ------------------------------------------------------------
+
+    def insert(self, text):
+        self.delete_selection()
+        self.buffer.insert(text)
+
+    def press(self, name):
+        """Apply one key press; returns the combination when it is not an edit."""
+        ctrl = 'ctrl' in self.held
+        alt = 'alt' in self.held
+        shift = 'shift' in self.held
+        typing = not (ctrl or alt) or (ctrl and alt)     # Ctrl+Alt is AltGr on many layouts
+
+        if len(name) == 1 and name.isprintable() and typing:
+            self.insert(name)
+        elif name == 'space' and typing:
+            self.insert(' ')
+        elif name == 'enter' and shift and not ctrl:
+            self.insert('\n')
+        elif name == 'enter':
+            return 'enter'
+        elif ctrl and not alt and name in ('a', 'v', 'x', 'c'):
+            if name == 'a':
+                self.anchor = 0
+                self.buffer.move_to(len(self.buffer))
+            elif name == 'v':
+                pasted = self.paste() if self.paste else None
+                if pasted:
+                    self.insert(pasted.replace('\r\n', '\n'))
+            elif name == 'x':
+                self.delete_selection()
+            # Ctrl+C leaves the text as it is
+        elif name == 'backspace':
+            if not self.delete_selection():
+                cursor = self.buffer.cursor
+                start = self.word_start(cursor) if ctrl else cursor - 1
+                if start >= 0 and start < cursor:
+                    self.buffer.delete(start, cursor)
+        elif name == 'delete' and len(self.buffer):
+            if not self.delete_selection():
+                cursor = self.buffer.cursor
+                end = self.word_end(cursor) if ctrl else cursor + 1
+                if end <= len(self.buffer) and end > cursor:
+                    self.buffer.delete(cursor, end)
+        elif name in NAVIGATION_KEYS and len(self.buffer):
+            selected = self.selection()
+            if selected and not shift and name in ('left', 'right') and not ctrl:
+                self.move(selected[0] if name == 'left' else selected[1], False)
+            else:
+                self.move(self.target(name, ctrl), shift)
+        elif name in IGNORED_KEYS:
+            pass
+        else:
+            return self.combination(name)
+        return None
+
+
+class KeyEvent:
+    """A key event as the keyboard module reports it."""
+    __slots__ = ('event_type', 'name')
+
+    def __init__(self, event_type, name):
+        self.event_type = event_type
+        self.name = name
+
+
+def synthetic_events(count, seed=1, message_keys=5000):
+    """Key events of someone typing, correcting, selecting and pasting long messages."""
+    rng = random.Random(seed)
+    words = ("see", "you", "at", "the", "retreat", "tonight", "dinner", "plan", "thanks", "coming", "photo")
+    events = []
+
+    def tap(name, *modifiers):
+        for modifier in modifiers:
+            events.append(KeyEvent('down', modifier))
+        events.append(KeyEvent('down', name))
+        events.append(KeyEvent('up', name))
+        for modifier in reversed(modifiers):
+            events.append(KeyEvent('up', modifier))
+
+    typed = 0
+    while len(events) < count:
+        roll = rng.random()
+        if roll < 0.80:
+            for char in rng.choice(words):
+                tap(char)
+            tap('space')
+            typed += 1
+        elif roll < 0.86:
+            tap('backspace')
+        elif roll < 0.88:
+            tap('backspace', 'ctrl')
+        elif roll < 0.92:
+            tap(rng.choice(('left', 'right')), *(('ctrl',) if rng.random() < 0.5 else ()))
+        elif roll < 0.94:
+            tap(rng.choice(('left', 'right')), 'shift')
+        elif roll < 0.96:
+            tap(rng.choice(('home', 'end')))
+        elif roll < 0.97:
+            tap('v', 'ctrl')
+        elif roll < 0.98:
+            tap('enter', 'shift')
+        else:
+            tap('delete')
+        if typed * 7 >= message_keys:
+            tap('enter')
+            typed = 0
+    return events[:count]
+
+
+def replay_events(editor, events):
+    """Feed events to an editor; returns (sent messages, per-event seconds)."""
+    sent = []
+    timings = []
+    clock = time.perf_counter
+    for event in events:
+        start = clock()
+        if editor.feed(event) == 'enter':
+            sent.append(editor.take())
+        timings.append(clock() - start)
+    sent.append(editor.take())
+    return sent, timings
+
+
+def benchmark(count=100_000, message_keys=5000):
+    """Replay synthetic key events through the gap buffer and the plain-string buffer."""
+    events = synthetic_events(count, message_keys=message_keys)
+    paste = lambda: "pasted text "
+    results = {}
+    texts = {}
+    for label, buffer in (('gap buffer', GapBuffer()), ('string', StringBuffer())):
+        start = time.perf_counter()
+        texts[label], timings = replay_events(MessageEditor(paste=paste, buffer=buffer), events)
+        total = time.perf_counter() - start
+        timings.sort()
+        results[label] = {'seconds': total, 'p50_us': percentile(timings, 0.5) * 1e6,
+                          'p99_us': percentile(timings, 0.99) * 1e6, 'max_us': timings[-1] * 1e6}
+    same = texts['gap buffer'] == texts['string']
+
+    print(f"⌨️  {count:,} key events, {len(texts['gap buffer'])} messages "
+          f"(longest {max(map(len, texts['gap buffer'])):,} chars)")
+    for label, stats in results.items():
+        print(f"   {label:<10}  {stats['seconds'] * 1000:8.1f} ms total, per key p50 {stats['p50_us']:.1f} µs, "
+              f"p99 {stats['p99_us']:.1f} µs, max {stats['max_us']:.0f} µs")
+    print(f"   Reconstructed messages {'match' if same else 'DIFFER'}")
+    results['match'] = same
+    return results
+
+
+def main():
+    """Command line interface."""
+    parser = argparse.ArgumentParser(description="Benchmark keystroke reconstruction")
+    parser.add_argument('--events', type=int, default=100_000, help="synthetic key events to replay")
+    parser.add_argument('--message-keys', type=int, default=5000,
+                        help="roughly how many keys each message takes before Enter")
+    args = parser.parse_args()
+    benchmark(args.events, args.message_keys)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,96 +4,222 @@ PyWinAuto Recorder for WhatsApp Desktop
 This script helps you record interactions with WhatsApp and generate automation code.
 """
 
+import argparse
 import time
-import json
-import os
-import pyperclip
+import threading
 from datetime import datetime
-from pywinauto.application import Application
-from pywinauto import Desktop
-import keyboard
-import mouse
+from automation_backend import default_backend
+from seen_index import SeenIndex
+from clipboard_capture import ClipboardCapture
+from recording_history import HistoryLog
+from action_journal import ActionJournal
+from element_resolver import ElementResolver, element_rect
+from chat_exporter import find_message_list, open_chat_name
+from message_store import MessageStore, render_captured, render_selected, write_text
+from text_buffer import MessageEditor
+from hook_metrics import HookMetrics, print_summary
+from event_loop import EventLoop
+from mouse_gestures import GESTURE_TYPES, GestureCoalescer, path_points
+from replay_engine import escape_keys, key_code
+from compact_recording import COMPACT_SUFFIX, write_compact, write_json
+from action_optimizer import optimize_actions, print_report
+
+# Recordings longer than this are emitted as an action table plus a loop
+UNROLL_LIMIT = 50
+# Generated scripts move along at most this many points of a recorded drag
+DRAG_SCRIPT_POINTS = 20
+# The recorder's own hotkeys, never recorded as key presses
+STOP_HOTKEY = 'ctrl+r'
+CANCEL_HOTKEY = 'esc'
+# Edge of a screen region that is unbounded on that side
+OFF_SCREEN = 1 << 30
 
 class WhatsAppRecorder:
-    def __init__(self):
+    def __init__(self, backend=None, store=None, text_files=True, trace_file=None, compact_data=False,
+                 optimize=True):
+        self.backend = backend or default_backend()
+        self._store = store             # opened on first use, see store
+        self.text_files = text_files    # the database is the record; text files are renderings of it
+        self.session_id = None
         self.recorded_actions = []
+        self.script_actions = []        # what the script replays: the recorded actions, optimized
         self.app = None
         self.recording = False
-        self.history_file = "recording_history.json"
-        self.current_message = ""
+        self.history = HistoryLog()
         self.captured_text = []
         self.selected_messages = []
+        self.seen = SeenIndex()
+        self.captured_keys = set()      # seen-index keys of this session's captures, until they are saved
+        self.clipboard = ClipboardCapture(self.backend.clipboard)
+        self.editor = MessageEditor(paste=self.clipboard.backend.get_text)
+        self.journal = None
+        self.actions_lock = threading.Lock()
+        self.trace_file = trace_file    # optional JSONL file of every timed hook event
+        self.compact_data = compact_data    # save the actions in the binary format instead of JSON
+        self.optimize = optimize            # drop redundant actions before generating the script
+        self.metrics = HookMetrics()
+        self.loop = EventLoop()
+        self.gestures = GestureCoalescer(self.add_gesture, position=self.backend.mouse_position)
+        self.resolver = ElementResolver(from_point=self.element_from_point)
+        self.message_list_offset = None     # message list rectangle relative to the window
+        self.clicked_chat = None            # name of the chat list item clicked last
         
+    @property
+    def store(self):
+        """The message database; only opened once a session is saved, so the other menu options never create it."""
+        if self._store is None:
+            self._store = MessageStore()
+        return self._store
+    
+    def add_action(self, action):
+        """Record an action in memory and in the on-disk journal; returns its index."""
+        if action['type'] not in GESTURE_TYPES:
+            self.gestures.flush()   # a scroll in progress happened before this action
+        with self.actions_lock:
+            self.recorded_actions.append(action)
+            self.journal_write('action', action)
+            return len(self.recorded_actions) - 1
+    
+    def add_gesture(self, action):
+        """Record a finished scroll or drag gesture."""
+        if action['type'] == 'scroll':
+            # Scrolled rows now show other messages (or other chats, in the chat list)
+            messages = self.message_list_rect()
+            if messages is not None and action['position']['x'] < messages[0]:
+                self.resolver.cache.invalidate((-OFF_SCREEN, -OFF_SCREEN, messages[0], OFF_SCREEN))
+            else:
+                self.forget_messages()
+        self.add_action(action)
+        self.log(f"🖱️  Recorded {self.get_action_summary(action).lower()}")
+    
+    def add_captured_text(self, text):
+        """Record a typed message in memory and in the on-disk journal."""
+        self.captured_text.append(text)
+        self.journal_write('captured_text', {'text': text})
+    
+    def log(self, message):
+        """Print from a hook; console output is timed too, it can block the hook thread."""
+        with self.metrics.measure('print'):
+            print(message)
+    
+    def element_from_point(self, x, y):
+        """UIA lookup of the element under a click (runs on the resolver's worker threads)."""
+        with self.metrics.measure('uia_lookup'):
+            return self.backend.from_point(x, y)
+    
+    def locate_message_list(self):
+        """Find the message list once, so UI changes only drop the cached elements inside it."""
+        self.message_list_offset = None
+        try:
+            rect = element_rect(find_message_list(self.app.WhatsApp))
+        except Exception:
+            return
+        left, top = self.window_origin()
+        self.message_list_offset = (rect[0] - left, rect[1] - top, rect[2] - left, rect[3] - top)
+    
+    def window_origin(self):
+        window = self.resolver.cache.window_rect() if self.resolver.cache.window_rect else None
+        return window[:2] if window else (0, 0)
+    
+    def message_list_rect(self):
+        """Screen rectangle of the message list, following the window; None if it was not found."""
+        if self.message_list_offset is None:
+            return None
+        left, top = self.window_origin()
+        x1, y1, x2, y2 = self.message_list_offset
+        return x1 + left, y1 + top, x2 + left, y2 + top
+    
+    def open_chat_name(self):
+        """Name of the open chat: the conversation header, else the chat list item clicked last."""
+        return (open_chat_name(self.app.WhatsApp) if self.app else None) or self.clicked_chat
+    
+    def forget_messages(self, header=False):
+        """Drop the cached message rows (and the chat header above them); everything if the list is unknown."""
+        messages = self.message_list_rect()
+        if messages is None:
+            self.resolver.cache.invalidate()
+        elif header:
+            self.resolver.cache.invalidate((messages[0], -OFF_SCREEN, messages[2], messages[3]))
+        else:
+            self.resolver.cache.invalidate(messages)
+    
+    def journal_write(self, kind, data):
+        """Append an entry to the session journal, if one is open."""
+        if self.journal:
+            self.journal.write(kind, data)
+    
     def detect_selected_message(self):
         """Detect and capture selected message content."""
         if not self.app:
-            print("❌ Not connected to WhatsApp")
+            self.log("❌ Not connected to WhatsApp")
             return None
         
         try:
             main_win = self.app.WhatsApp
             
             # Method 1: Try to get selected text from clipboard
-            print("📋 Attempting to copy selected text...")
+            self.log("📋 Attempting to copy selected text...")
             
-            # Clear clipboard first
-            pyperclip.copy("")
-            time.sleep(0.1)
-            
-            # Send Ctrl+C to copy selected text
-            main_win.type_keys("^c")
-            time.sleep(0.3)  # Wait longer for clipboard
-            
-            selected_text = pyperclip.paste()
-            print(f"📋 Clipboard content: '{selected_text[:50]}...'")
+            # Send Ctrl+C and wait until the clipboard actually changes
+            with self.metrics.measure('clipboard_copy'):
+                selected_text = self.clipboard.capture(lambda: main_win.type_keys("^c"))
+            if selected_text is None:
+                self.log(f"⌛ Clipboard did not change within {self.clipboard.timeout:.1f}s")
+                selected_text = ""
+            self.log(f"📋 Clipboard content: '{selected_text[:50]}...'")
             
             if selected_text and selected_text.strip() and len(selected_text.strip()) > 3:
                 # Clean up the text and check if it's a message
                 clean_text = selected_text.strip()
                 
-                # Check if we already have this message
-                existing_texts = [item['text'] for item in self.selected_messages]
-                if clean_text not in existing_texts:
+                # Check if we already have this message (this or an earlier session);
+                # the index only learns it once the session is saved
+                key = self.seen.key(clean_text)
+                if key not in self.captured_keys and clean_text not in self.seen:
+                    self.captured_keys.add(key)
                     message_info = {
                         'text': clean_text,
                         'timestamp': datetime.now().isoformat(),
-                        'method': 'clipboard'
+                        'method': 'clipboard',
+                        'chat': self.open_chat_name()
                     }
                     self.selected_messages.append(message_info)
-                    print(f"✅ Captured selected message: {clean_text[:80]}...")
+                    self.journal_write('selected_message', message_info)
+                    self.log(f"✅ Captured selected message: {clean_text[:80]}...")
                     return message_info
                 else:
-                    print("⚠️  Message already captured")
+                    self.log("⚠️  Message already captured")
                     return None
             else:
-                print("❌ No meaningful text found in clipboard")
+                self.log("❌ No meaningful text found in clipboard")
                 
         except Exception as e:
-            print(f"❌ Error in clipboard method: {e}")
+            self.log(f"❌ Error in clipboard method: {e}")
         
-        print("ℹ️  Tip: Make sure to select text in WhatsApp before pressing F1")
+        self.log("ℹ️  Tip: Make sure to select text in WhatsApp before pressing F1")
         return None
     
     def save_selected_messages(self):
-        """Save selected messages to a file."""
+        """Store selected messages and render them to a file."""
         if not self.selected_messages:
             return None
         
-        timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
-        selected_filename = f"selected_messages_{timestamp}.txt"
-        
         try:
-            with open(selected_filename, 'w', encoding='utf-8') as f:
-                f.write("WhatsApp Selected Messages\n")
-                f.write("=" * 30 + "\n")
-                f.write(f"Recorded on: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Total selected messages: {len(self.selected_messages)}\n")
-                f.write("=" * 30 + "\n\n")
-                
-                for i, message in enumerate(self.selected_messages, 1):
-                    f.write(f"{i:3d}. [{message['timestamp']}] [{message['method']}]\n")
-                    f.write(f"     {message['text']}\n\n")
+            self.store.add_messages(self.session_id, 'selected', [
+                {'text': message['text'], 'timestamp': message['timestamp'], 'method': message['method'],
+                 'chat': message.get('chat')}
+                for message in self.selected_messages])
+            for message in self.selected_messages:
+                self.seen.add(message['text'])
+            if not self.text_files:
+                print(f"📌 {len(self.selected_messages)} selected messages stored in: {self.store.path}")
+                return None
             
+            timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
+            selected_filename = write_text(
+                f"selected_messages_{timestamp}.txt",
+                render_selected(self.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+                                self.store.session_messages(self.session_id, 'selected')))
             print(f"📌 Selected messages saved to: {selected_filename}")
             return selected_filename
         except Exception as e:
@@ -105,129 +231,123 @@ class WhatsAppRecorder:
         if not self.recording:
             return
         
-        key_name = event.name
+        # Rebuild the input box text; only keys that are not edits come back
+        key_name = self.editor.feed(event)
+        if key_name is None or key_name in (STOP_HOTKEY, CANCEL_HOTKEY):
+            return
+        # The event may have waited in the queue; stamp it with the time of the key press
+        pressed = datetime.fromtimestamp(event.time) if getattr(event, 'time', None) else datetime.now()
         
         # Special combination for capturing selected messages
         if key_name == 'f2':  # Changed from F1 to F2 to avoid conflicts
-            print(f"🔍 F2 pressed - attempting to capture selected message...")
+            self.log(f"🔍 F2 pressed - attempting to capture selected message...")
+            # Resolve the click that selected the message before the UI can move on to another chat
+            self.resolver.drain()
             message_info = self.detect_selected_message()
             if message_info:
                 action = {
                     'type': 'selected_message',
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': pressed.isoformat(),
                     'text': message_info['text'],
                     'detection_method': message_info['method']
                 }
-                self.recorded_actions.append(action)
-                print(f"✅ Successfully recorded selected message action")
+                self.add_action(action)
+                self.log(f"✅ Successfully recorded selected message action")
             else:
-                print(f"❌ Could not capture selected message - make sure text is selected first")
+                self.log(f"❌ Could not capture selected message - make sure text is selected first")
             return
         
-        # Handle regular key presses
-        if key_name == 'space':
-            self.current_message += ' '
-        elif key_name == 'backspace':
-            if self.current_message:
-                self.current_message = self.current_message[:-1]
-        elif key_name == 'enter':
-            if self.current_message.strip():
+        if key_name == 'enter':
+            self.forget_messages()  # sending changes the message list
+            message = self.editor.take().strip()
+            if message:
                 # Save completed message
                 action = {
                     'type': 'message',
-                    'timestamp': datetime.now().isoformat(),
-                    'text': self.current_message.strip()
+                    'timestamp': pressed.isoformat(),
+                    'text': message,
+                    'chat': self.open_chat_name()
                 }
-                self.recorded_actions.append(action)
-                self.captured_text.append(self.current_message.strip())
-                print(f"💬 Recorded message: {self.current_message.strip()[:50]}...")
-                self.current_message = ""
-        elif len(key_name) == 1 and key_name.isprintable():
-            # Regular character
-            self.current_message += key_name
-        elif key_name in ['shift', 'ctrl', 'alt', 'tab', 'caps lock']:
-            # Ignore modifier keys for message capture
-            pass
+                self.add_action(action)
+                self.add_captured_text(message)
+                self.log(f"💬 Recorded message: {message[:50]}...")
         else:
-            # Record special key as action
+            # Record special key as action; it may scroll the messages, and a shortcut may open anything
+            if '+' in key_name:
+                self.resolver.cache.invalidate()
+            else:
+                self.forget_messages()
             action = {
                 'type': 'keypress',
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': pressed.isoformat(),
                 'key': key_name
             }
-            self.recorded_actions.append(action)
-            print(f"⌨️  Recorded key: {key_name}")
+            self.add_action(action)
+            self.log(f"⌨️  Recorded key: {key_name}")
     
     def save_captured_text(self):
-        """Save captured text messages to a file."""
+        """Store captured text messages and render them to a file."""
         if not self.captured_text:
             return None
         
-        timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
-        text_filename = f"captured_messages_{timestamp}.txt"
+        # Typed messages are recorded as 'message' actions in the same order
+        sent = [action for action in self.recorded_actions if action['type'] == 'message']
+        if len(sent) != len(self.captured_text):
+            sent = [{}] * len(self.captured_text)
         
         try:
-            with open(text_filename, 'w', encoding='utf-8') as f:
-                f.write("WhatsApp Captured Messages\n")
-                f.write("=" * 30 + "\n")
-                f.write(f"Recorded on: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Total messages: {len(self.captured_text)}\n")
-                f.write("=" * 30 + "\n\n")
-                
-                for i, message in enumerate(self.captured_text, 1):
-                    f.write(f"{i:3d}. {message}\n")
+            self.store.add_messages(self.session_id, 'typed', [
+                {'text': text, 'timestamp': action.get('timestamp'), 'chat': action.get('chat')}
+                for text, action in zip(self.captured_text, sent)])
+            if not self.text_files:
+                print(f"📝 {len(self.captured_text)} typed messages stored in: {self.store.path}")
+                return None
             
+            timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
+            text_filename = write_text(
+                f"captured_messages_{timestamp}.txt",
+                render_captured(self.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+                                self.store.session_messages(self.session_id, 'typed')))
             print(f"📝 Captured text saved to: {text_filename}")
             return text_filename
         except Exception as e:
             print(f"Error saving captured text: {e}")
             return None
         
-    def load_history(self):
-        """Load existing recording history."""
-        try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
-        except Exception as e:
-            print(f"Warning: Could not load history file: {e}")
-            return []
-    
     def save_to_history(self, session_info):
-        """Save recording session to history file."""
+        """Append recording session to the history log."""
         try:
-            history = self.load_history()
-            history.append(session_info)
-            
-            # Keep only last 50 sessions to prevent file from growing too large
-            if len(history) > 50:
-                history = history[-50:]
-            
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, indent=2, ensure_ascii=False)
-            
-            print(f"✓ Recording session saved to history: {self.history_file}")
+            self.history.append(session_info)
+            print(f"✓ Recording session saved to history: {self.history.path}")
         except Exception as e:
             print(f"Warning: Could not save to history file: {e}")
     
     def show_last_recording(self):
         """Display information about the last recording session."""
-        history = self.load_history()
-        if not history:
+        try:
+            last_session = self.history.last()
+        except Exception as e:
+            print(f"Warning: Could not load history file: {e}")
+            return
+        if not last_session:
             print("No recording history found.")
             return
         
-        last_session = history[-1]
         print("\n" + "=" * 50)
         print("📝 LAST RECORDING SESSION")
         print("=" * 50)
         print(f"Date: {last_session['timestamp']}")
         print(f"Actions recorded: {last_session['action_count']}")
+        if last_session.get('optimized_away'):
+            print(f"Redundant actions removed: {last_session['optimized_away']}")
         print(f"Duration: {last_session.get('duration', 'Unknown')}")
         print(f"Script file: {last_session['script_file']}")
         print(f"Data file: {last_session['data_file']}")
         
+        if last_session.get('hook_latency'):
+            print("Hook latency:")
+            print_summary(last_session['hook_latency'], "   ")
+        
         if last_session.get('actions_summary'):
             print("\nActions performed:")
             for i, action in enumerate(last_session['actions_summary'][:5], 1):
@@ -235,35 +355,49 @@ class WhatsAppRecorder:
             if len(last_session['actions_summary']) > 5:
                 print(f"  ... and {len(last_session['actions_summary']) - 5} more actions")
     
-    def show_recording_history(self):
-        """Display all recording sessions."""
-        history = self.load_history()
-        if not history:
+    def show_recording_history(self, page=0, page_size=10):
+        """Display one page of recording sessions, newest first.
+        
+        Returns True if there are older sessions after this page.
+        """
+        try:
+            total = len(self.history)
+            sessions = self.history.page(page, page_size)
+        except Exception as e:
+            print(f"Warning: Could not load history file: {e}")
+            return False
+        if not sessions:
             print("No recording history found.")
-            return
+            return False
         
         print("\n" + "=" * 60)
-        print("📚 RECORDING HISTORY")
+        print(f"📚 RECORDING HISTORY (page {page + 1} of {(total + page_size - 1) // page_size})")
         print("=" * 60)
         
-        for i, session in enumerate(reversed(history[-10:]), 1):  # Show last 10 sessions
+        for i, session in enumerate(sessions, page * page_size + 1):
             print(f"\n{i:2d}. {session['timestamp']}")
             print(f"    Actions: {session['action_count']}, Duration: {session.get('duration', 'Unknown')}")
             print(f"    Script: {session['script_file']}")
+            timed = [(name, stats) for name, stats in session.get('hook_latency', {}).items() if stats.get('count')]
+            if timed:
+                name, stats = max(timed, key=lambda item: item[1]['p99_ms'])
+                print(f"    Slowest hook step: {name} (p99 {stats['p99_ms']:.1f} ms)")
             if session.get('actions_summary'):
                 preview = session['actions_summary'][0] if session['actions_summary'] else "No actions"
                 print(f"    First action: {preview[:60]}...")
         
-        if len(history) > 10:
-            print(f"\n... and {len(history) - 10} older sessions")
+        older = total - (page + 1) * page_size
+        if older > 0:
+            print(f"\n... and {older} older sessions")
         
-        print(f"\nTotal sessions recorded: {len(history)}")
-        print(f"History file: {self.history_file}")
+        print(f"\nTotal sessions recorded: {total}")
+        print(f"History file: {self.history.path}")
+        return older > 0
         
     def connect_to_whatsapp(self):
         """Connect to WhatsApp Desktop."""
         try:
-            self.app = Application(backend="uia").connect(title="WhatsApp")
+            self.app = self.backend.connect(title="WhatsApp")
             print("✓ Connected to WhatsApp Desktop")
             return True
         except Exception as e:
@@ -272,7 +406,14 @@ class WhatsAppRecorder:
             return False
     
     def start_recording(self):
-        """Start recording user interactions."""
+        """Start recording user interactions and block until it stops."""
+        self.begin_recording()
+        
+        # Handle input events on this thread until CTRL+R or ESC stops the loop
+        self.loop.run()
+    
+    def begin_recording(self):
+        """Reset the session and install the input hooks."""
         print("\n🔴 RECORDING STARTED")
         print("Instructions:")
         print("- Perform your WhatsApp actions (click chats, scroll, etc.)")
@@ -284,95 +425,153 @@ class WhatsAppRecorder:
         
         self.recording = True
         self.recorded_actions = []
-        self.current_message = ""
+        self.editor = MessageEditor(paste=self.clipboard.backend.get_text)
         self.captured_text = []
         self.selected_messages = []
         self.start_time = datetime.now()
+        self.metrics = HookMetrics(self.trace_file)
+        # Hooks only queue their events; one consumer handles them in order
+        self.loop = EventLoop(self.metrics)
+        self.gestures = GestureCoalescer(self.add_gesture, position=self.backend.mouse_position)
+        
+        # Stream every action to disk so a crash does not lose the session
+        journal_file = f"recording_journal_{self.start_time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self.journal = ActionJournal(journal_file)
+        self.journal_write('session', {'start_time': self.start_time.isoformat()})
         
         # Set up hotkeys
-        keyboard.add_hotkey('ctrl+r', self.stop_recording)
-        keyboard.add_hotkey('esc', self.cancel_recording)
+        self.backend.add_hotkey(STOP_HOTKEY, self.loop.wrap('stop', self.stop_recording))
+        self.backend.add_hotkey(CANCEL_HOTKEY, self.loop.wrap('cancel', self.cancel_recording))
+        
+        # Cached click targets are dropped whenever the WhatsApp window moves or resizes
+        self.resolver.cache.window_rect = self.backend.window_rect(self.app)
+        self.locate_message_list()
+        
+        # Record scroll and drag gestures; hooked before the clicks so a drag's release is seen first
+        self.backend.hook_mouse(self.metrics.wrap('mouse_hook', self.loop.wrap('mouse', self.record_mouse_event)))
         
         # Record mouse clicks
-        mouse.on_click(self.record_mouse_click)
+        self.backend.on_click(self.metrics.wrap('click_hook', self.on_click))
         
         # Record keyboard presses
-        keyboard.hook(self.record_key_press)
+        self.backend.hook_keyboard(self.metrics.wrap('key_hook', self.loop.wrap('key', self.record_key_press)))
         
         print("🎤 Keyboard recording active - type messages and they'll be captured!")
         print("📌 Press F2 after selecting a message to capture it!")
-        
-        # Keep recording until stopped
-        while self.recording:
-            time.sleep(0.1)
     
-    def record_mouse_click(self):
-        """Record mouse click events."""
-        if not self.recording:
-            return
-            
-        x, y = mouse.get_position()
+    def on_click(self):
+        """Mouse hook: take the position and time now, record the click on the event loop."""
+        x, y = self.backend.mouse_position()
+        # Whole microseconds, which the compact format stores as an integer
+        self.loop.post('click', self.record_mouse_click, x, y, datetime.now(), round(time.monotonic(), 6))
+    
+    def record_mouse_click(self, x, y, clicked, monotonic):
+        """Record mouse click events.
         
-        # Try to identify the UI element at this position
-        try:
-            desktop = Desktop(backend="uia")
-            element = desktop.from_point(x, y)
-            
-            action = {
-                'type': 'click',
-                'timestamp': datetime.now().isoformat(),
-                'position': {'x': x, 'y': y},
-                'element_info': {
-                    'control_type': element.element_info.control_type,
-                    'name': element.element_info.name,
-                    'automation_id': element.element_info.automation_id,
-                    'class_name': element.element_info.class_name,
-                }
-            }
-            
-            self.recorded_actions.append(action)
-            print(f"📍 Recorded click at ({x}, {y}) on {element.element_info.control_type}")
+        The element under the cursor is resolved on a worker thread.
+        """
+        if not self.recording or self.gestures.take_drag_release():
+            return
             
-        except Exception as e:
-            # Fallback: just record the coordinates
-            action = {
-                'type': 'click',
-                'timestamp': datetime.now().isoformat(),
-                'position': {'x': x, 'y': y},
-                'element_info': None
-            }
-            self.recorded_actions.append(action)
-            print(f"📍 Recorded click at ({x}, {y}) - element detection failed")
+        action = {
+            'type': 'click',
+            'timestamp': clicked.isoformat(),
+            'monotonic': monotonic,
+            'position': {'x': x, 'y': y},
+            'element_info': None
+        }
+        index = self.add_action(action)
+        messages = self.message_list_rect()
+        if messages is None or x < messages[0]:
+            self.forget_messages(header=True)   # a click in the chat list may open another chat
+        self.resolver.submit(x, y, lambda info: self.element_resolved(index, info))
+        self.log(f"📍 Recorded click at ({x}, {y})")
+    
+    def record_mouse_event(self, event):
+        """Feed a raw mouse event (move, button, wheel) to the gesture coalescer."""
+        if self.recording:
+            self.gestures.feed(event)
+    
+    def element_resolved(self, index, element_info):
+        """Resolver callback, on a worker thread: the event loop attaches the element."""
+        if self.loop.stopped:
+            with self.actions_lock:     # stop_recording is draining the resolver
+                self.attach_element_info(index, element_info)
+        else:
+            self.loop.post('element_info', self.attach_element_info, index, element_info)
+    
+    def attach_element_info(self, index, element_info):
+        """Store the resolved element of a click recorded earlier."""
+        if element_info is None:
+            self.log(f"   ↳ click {index + 1}: element detection failed")
+            return
+        if element_info['control_type'] == 'Button':
+            self.forget_messages()  # sending or attaching changes the message list
+        messages = self.message_list_rect()
+        if (element_info['control_type'] == 'ListItem' and messages is not None and
+                self.recorded_actions[index]['position']['x'] < messages[0]):
+            self.clicked_chat = element_info['name']
+        self.recorded_actions[index]['element_info'] = element_info
+        self.journal_write('element_info', {'index': index, 'element_info': element_info})
+        self.log(f"   ↳ click {index + 1}: {element_info['control_type']} '{(element_info['name'] or '')[:40]}'")
     
     def stop_recording(self):
         """Stop recording and generate script."""
         self.recording = False
-        mouse.unhook_all()
-        keyboard.unhook_all()
+        self.backend.unhook_all()
+        self.loop.stop()
+        self.gestures.flush()
         
         # Save any remaining message being typed
-        if self.current_message.strip():
+        message = self.editor.take().strip()
+        if message:
             action = {
                 'type': 'message',
                 'timestamp': datetime.now().isoformat(),
-                'text': self.current_message.strip()
+                'text': message,
+                'chat': self.open_chat_name()
             }
-            self.recorded_actions.append(action)
-            self.captured_text.append(self.current_message.strip())
-            print(f"💬 Saved incomplete message: {self.current_message.strip()}")
+            self.add_action(action)
+            self.add_captured_text(message)
+            print(f"💬 Saved incomplete message: {message}")
+        
+        # Let the worker attach elements to the last clicks
+        if self.resolver.pending:
+            print(f"⏳ Resolving {self.resolver.pending} clicked elements...")
+        self.resolver.drain()
+        self.loop.drain('element_info')     # posted before the loop stopped
+        
+        self.finish_session(datetime.now())
         
-        end_time = datetime.now()
+        if self.journal:
+            # Everything is in the generated files now
+            self.journal.close(remove=True)
+            self.journal = None
+        self.metrics.close()
+    
+    def finish_session(self, end_time):
+        """Generate the script and message files for the recorded session."""
         duration = str(end_time - self.start_time).split('.')[0]  # Remove microseconds
         
         print(f"\n🟢 RECORDING STOPPED - {len(self.recorded_actions)} actions recorded")
         print(f"� Messages typed: {len(self.captured_text)}")
         print(f"📌 Messages selected: {len(self.selected_messages)}")
+        if self.gestures.events:
+            print(f"🖱️  Mouse events: {self.gestures.events:,} coalesced into {self.gestures.gestures} scroll/drag actions")
         print(f"Recording duration: {duration}")
         
+        # The data file keeps every recorded action; only the script is optimized
+        self.script_actions, removed = self.recorded_actions, {}
+        if self.optimize and self.recorded_actions:
+            self.script_actions, removed = optimize_actions(self.recorded_actions, (STOP_HOTKEY, CANCEL_HOTKEY))
+            print_report(len(self.recorded_actions), removed)
+        
         if self.recorded_actions:
             script_file, data_file = self.generate_script()
+            self.session_id = self.store.start_session('recording', self.start_time.isoformat())
             text_file = self.save_captured_text()
             selected_file = self.save_selected_messages()
+            self.store.end_session(self.session_id, end_time.isoformat())
             
             # Create session info for history
             session_info = {
@@ -380,13 +579,17 @@ class WhatsAppRecorder:
                 'end_time': end_time.strftime("%Y-%m-%d %H:%M:%S"),
                 'duration': duration,
                 'action_count': len(self.recorded_actions),
+                'optimized_away': sum(removed.values()),
                 'message_count': len(self.captured_text),
                 'selected_count': len(self.selected_messages),
                 'script_file': script_file,
                 'data_file': data_file,
                 'text_file': text_file,
                 'selected_file': selected_file,
-                'actions_summary': [self.get_action_summary(action) for action in self.recorded_actions[:10]]
+                'store_session': self.session_id,
+                'actions_summary': [self.get_action_summary(action) for action in self.recorded_actions[:10]],
+                'element_resolution': self.resolver.summary(),
+                'hook_latency': self.metrics.summary()
             }
             
             # Save to history
@@ -397,6 +600,8 @@ class WhatsAppRecorder:
             print("📋 SESSION SUMMARY")
             print("=" * 50)
             print(f"Actions recorded: {len(self.recorded_actions)}")
+            if session_info['optimized_away']:
+                print(f"Redundant actions removed: {session_info['optimized_away']}")
             print(f"Messages typed: {len(self.captured_text)}")
             print(f"Messages selected: {len(self.selected_messages)}")
             print(f"Duration: {duration}")
@@ -406,6 +611,20 @@ class WhatsAppRecorder:
                 print(f"Typed messages saved: {text_file}")
             if selected_file:
                 print(f"Selected messages saved: {selected_file}")
+            
+            resolution = self.resolver.summary()
+            if resolution.get('resolve_p50_ms') is not None:
+                print(f"Element lookups: {resolution['resolved']} resolved, {resolution['failed']} failed, "
+                      f"p50 {resolution['resolve_p50_ms']:.0f} ms, p95 {resolution['resolve_p95_ms']:.0f} ms, "
+                      f"max queue depth {resolution['max_queue_depth']}")
+            if resolution['cache_hits'] or resolution['cache_misses']:
+                print(f"Element cache: {resolution['cache_hits']} hits, {resolution['cache_misses']} misses "
+                      f"({resolution['cache_hit_rate']:.0%}), {resolution['cache_invalidations']} invalidations")
+            if session_info['hook_latency']:
+                print("Hook latency:")
+                print_summary(session_info['hook_latency'], "   ")
+            if self.metrics.trace:
+                print(f"Hook trace: {self.metrics.trace.path}")
                 
             # Show captured messages preview
             if self.captured_text:
@@ -441,13 +660,24 @@ class WhatsAppRecorder:
             return f"Selected: {message_preview}"
         elif action['type'] == 'keypress':
             return f"Key press: {action['key']}"
+        elif action['type'] == 'scroll':
+            direction = 'up' if action['notches'] > 0 else 'down'
+            return f"Scroll {direction} {abs(action['notches']):g} notches at ({action['position']['x']}, {action['position']['y']})"
+        elif action['type'] == 'drag':
+            start, end = action['position'], action['end']
+            return f"Drag from ({start['x']}, {start['y']}) to ({end['x']}, {end['y']})"
         return f"Unknown action: {action['type']}"
     
     def cancel_recording(self):
         """Cancel recording without generating script."""
         self.recording = False
-        mouse.unhook_all()
-        keyboard.unhook_all()
+        self.backend.unhook_all()
+        self.loop.stop()
+        
+        if self.journal:
+            self.journal.close(remove=True)
+            self.journal = None
+        self.metrics.close()
         
         print("\n🟡 RECORDING CANCELLED")
     
@@ -462,14 +692,16 @@ class WhatsAppRecorder:
         # Save the recorded script
         timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
         script_filename = f"recorded_whatsapp_script_{timestamp}.py"
-        data_filename = f"recorded_actions_{timestamp}.json"
+        data_filename = f"recorded_actions_{timestamp}{COMPACT_SUFFIX if self.compact_data else '.json'}"
         
         with open(script_filename, 'w', encoding='utf-8') as f:
             f.write(script_content)
         
-        # Save raw data for debugging
-        with open(data_filename, 'w', encoding='utf-8') as f:
-            json.dump(self.recorded_actions, f, indent=2, ensure_ascii=False)
+        # Save raw data for debugging and replay, one action at a time
+        if self.compact_data:
+            write_compact(data_filename, self.recorded_actions)
+        else:
+            write_json(data_filename, self.recorded_actions)
         
         print(f"✓ Generated script: {script_filename}")
         print(f"✓ Raw data saved: {data_filename}")
@@ -477,18 +709,73 @@ class WhatsAppRecorder:
         return script_filename, data_filename
         
     def create_script_template(self):
-        """Create a Python script from recorded actions."""
+        """Create a Python script from recorded actions.
+        
+        Every distinct element the recording touches goes into a LOCATORS
+        table at the top of the script and is looked up once per run. Long
+        recordings are emitted as a compact ACTIONS table driven by a loop
+        instead of one unrolled block per action.
+        """
+        self.collect_locators()
+        table_mode = len(self.script_actions) > UNROLL_LIMIT
+        has_selection = any(action['type'] == 'selected_message' for action in self.script_actions)
+        has_gestures = any(action['type'] in GESTURE_TYPES for action in self.script_actions)
+        
         script_lines = [
             "#!/usr/bin/env python3",
             '"""',
             f"Auto-generated WhatsApp automation script",
             f"Generated on: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}",
-            f"Total actions recorded: {len(self.recorded_actions)}",
+            f"Total actions: {len(self.script_actions)} ({len(self.recorded_actions)} recorded)",
             '"""',
             "",
             "from pywinauto.application import Application",
             "from pywinauto import Desktop",
             "import time",
+        ]
+        if has_gestures:
+            script_lines.insert(-1, "from pywinauto import mouse")
+        if has_selection:
+            script_lines.append("import pyperclip")
+        script_lines.extend([
+            "",
+            "# UI elements used by the recording: (name, control_type); name None matches by type only",
+            "LOCATORS = [",
+        ])
+        for i, (name, control_type) in enumerate(self.locators):
+            script_lines.append(f"    ({name!r}, {control_type!r}),  # {i}")
+        script_lines.extend([
+            "]",
+            "",
+            "",
+            "class Locators:",
+            '    """Resolves each locator once; stale handles are re-resolved on first failure."""',
+            "",
+            "    def __init__(self, main_win):",
+            "        self.main_win = main_win",
+            "        self.handles = {}",
+            "",
+            "    def get(self, index, refresh=False):",
+            "        if refresh or index not in self.handles:",
+            "            name, control_type = LOCATORS[index]",
+            "            criteria = {'control_type': control_type}",
+            "            if name is not None:",
+            "                criteria['title'] = name",
+            "            self.handles[index] = self.main_win.child_window(**criteria).wrapper_object()",
+            "        return self.handles[index]",
+            "",
+            "    def call(self, index, method, *args, **kwargs):",
+            "        try:",
+            "            return getattr(self.get(index), method)(*args, **kwargs)",
+            "        except Exception:",
+            "            return getattr(self.get(index, refresh=True), method)(*args, **kwargs)",
+            "",
+        ])
+        
+        if table_mode:
+            script_lines.extend(self.generate_action_table())
+        
+        script_lines.extend([
             "",
             "def run_recorded_actions():",
             '    """Execute the recorded WhatsApp actions."""',
@@ -502,19 +789,27 @@ class WhatsAppRecorder:
             "",
             "    main_win = app.WhatsApp",
             "    desktop = Desktop(backend='uia')",
+            "    locators = Locators(main_win)",
             "",
             "    # Execute recorded actions",
-        ]
+        ])
         
-        for i, action in enumerate(self.recorded_actions):
-            if action['type'] == 'click':
-                script_lines.extend(self.generate_click_code(action, i))
-            elif action['type'] == 'message':
-                script_lines.extend(self.generate_message_code(action, i))
-            elif action['type'] == 'selected_message':
-                script_lines.extend(self.generate_selected_message_code(action, i))
-            elif action['type'] == 'keypress':
-                script_lines.extend(self.generate_keypress_code(action, i))
+        if table_mode:
+            script_lines.extend(self.generate_action_loop(has_selection, has_gestures))
+        else:
+            for i, action in enumerate(self.script_actions):
+                if action['type'] == 'click':
+                    script_lines.extend(self.generate_click_code(action, i))
+                elif action['type'] == 'message':
+                    script_lines.extend(self.generate_message_code(action, i))
+                elif action['type'] == 'selected_message':
+                    script_lines.extend(self.generate_selected_message_code(action, i))
+                elif action['type'] == 'keypress':
+                    script_lines.extend(self.generate_keypress_code(action, i))
+                elif action['type'] == 'scroll':
+                    script_lines.extend(self.generate_scroll_code(action, i))
+                elif action['type'] == 'drag':
+                    script_lines.extend(self.generate_drag_code(action, i))
         
         script_lines.extend([
             "",
@@ -526,6 +821,103 @@ class WhatsAppRecorder:
         
         return '\n'.join(script_lines)
     
+    def collect_locators(self):
+        """Build the table of unique (name, control_type) locators used by the actions."""
+        self.locators = []
+        self.locator_ids = {}
+        for action in self.script_actions:
+            if action['type'] == 'click':
+                info = action.get('element_info')
+                if info and info.get('name'):
+                    self.locator_id(info['name'], info['control_type'])
+            elif action['type'] == 'message':
+                self.locator_id(None, 'Edit')
+    
+    def locator_id(self, name, control_type):
+        """Return the LOCATORS index of an element, adding it if new."""
+        key = (name, control_type)
+        if key not in self.locator_ids:
+            self.locator_ids[key] = len(self.locators)
+            self.locators.append(key)
+        return self.locator_ids[key]
+    
+    def generate_action_table(self):
+        """Generate the ACTIONS table used for long recordings."""
+        lines = [
+            "# (kind, locator index, argument, x, y)",
+            "ACTIONS = [",
+        ]
+        for action in self.script_actions:
+            if action['type'] == 'click':
+                info = action.get('element_info')
+                locator = self.locator_id(info['name'], info['control_type']) if info and info.get('name') else None
+                position = action['position']
+                lines.append(f"    ('click', {locator}, None, {position['x']}, {position['y']}),")
+            elif action['type'] == 'message':
+                lines.append(f"    ('type', {self.locator_id(None, 'Edit')}, {escape_keys(action['text'])!r}, None, None),")
+            elif action['type'] == 'keypress':
+                lines.append(f"    ('key', None, {key_code(action['key'])!r}, None, None),")
+            elif action['type'] == 'selected_message':
+                lines.append(f"    ('select', None, {action['text'][:30]!r}, None, None),")
+            elif action['type'] == 'scroll':
+                position = action['position']
+                lines.append(f"    ('scroll', None, {round(action['notches'])}, {position['x']}, {position['y']}),")
+            elif action['type'] == 'drag':
+                position = action['position']
+                lines.append(f"    ('drag', None, {path_points(action, DRAG_SCRIPT_POINTS)!r}, {position['x']}, {position['y']}),")
+        lines.extend([
+            "]",
+            "",
+            "STEP_DELAYS = {'click': 1, 'type': 1, 'key': 0.5, 'select': 1, 'scroll': 1, 'drag': 1}",
+            "",
+        ])
+        return lines
+    
+    def generate_action_loop(self, has_selection, has_gestures=False):
+        """Generate the loop that runs the ACTIONS table."""
+        lines = [
+            "    for step, (kind, locator, argument, x, y) in enumerate(ACTIONS, 1):",
+            "        try:",
+            "            if kind == 'click':",
+            "                try:",
+            "                    if locator is None:",
+            "                        raise LookupError('no locator recorded')",
+            "                    locators.call(locator, 'click_input')",
+            "                except Exception:",
+            "                    desktop.from_point(x, y).click_input()",
+            "            elif kind == 'type':",
+            "                locators.call(locator, 'click_input')",
+            "                locators.call(locator, 'type_keys', argument, with_spaces=True)",
+            "            elif kind == 'key':",
+            "                main_win.type_keys(argument)",
+        ]
+        if has_selection:
+            lines.extend([
+                "            elif kind == 'select':",
+                "                main_win.type_keys('^c')  # Ctrl+C to copy",
+                "                time.sleep(0.2)",
+                "                if argument not in pyperclip.paste():",
+                "                    print(f'⚠️  Step {step}: selected text may have changed')",
+            ])
+        if has_gestures:
+            lines.extend([
+                "            elif kind == 'scroll':",
+                "                mouse.scroll(coords=(x, y), wheel_dist=argument)",
+                "            elif kind == 'drag':",
+                "                mouse.press(coords=(x, y))",
+                "                for point in argument:",
+                "                    mouse.move(coords=point)",
+                "                    time.sleep(0.01)",
+                "                mouse.release(coords=argument[-1])",
+            ])
+        lines.extend([
+            "            print(f'✓ Step {step}/{len(ACTIONS)}: {kind}')",
+            "        except Exception as e:",
+            "            print(f'✗ Step {step}/{len(ACTIONS)} ({kind}) failed: {e}')",
+            "        time.sleep(STEP_DELAYS[kind])  # Wait between actions",
+        ])
+        return lines
+    
     def generate_click_code(self, action, index):
         """Generate Python code for a click action."""
         lines = [
@@ -536,15 +928,12 @@ class WhatsAppRecorder:
         if action['element_info'] and action['element_info']['name']:
             # Try to click by element name/properties
             element_info = action['element_info']
+            locator = self.locator_id(element_info['name'], element_info['control_type'])
             lines.extend([
                 f"    try:",
-                f"        # Try to find element by properties",
-                f"        element = main_win.child_window(",
-                f"            name='{element_info['name']}',",
-                f"            control_type='{element_info['control_type']}'",
-                f"        )",
-                f"        element.click_input()",
-                f"        print('✓ Clicked on: {element_info['name']}')",
+                f"        # Click the element from the locator table",
+                f"        locators.call({locator}, 'click_input')",
+                f"        print({'✓ Clicked on: ' + element_info['name']!r})",
                 f"    except Exception:",
                 f"        # Fallback: click by coordinates",
                 f"        desktop.from_point({action['position']['x']}, {action['position']['y']}).click_input()",
@@ -563,16 +952,17 @@ class WhatsAppRecorder:
     
     def generate_message_code(self, action, index):
         """Generate Python code for typing a message."""
-        message = action['text'].replace("'", "\\'")  # Escape single quotes
+        message = action['text']
+        preview = message[:50] + ('...' if len(message) > 50 else '')
+        locator = self.locator_id(None, 'Edit')
         lines = [
             f"",
             f"    # Action {index + 1}: Type message recorded at {action['timestamp']}",
             f"    try:",
-            f"        # Find the message input box and type the message",
-            f"        input_box = main_win.child_window(control_type='Edit')",
-            f"        input_box.click_input()",
-            f"        input_box.type_keys('{message}')",
-            f"        print('✓ Typed message: {message[:50]}{'...' if len(message) > 50 else ''}')",
+            f"        # Click the message input box and type the message",
+            f"        locators.call({locator}, 'click_input')",
+            f"        locators.call({locator}, 'type_keys', {escape_keys(message)!r}, with_spaces=True)",
+            f"        print({'✓ Typed message: ' + preview!r})",
             f"    except Exception as e:",
             f"        print(f'✗ Could not type message: {{e}}')",
             f"    time.sleep(1)  # Wait between actions"
@@ -587,7 +977,7 @@ class WhatsAppRecorder:
             f"    # Action {index + 1}: Key press '{key}' recorded at {action['timestamp']}",
             f"    try:",
             f"        # Send key press to the active window",
-            f"        main_win.type_keys('{{{key.upper()}}}')",
+            f"        main_win.type_keys({key_code(key)!r})",
             f"        print('✓ Pressed key: {key}')",
             f"    except Exception as e:",
             f"        print(f'✗ Could not press key {key}: {{e}}')",
@@ -597,17 +987,16 @@ class WhatsAppRecorder:
     
     def generate_selected_message_code(self, action, index):
         """Generate Python code for capturing selected message."""
-        expected_text = action['text'][:30].replace("'", "\\'")  # Truncate and escape
+        expected_text = action['text'][:30]  # Truncate
         lines = [
             f"",
             f"    # Action {index + 1}: Capture selected message recorded at {action['timestamp']}",
             f"    try:",
             f"        # Method 1: Try to get selected text via clipboard",
-            f"        import pyperclip",
             f"        main_win.type_keys('^c')  # Ctrl+C to copy",
             f"        time.sleep(0.2)",
             f"        selected_text = pyperclip.paste()",
-            f"        if selected_text and '{expected_text}' in selected_text:",
+            f"        if selected_text and {expected_text!r} in selected_text:",
             f"            print(f'✓ Captured selected message: {{selected_text[:50]}}...')",
             f"            # Save to file or process as needed",
             f"        else:",
@@ -618,14 +1007,50 @@ class WhatsAppRecorder:
         ]
         return lines
 
-def manual_inspector():
+    def generate_scroll_code(self, action, index):
+        """Generate Python code for a scroll gesture (the wheel notches of the whole run at once)."""
+        x, y = action['position']['x'], action['position']['y']
+        notches = round(action['notches'])
+        direction = 'up' if notches > 0 else 'down'
+        lines = [
+            f"",
+            f"    # Action {index + 1}: Scroll {direction} recorded at {action['timestamp']}",
+            f"    try:",
+            f"        mouse.scroll(coords=({x}, {y}), wheel_dist={notches})",
+            f"        print('✓ Scrolled {direction} {abs(notches)} notches at ({x}, {y})')",
+            f"    except Exception as e:",
+            f"        print(f'✗ Could not scroll: {{e}}')",
+            f"    time.sleep(1)  # Wait between actions"
+        ]
+        return lines
+    
+    def generate_drag_code(self, action, index):
+        """Generate Python code for a drag gesture along its recorded path."""
+        start, end = action['position'], action['end']
+        lines = [
+            f"",
+            f"    # Action {index + 1}: Drag recorded at {action['timestamp']}",
+            f"    try:",
+            f"        mouse.press(coords=({start['x']}, {start['y']}))",
+            f"        for point in {path_points(action, DRAG_SCRIPT_POINTS)!r}:",
+            f"            mouse.move(coords=point)",
+            f"            time.sleep(0.01)",
+            f"        mouse.release(coords=({end['x']}, {end['y']}))",
+            f"        print('✓ Dragged from ({start['x']}, {start['y']}) to ({end['x']}, {end['y']})')",
+            f"    except Exception as e:",
+            f"        print(f'✗ Could not drag: {{e}}')",
+            f"    time.sleep(1)  # Wait between actions"
+        ]
+        return lines
+
+def manual_inspector(backend=None):
     """Manual UI element inspector."""
     print("\n🔍 MANUAL UI INSPECTOR")
     print("This will help you identify WhatsApp UI elements manually.")
     print("-" * 50)
     
     try:
-        app = Application(backend="uia").connect(title="WhatsApp")
+        app = (backend or default_backend()).connect(title="WhatsApp")
         main_win = app.WhatsApp
         
         print("✓ Connected to WhatsApp Desktop")
@@ -660,11 +1085,19 @@ def manual_inspector():
 
 def main():
     """Main recorder interface."""
+    parser = argparse.ArgumentParser(description="Record WhatsApp Desktop interactions")
+    parser.add_argument('--trace', metavar='FILE', help="write every timed hook event to this JSONL file")
+    parser.add_argument('--compact', action='store_true',
+                        help=f"save the recorded actions in the compressed binary format ({COMPACT_SUFFIX})")
+    parser.add_argument('--no-optimize', action='store_true',
+                        help="keep every recorded action (no redundant click/key/scroll removal)")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("🎬 WhatsApp Desktop Recorder & Inspector")
     print("=" * 60)
     
-    recorder = WhatsAppRecorder()
+    recorder = WhatsAppRecorder(trace_file=args.trace, compact_data=args.compact, optimize=not args.no_optimize)
     
     print("\nChoose an option:")
     print("1. Record interactions (creates automated script)")
@@ -682,14 +1115,18 @@ def main():
             break
             
         elif choice == "2":
-            manual_inspector()
+            manual_inspector(recorder.backend)
             break
             
         elif choice == "3":
             recorder.show_last_recording()
             
         elif choice == "4":
-            recorder.show_recording_history()
+            page = 0
+            while recorder.show_recording_history(page):
+                if input("\nPress N for older sessions, Enter to stop: ").strip().lower() != "n":
+                    break
+                page += 1
             
         elif choice == "5":
             print("Goodbye!")